@@ -0,0 +1,70 @@
+"""add package daily capacity ledger
+
+Revision ID: 3f9a1c7d2e10
+Revises: c95c07e31546
+Create Date: 2026-10-18 10:12:41.208733
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a1c7d2e10'
+down_revision: Union[str, Sequence[str], None] = 'c95c07e31546'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('package_daily_capacity',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tour_package_id', sa.Integer(), nullable=False),
+    sa.Column('travel_date', sa.Date(), nullable=False),
+    sa.Column('drivers_available', sa.Integer(), nullable=False),
+    sa.Column('seats_available', sa.Integer(), nullable=False),
+    sa.Column('bookings_count', sa.Integer(), nullable=False),
+    sa.Column('seats_booked', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['tour_package_id'], ['tour_packages.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('tour_package_id', 'travel_date', name='uq_package_daily_capacity_package_date')
+    )
+    op.create_index(op.f('ix_package_daily_capacity_id'), 'package_daily_capacity', ['id'], unique=False)
+
+    # Backfill the ledger from existing bookings
+    op.execute(
+        """
+        INSERT INTO package_daily_capacity (
+            tour_package_id, travel_date,
+            drivers_available, seats_available,
+            bookings_count, seats_booked
+        )
+        SELECT
+            b.tour_package_id,
+            b.travel_date,
+            COALESCE(cap.drivers, 0),
+            COALESCE(cap.seats, 0),
+            COUNT(b.id),
+            SUM(b.adults + b.kids)
+        FROM manual_bookings b
+        LEFT JOIN (
+            SELECT tpd.tour_package_id,
+                   COUNT(tpd.id) AS drivers,
+                   COALESCE(SUM(d.seats), 0) AS seats
+            FROM tour_package_drivers tpd
+            JOIN drivers d ON d.id = tpd.driver_id AND d.is_deleted = false
+            GROUP BY tpd.tour_package_id
+        ) cap ON cap.tour_package_id = b.tour_package_id
+        WHERE b.is_deleted = false
+        GROUP BY b.tour_package_id, b.travel_date, cap.drivers, cap.seats
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_package_daily_capacity_id'), table_name='package_daily_capacity')
+    op.drop_table('package_daily_capacity')
@@ -0,0 +1,52 @@
+"""add driver assignments
+
+Revision ID: 5b2e8d4a91c3
+Revises: 3f9a1c7d2e10
+Create Date: 2026-10-18 11:04:17.552190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b2e8d4a91c3'
+down_revision: Union[str, Sequence[str], None] = '3f9a1c7d2e10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('driver_assignments',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('driver_id', sa.Integer(), nullable=False),
+    sa.Column('travel_date', sa.Date(), nullable=False),
+    sa.Column('booking_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['booking_id'], ['manual_bookings.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['driver_id'], ['drivers.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('booking_id'),
+    sa.UniqueConstraint('driver_id', 'travel_date', name='uq_driver_assignments_driver_date')
+    )
+    op.create_index(op.f('ix_driver_assignments_id'), 'driver_assignments', ['id'], unique=False)
+
+    # Backfill: the oldest booking keeps the driver when history already
+    # holds a double booking.
+    op.execute(
+        """
+        INSERT INTO driver_assignments (driver_id, travel_date, booking_id)
+        SELECT driver_id, travel_date, MIN(id)
+        FROM manual_bookings
+        WHERE driver_id IS NOT NULL AND is_deleted = false
+        GROUP BY driver_id, travel_date
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_driver_assignments_id'), table_name='driver_assignments')
+    op.drop_table('driver_assignments')
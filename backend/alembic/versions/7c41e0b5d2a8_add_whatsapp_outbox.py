@@ -0,0 +1,45 @@
+"""add whatsapp outbox
+
+Revision ID: 7c41e0b5d2a8
+Revises: 5b2e8d4a91c3
+Create Date: 2026-10-18 11:47:03.118402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c41e0b5d2a8'
+down_revision: Union[str, Sequence[str], None] = '5b2e8d4a91c3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('whatsapp_outbox',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('booking_id', sa.Integer(), nullable=True),
+    sa.Column('phone_number', sa.String(length=30), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('next_attempt_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['booking_id'], ['manual_bookings.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_whatsapp_outbox_id'), 'whatsapp_outbox', ['id'], unique=False)
+    op.create_index('ix_whatsapp_outbox_status_next_attempt', 'whatsapp_outbox', ['status', 'next_attempt_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_whatsapp_outbox_status_next_attempt', table_name='whatsapp_outbox')
+    op.drop_index(op.f('ix_whatsapp_outbox_id'), table_name='whatsapp_outbox')
+    op.drop_table('whatsapp_outbox')
@@ -0,0 +1,65 @@
+"""add company daily kpi rollups
+
+Revision ID: 9d6f3a2b8e47
+Revises: 7c41e0b5d2a8
+Create Date: 2026-10-18 12:31:55.904117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d6f3a2b8e47'
+down_revision: Union[str, Sequence[str], None] = '7c41e0b5d2a8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('company_daily_kpis',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('bookings_created', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('paid_revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('pending_count', sa.Integer(), nullable=False),
+    sa.Column('outstanding_amount', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('company_id', 'day', name='uq_company_daily_kpis_company_day')
+    )
+    op.create_index(op.f('ix_company_daily_kpis_id'), 'company_daily_kpis', ['id'], unique=False)
+
+    # Backfill from existing bookings
+    # (or: python -m app.commands.rebuild_kpi_rollups)
+    op.execute(
+        """
+        INSERT INTO company_daily_kpis (
+            company_id, day, bookings_created, revenue,
+            paid_revenue, pending_count, outstanding_amount
+        )
+        SELECT
+            p.company_id,
+            date(b.created_at),
+            COUNT(b.id),
+            COALESCE(SUM(b.total_amount), 0),
+            COALESCE(SUM(CASE WHEN b.payment_status = 'paid' THEN b.total_amount ELSE 0 END), 0),
+            SUM(CASE WHEN b.payment_status = 'paid' THEN 0 ELSE 1 END),
+            COALESCE(SUM(b.remaining_amount), 0)
+        FROM manual_bookings b
+        JOIN tour_packages p ON p.id = b.tour_package_id
+        WHERE b.is_deleted = false AND b.created_at IS NOT NULL
+        GROUP BY p.company_id, date(b.created_at)
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_company_daily_kpis_id'), table_name='company_daily_kpis')
+    op.drop_table('company_daily_kpis')
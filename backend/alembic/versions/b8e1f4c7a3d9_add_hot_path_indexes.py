@@ -0,0 +1,63 @@
+"""add hot path indexes
+
+Revision ID: b8e1f4c7a3d9
+Revises: 9d6f3a2b8e47
+Create Date: 2026-10-18 14:02:41.318406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e1f4c7a3d9'
+down_revision: Union[str, Sequence[str], None] = '9d6f3a2b8e47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+LIVE_ROW = "is_deleted = false"
+LIVE_ROW_SQLITE = "is_deleted = 0"
+
+# (name, table, columns, postgres predicate, sqlite predicate)
+INDEXES = [
+    ('ix_manual_bookings_package_travel_date', 'manual_bookings', ['tour_package_id', 'travel_date'],
+     LIVE_ROW, LIVE_ROW_SQLITE),
+    ('ix_manual_bookings_package_created_at', 'manual_bookings', ['tour_package_id', 'created_at'],
+     LIVE_ROW, LIVE_ROW_SQLITE),
+    ('ix_tour_packages_company_id', 'tour_packages', ['company_id', 'id'],
+     None, None),
+    ('ix_tour_packages_status', 'tour_packages', ['status', 'id'],
+     LIVE_ROW, LIVE_ROW_SQLITE),
+    ('ix_tour_package_drivers_package_driver', 'tour_package_drivers', ['tour_package_id', 'driver_id'],
+     None, None),
+    ('ix_tour_package_drivers_driver_id', 'tour_package_drivers', ['driver_id'],
+     None, None),
+    ('ix_tour_package_gallery_images_tour_package_id', 'tour_package_gallery_images', ['tour_package_id'],
+     None, None),
+    ('ix_driver_assignments_travel_date', 'driver_assignments', ['travel_date'],
+     None, None),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY so bookings keep being written while the indexes build;
+    # it cannot run inside the migration transaction.
+    with op.get_context().autocommit_block():
+        for name, table, columns, pg_where, sqlite_where in INDEXES:
+            op.create_index(
+                name, table, columns, unique=False,
+                postgresql_where=sa.text(pg_where) if pg_where else None,
+                sqlite_where=sa.text(sqlite_where) if sqlite_where else None,
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, *_ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
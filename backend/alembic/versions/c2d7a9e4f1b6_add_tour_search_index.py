@@ -0,0 +1,109 @@
+"""add tour search index
+
+Revision ID: c2d7a9e4f1b6
+Revises: b8e1f4c7a3d9
+Create Date: 2026-10-18 14:47:09.552180
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2d7a9e4f1b6'
+down_revision: Union[str, Sequence[str], None] = 'b8e1f4c7a3d9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+POSTGRES_UPGRADE = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    ALTER TABLE tour_packages ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(city, '') || ' ' || coalesce(country, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'C') ||
+        setweight(to_tsvector('english', coalesce(itinerary, '')), 'D')
+    ) STORED
+    """,
+    """
+    ALTER TABLE tour_packages ADD COLUMN search_text text
+    GENERATED ALWAYS AS (
+        coalesce(title, '') || ' ' || coalesce(city, '') || ' ' || coalesce(country, '')
+    ) STORED
+    """,
+    "CREATE INDEX ix_tour_packages_search_vector ON tour_packages USING gin (search_vector)",
+    "CREATE INDEX ix_tour_packages_search_text_trgm ON tour_packages USING gin (search_text gin_trgm_ops)",
+]
+
+POSTGRES_DOWNGRADE = [
+    "DROP INDEX IF EXISTS ix_tour_packages_search_text_trgm",
+    "DROP INDEX IF EXISTS ix_tour_packages_search_vector",
+    "ALTER TABLE tour_packages DROP COLUMN IF EXISTS search_text",
+    "ALTER TABLE tour_packages DROP COLUMN IF EXISTS search_vector",
+]
+
+# External-content FTS5 table over tour_packages, kept in sync by triggers
+SQLITE_UPGRADE = [
+    """
+    CREATE VIRTUAL TABLE tour_packages_fts USING fts5(
+        title, city, country, description, itinerary,
+        content='tour_packages', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER tour_packages_fts_ai AFTER INSERT ON tour_packages BEGIN
+        INSERT INTO tour_packages_fts (rowid, title, city, country, description, itinerary)
+        VALUES (new.id, new.title, new.city, new.country, new.description, new.itinerary);
+    END
+    """,
+    """
+    CREATE TRIGGER tour_packages_fts_ad AFTER DELETE ON tour_packages BEGIN
+        INSERT INTO tour_packages_fts (tour_packages_fts, rowid, title, city, country, description, itinerary)
+        VALUES ('delete', old.id, old.title, old.city, old.country, old.description, old.itinerary);
+    END
+    """,
+    """
+    CREATE TRIGGER tour_packages_fts_au AFTER UPDATE ON tour_packages BEGIN
+        INSERT INTO tour_packages_fts (tour_packages_fts, rowid, title, city, country, description, itinerary)
+        VALUES ('delete', old.id, old.title, old.city, old.country, old.description, old.itinerary);
+        INSERT INTO tour_packages_fts (rowid, title, city, country, description, itinerary)
+        VALUES (new.id, new.title, new.city, new.country, new.description, new.itinerary);
+    END
+    """,
+    "INSERT INTO tour_packages_fts (tour_packages_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS tour_packages_fts_au",
+    "DROP TRIGGER IF EXISTS tour_packages_fts_ad",
+    "DROP TRIGGER IF EXISTS tour_packages_fts_ai",
+    "DROP TABLE IF EXISTS tour_packages_fts",
+]
+
+
+def _run(statements):
+    for statement in statements:
+        op.execute(sa.text(statement))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        _run(POSTGRES_UPGRADE)
+    elif dialect == "sqlite":
+        _run(SQLITE_UPGRADE)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        _run(POSTGRES_DOWNGRADE)
+    elif dialect == "sqlite":
+        _run(SQLITE_DOWNGRADE)
@@ -1,8 +1,11 @@
 from fastapi import Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
 from jose import jwt, JWTError
 
-from app.database.session import get_db
+from app.auth.principal_cache import principal_cache, principal_from_user
+from app.database.session import get_db, get_async_db
 from app.models.user import User
 from app.core.security import SECRET_KEY, ALGORITHM
 
@@ -25,10 +28,10 @@ def redirect_to_login_success(request: Request, message: str):
     return response
 
 
-def get_current_user(
-    request: Request,
-    db: Session = Depends(get_db)
-):
+def _decode_token(request: Request):
+    """
+    Returns (token, payload), or a login redirect when there is no valid token.
+    """
     token = request.cookies.get("access_token")
 
     if not token:
@@ -36,16 +39,38 @@ def get_current_user(
 
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: int = payload.get("user_id")
     except JWTError:
         return redirect_to_login(request, "Session expired. Please login again")
 
-    user = db.query(User).filter(User.id == user_id).first()
+    return token, payload
+
+
+def get_current_user(
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    principal = principal_cache.get(request.cookies.get("access_token"))
+    if principal:
+        return principal
+
+    decoded = _decode_token(request)
+    if isinstance(decoded, RedirectResponse):
+        return decoded
+    token, payload = decoded
+
+    user = (
+        db.query(User)
+        .options(joinedload(User.company))
+        .filter(User.id == payload.get("user_id"))
+        .first()
+    )
 
     if not user:
         return redirect_to_login(request, "User not found")
 
-    return user
+    principal = principal_from_user(user)
+    principal_cache.put(token, principal, payload.get("exp"))
+    return principal
 
 
 def admin_only(
@@ -72,3 +97,61 @@ def company_only(
         return redirect_to_login(request, "Company access only")
 
     return current_user
+
+
+# -------------------------------------------------
+# Async variants for `async def` routes (AsyncSession)
+# -------------------------------------------------
+async def get_current_user_async(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
+):
+    principal = principal_cache.get(request.cookies.get("access_token"))
+    if principal:
+        return principal
+
+    decoded = _decode_token(request)
+    if isinstance(decoded, RedirectResponse):
+        return decoded
+    token, payload = decoded
+
+    user = (
+        await db.execute(
+            select(User)
+            .options(joinedload(User.company))
+            .where(User.id == payload.get("user_id"))
+        )
+    ).scalar_one_or_none()
+
+    if not user:
+        return redirect_to_login(request, "User not found")
+
+    principal = principal_from_user(user)
+    principal_cache.put(token, principal, payload.get("exp"))
+    return principal
+
+
+async def admin_only_async(
+    request: Request,
+    current_user: User = Depends(get_current_user_async)
+):
+    if isinstance(current_user, RedirectResponse):
+        return current_user
+
+    if current_user.role != "admin":
+        return redirect_to_login(request, "Admin access only")
+
+    return current_user
+
+
+async def company_only_async(
+    request: Request,
+    current_user: User = Depends(get_current_user_async)
+):
+    if isinstance(current_user, RedirectResponse):
+        return current_user
+
+    if current_user.role != "company":
+        return redirect_to_login(request, "Company access only")
+
+    return current_user
@@ -0,0 +1,119 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from app.core.config import settings
+
+
+@dataclass(frozen=True)
+class CompanyPrincipal:
+    id: int
+    company_name: str
+    status: str
+    currency: str
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    What the auth dependencies hand to routes instead of a User row.
+
+    Detached from any session: routes that change the user or company
+    must load it from their own session.
+    """
+    id: int
+    email: str
+    role: str
+    company: Optional[CompanyPrincipal] = None
+
+
+def principal_from_user(user) -> Principal:
+    company = user.company
+    return Principal(
+        id=user.id,
+        email=user.email,
+        role=user.role,
+        company=CompanyPrincipal(
+            id=company.id,
+            company_name=company.company_name,
+            status=company.status,
+            currency=company.currency,
+        ) if company else None,
+    )
+
+
+class PrincipalCache:
+    """
+    Bounded LRU of access token -> Principal, each entry living at most
+    `ttl` seconds (and never past the token's own expiry).
+
+    The cache is per process. Invalidation only reaches the process that
+    made the change, the TTL bounds how stale the other workers can be.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[Principal]:
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+
+            expires_at, principal = entry
+            if expires_at <= now:
+                del self._entries[token]
+                return None
+
+            self._entries.move_to_end(token)
+            return principal
+
+    def put(self, token: str, principal: Principal, token_exp: float = None):
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+
+        ttl = self.ttl
+        if token_exp is not None:
+            ttl = min(ttl, token_exp - time.time())
+            if ttl <= 0:
+                return
+
+        with self._lock:
+            self._entries[token] = (time.monotonic() + ttl, principal)
+            self._entries.move_to_end(token)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, token: str):
+        with self._lock:
+            self._entries.pop(token, None)
+
+    def invalidate_user(self, user_id: int):
+        self._invalidate(lambda p: p.id == user_id)
+
+    def invalidate_company(self, company_id: int):
+        self._invalidate(lambda p: p.company is not None and p.company.id == company_id)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _invalidate(self, matches):
+        with self._lock:
+            stale = [token for token, (_, p) in self._entries.items() if matches(p)]
+            for token in stale:
+                del self._entries[token]
+
+
+principal_cache = PrincipalCache(
+    max_size=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL,
+)
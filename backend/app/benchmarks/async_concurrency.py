@@ -0,0 +1,119 @@
+"""
+Load-tests the booked-dates endpoint on the async session stack against a
+copy of the same handler on the old sync stack (a `def` route on get_db,
+served from Starlette's threadpool).
+
+    python -m app.benchmarks.async_concurrency --package 3 --concurrency 50 100 200
+
+Both variants run in one uvicorn process against the database in
+DATABASE_URL. Throughput and latency percentiles are printed per
+concurrency level.
+"""
+import argparse
+import asyncio
+from datetime import date, timedelta
+from typing import Optional
+
+from fastapi import Depends, FastAPI
+from sqlalchemy.orm import Session
+
+from app.benchmarks.http_client import load, serve_in_thread
+from app.database.session import engine, get_db
+from app.models.manual_booking import ManualBooking
+from app.models.tour_package import TourPackage
+from app.routers.web.manual_booking import get_booked_dates
+from app.services.capacity_service import capacity_window, package_capacity, MAX_WINDOW_DAYS
+
+
+def sync_booked_dates(
+    package_id: int,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    party_size: int = 1,
+    db: Session = Depends(get_db)
+):
+    """get_booked_dates as it ran before the async port."""
+    if not start:
+        start = date.today().replace(day=1)
+    if not end or end <= start:
+        end = (start + timedelta(days=32)).replace(day=1)
+    end = min(end, start + timedelta(days=MAX_WINDOW_DAYS))
+
+    drivers_total, seats_total = package_capacity(db, [package_id])[package_id]
+    ledger = capacity_window(db, package_id, start, end)
+
+    booked_dates = []
+    day = start
+    while day < end:
+        row = ledger.get(day)
+        if row:
+            remaining_drivers = max(row.drivers_available - row.bookings_count, 0)
+            remaining_seats = max(row.seats_available - row.seats_booked, 0)
+        else:
+            remaining_drivers, remaining_seats = drivers_total, seats_total
+        if remaining_drivers == 0 or remaining_seats < party_size:
+            booked_dates.append(day.strftime("%Y-%m-%d"))
+        day += timedelta(days=1)
+
+    bookings = db.query(ManualBooking.id, ManualBooking.guest_name).filter(
+        ManualBooking.tour_package_id == package_id,
+        ManualBooking.travel_date >= start,
+        ManualBooking.travel_date < end,
+        ManualBooking.is_deleted == False
+    ).all()
+
+    return {"booked_dates": booked_dates, "bookings": [{"id": b.id, "guest_name": b.guest_name} for b in bookings]}
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.add_api_route("/sync/booked-dates/{package_id}", sync_booked_dates, methods=["GET"])
+    app.add_api_route("/async/booked-dates/{package_id}", get_booked_dates, methods=["GET"])
+    return app
+
+
+async def measure(port: int, package_id: int, levels, duration: float):
+    base_url = f"http://127.0.0.1:{port}"
+
+    for concurrency in levels:
+        for variant in ("sync", "async"):
+            path = f"/{variant}/booked-dates/{package_id}"
+
+            async def request(connection):
+                status, _, _ = await connection.request("GET", path)
+                return status
+
+            result = await load(base_url, request, concurrency, duration)
+            print(
+                f"{variant:>5} c={concurrency:<4} "
+                f"{result['throughput_rps']:>8} req/s  "
+                f"p50 {result['p50_ms']:>7} ms  p95 {result['p95_ms']:>7} ms  "
+                f"p99 {result['p99_ms']:>7} ms  errors {result['errors']}"
+            )
+
+
+def run(package_id: Optional[int], levels, duration: float, port: int):
+    if package_id is None:
+        with Session(engine) as db:
+            package_id = db.query(TourPackage.id).filter(TourPackage.is_deleted == False).order_by(TourPackage.id).limit(1).scalar()
+        if package_id is None:
+            raise SystemExit("No tour package to query, pass --package or create one first")
+
+    server, thread = serve_in_thread(build_app(), port)
+    try:
+        asyncio.run(measure(port, package_id, levels, duration))
+    finally:
+        server.should_exit = True
+        thread.join()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--package", type=int, help="tour package id (defaults to the first one)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 100, 200])
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per variant and level")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    run(args.package, args.concurrency, args.duration, args.port)
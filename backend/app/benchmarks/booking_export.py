@@ -0,0 +1,92 @@
+"""
+Memory and throughput of the streaming bookings export.
+
+    python -m app.benchmarks.booking_export --rows 10000 100000 --format csv
+
+For each row count, seeds a scratch company with that many bookings in
+the database in DATABASE_URL and drains stream_bookings the way the
+StreamingResponse would, recording the Python heap peak (tracemalloc)
+while the export runs. With a server-side cursor (Postgres) the peak
+should stay roughly the same from one size to the next. Scratch rows are
+removed after each size.
+"""
+import argparse
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from sqlalchemy import insert
+
+from app.benchmarks.booking_import import create_fixture, drop_fixture
+from app.database.session import SessionLocal
+from app.models.manual_booking import ManualBooking
+from app.services.booking_export import export_query, stream_bookings
+
+BATCH = 5000
+
+
+def seed_bookings(db, fixture, rows: int):
+    start = date.today()
+    package_ids = fixture["package_ids"]
+    for offset in range(0, rows, BATCH):
+        db.execute(insert(ManualBooking), [
+            {
+                "guest_name": f"Guest {n}",
+                "country_code": "+971",
+                "phone": f"50{n:07d}",
+                "email": f"guest{n}@example.com",
+                "adults": 2,
+                "kids": 1,
+                "tour_package_id": package_ids[n % len(package_ids)],
+                "travel_date": start + timedelta(days=n % 365),
+                "total_amount": 250,
+                "advance_amount": 100,
+                "remaining_amount": 150,
+                "pickup_location": "Hotel lobby",
+                "payment_status": "partial",
+                "is_deleted": False,
+            }
+            for n in range(offset, min(offset + BATCH, rows))
+        ])
+    db.commit()
+
+
+def measure(fixture, fmt: str):
+    query = export_query(fixture["company_id"])
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = 0
+    for chunk in stream_bookings(query, fmt):
+        size += len(chunk)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return size, elapsed, peak
+
+
+def run(sizes, fmt: str):
+    db = SessionLocal()
+    print(f"{'rows':>9} {'output':>10} {'time':>8} {'rows/s':>10} {'heap peak':>10}   ({db.get_bind().dialect.name})")
+    try:
+        for rows in sizes:
+            fixture = create_fixture(db, packages=5, drivers=0)
+            try:
+                seed_bookings(db, fixture, rows)
+                size, elapsed, peak = measure(fixture, fmt)
+                print(f"{rows:>9} {size / 1024 / 1024:>8.1f}MB {elapsed:>7.2f}s "
+                      f"{rows / elapsed:>10,.0f} {peak / 1024 / 1024:>8.1f}MB")
+            finally:
+                drop_fixture(db, fixture)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--format", choices=["csv", "ndjson"], default="csv")
+    args = parser.parse_args()
+
+    run(args.rows, args.format)
@@ -0,0 +1,170 @@
+"""
+Imports a generated bookings sheet into the database in DATABASE_URL and
+reports how long each stage takes.
+
+    python -m app.benchmarks.booking_import --rows 50000 --packages 20 --drivers 40
+
+Seeds a scratch company with packages and drivers linked to all of them,
+writes --rows CSV rows (a share of them assigned to a driver, one driver
+per day, plus a few deliberately broken rows), then runs import_bookings
+on it. Run it against Postgres to measure the COPY path; on any other
+database the rows go in with executemany. Scratch rows are removed again
+unless --keep.
+"""
+import argparse
+import csv
+import io
+import random
+import time
+import uuid
+from datetime import date, timedelta
+
+from app.database.session import SessionLocal
+from app.models.company import Company
+from app.models.company_kpi import CompanyDailyKpi
+from app.models.driver import Driver
+from app.models.driver_assignment import DriverAssignment
+from app.models.manual_booking import ManualBooking
+from app.models.package_capacity import PackageDailyCapacity
+from app.models.tour_package import TourPackage, TourPackageDriver
+from app.models.user import User
+from app.services import booking_import
+
+BROKEN_EVERY = 500
+
+
+def create_fixture(db, packages: int, drivers: int):
+    user = User(email=f"import-{uuid.uuid4().hex}@example.com", password_hash="!", role="company")
+    db.add(user)
+    db.flush()
+
+    company = Company(user_id=user.id, company_name="Import benchmark", status="active")
+    db.add(company)
+    db.flush()
+
+    package_rows = [
+        TourPackage(company_id=company.id, title=f"Import benchmark {n}", description="-",
+                    country="-", city="-", price=100)
+        for n in range(packages)
+    ]
+    driver_rows = [
+        Driver(company_id=company.id, name=f"Import benchmark {n}", phone_number="0", seats=4)
+        for n in range(drivers)
+    ]
+    db.add_all(package_rows + driver_rows)
+    db.flush()
+
+    db.add_all(
+        TourPackageDriver(tour_package_id=package.id, driver_id=driver.id)
+        for package in package_rows
+        for driver in driver_rows
+    )
+    db.commit()
+
+    return {
+        "user_id": user.id,
+        "company_id": company.id,
+        "package_ids": [p.id for p in package_rows],
+        "driver_ids": [d.id for d in driver_rows],
+    }
+
+
+def drop_fixture(db, fixture):
+    package_ids = fixture["package_ids"]
+    booking_ids = db.query(ManualBooking.id).filter(ManualBooking.tour_package_id.in_(package_ids))
+
+    db.query(DriverAssignment).filter(DriverAssignment.booking_id.in_(booking_ids)).delete(synchronize_session=False)
+    db.query(ManualBooking).filter(ManualBooking.tour_package_id.in_(package_ids)).delete(synchronize_session=False)
+    db.query(PackageDailyCapacity).filter(PackageDailyCapacity.tour_package_id.in_(package_ids)).delete(synchronize_session=False)
+    db.query(CompanyDailyKpi).filter(CompanyDailyKpi.company_id == fixture["company_id"]).delete()
+    db.query(TourPackageDriver).filter(TourPackageDriver.tour_package_id.in_(package_ids)).delete(synchronize_session=False)
+    db.query(TourPackage).filter(TourPackage.id.in_(package_ids)).delete(synchronize_session=False)
+    db.query(Driver).filter(Driver.id.in_(fixture["driver_ids"])).delete(synchronize_session=False)
+    db.query(Company).filter(Company.id == fixture["company_id"]).delete()
+    db.query(User).filter(User.id == fixture["user_id"]).delete()
+    db.commit()
+
+
+def generate_csv(fixture, rows: int, seed: int = 0) -> bytes:
+    rng = random.Random(seed)
+    start = date.today() + timedelta(days=30)
+    free_days = {driver_id: 0 for driver_id in fixture["driver_ids"]}
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(booking_import.COLUMNS)
+
+    for n in range(rows):
+        package_id = rng.choice(fixture["package_ids"])
+        travel_date = start + timedelta(days=rng.randrange(365))
+        driver_id = ""
+
+        # every fifth booking comes with a driver, each on a day they're free
+        if n % 5 == 0:
+            driver_id = rng.choice(fixture["driver_ids"])
+            travel_date = start + timedelta(days=free_days[driver_id])
+            free_days[driver_id] += 1
+
+        total = rng.choice([80, 120, 250, 400])
+        advance = rng.choice([0, total // 2, total])
+        row = {
+            "guest_name": f"Guest {n}",
+            "country_code": "+971",
+            "phone": f"50{n:07d}",
+            "email": f"guest{n}@example.com",
+            "pickup_location": "Hotel lobby",
+            "tour_package_id": package_id,
+            "travel_date": travel_date.isoformat(),
+            "travel_time": "09:00",
+            "total_amount": total,
+            "advance_amount": advance,
+            "adults": rng.randint(1, 4),
+            "kids": rng.randint(0, 2),
+            "driver_id": driver_id,
+        }
+        if n % BROKEN_EVERY == BROKEN_EVERY - 1:
+            row["travel_date"] = "next tuesday"
+
+        writer.writerow([row[column] for column in booking_import.COLUMNS])
+
+    return buffer.getvalue().encode()
+
+
+def run(rows: int, packages: int, drivers: int, keep: bool):
+    db = SessionLocal()
+    fixture = create_fixture(db, packages, drivers)
+    try:
+        content = generate_csv(fixture, rows)
+        print(f"{rows} rows, {len(content) / 1024 / 1024:.1f} MB CSV, {db.get_bind().dialect.name}")
+
+        started = time.perf_counter()
+        report = booking_import.validate_rows(booking_import.read_rows("bookings.csv", io.BytesIO(content)))
+        validated = time.perf_counter()
+        booking_import.check_batch(db, fixture["company_id"], report)
+        checked = time.perf_counter()
+        print(f"  read + validate  {validated - started:7.2f}s")
+        print(f"  batch checks     {checked - validated:7.2f}s")
+
+        started = time.perf_counter()
+        result = booking_import.import_bookings(db, fixture["company_id"], "bookings.csv", io.BytesIO(content))
+        elapsed = time.perf_counter() - started
+        print(f"  import_bookings  {elapsed:7.2f}s  ({result['imported']} imported, "
+              f"{result['rejected']} rejected, {result['imported'] / elapsed:,.0f} rows/s)")
+    finally:
+        if keep:
+            print(f"kept company {fixture['company_id']}")
+        else:
+            db.rollback()
+            drop_fixture(db, fixture)
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--packages", type=int, default=20)
+    parser.add_argument("--drivers", type=int, default=40)
+    parser.add_argument("--keep", action="store_true")
+    args = parser.parse_args()
+
+    run(args.rows, args.packages, args.drivers, args.keep)
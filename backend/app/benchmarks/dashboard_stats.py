@@ -0,0 +1,173 @@
+"""
+Compares the old per-month dashboard stats queries with the company-scoped
+rollup read against the database in DATABASE_URL.
+
+    python -m app.benchmarks.dashboard_stats --rows 1000000 --companies 20
+
+Seeds `--rows` bookings for scratch companies (removed again unless --keep)
+and builds their KPI rollups. It then times both variants for one of those
+companies.
+"""
+import argparse
+import random
+import statistics
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import extract, func, insert
+
+from app.commands.rebuild_kpi_rollups import rebuild_company_kpis
+from app.database.session import SessionLocal
+from app.models.company import Company
+from app.models.company_kpi import CompanyDailyKpi
+from app.models.driver import Driver  # noqa: F401  (mapper registry)
+from app.models.manual_booking import ManualBooking
+from app.models.tour_package import TourPackage
+from app.models.user import User
+from app.services.dashboard_service import booking_stats_for_year
+
+BATCH_SIZE = 10000
+
+
+def seed(db, rows: int, companies: int, year: int):
+    rng = random.Random(42)
+    fixture = {"user_ids": [], "company_ids": [], "package_ids": []}
+
+    for n in range(companies):
+        user = User(email=f"bench-{uuid.uuid4().hex}@example.com", password_hash="!", role="company")
+        db.add(user)
+        db.flush()
+        company = Company(user_id=user.id, company_name=f"Bench {n}", status="active")
+        db.add(company)
+        db.flush()
+        package = TourPackage(
+            company_id=company.id, title=f"Bench {n}", description="-",
+            country="-", city="-", price=100,
+        )
+        db.add(package)
+        db.flush()
+
+        fixture["user_ids"].append(user.id)
+        fixture["company_ids"].append(company.id)
+        fixture["package_ids"].append(package.id)
+
+    db.commit()
+
+    year_start = datetime(year, 1, 1)
+    batch = []
+    for n in range(rows):
+        total = rng.choice([100, 250, 400])
+        paid = rng.random() < 0.6
+        batch.append({
+            "guest_name": f"Guest {n}",
+            "country_code": "+971",
+            "phone": "500000000",
+            "adults": rng.randint(1, 4),
+            "kids": rng.randint(0, 2),
+            "tour_package_id": rng.choice(fixture["package_ids"]),
+            "travel_date": date(year, 1, 1) + timedelta(days=rng.randrange(365)),
+            "total_amount": total,
+            "advance_amount": total if paid else 0,
+            "remaining_amount": 0 if paid else total,
+            "payment_status": "paid" if paid else "pending",
+            "is_deleted": False,
+            "created_at": year_start + timedelta(seconds=rng.randrange(365 * 86400)),
+        })
+
+        if len(batch) == BATCH_SIZE:
+            db.execute(insert(ManualBooking.__table__), batch)
+            batch = []
+
+    if batch:
+        db.execute(insert(ManualBooking.__table__), batch)
+    db.commit()
+
+    return fixture
+
+
+def drop(db, fixture):
+    db.query(CompanyDailyKpi).filter(
+        CompanyDailyKpi.company_id.in_(fixture["company_ids"])
+    ).delete(synchronize_session=False)
+    db.query(ManualBooking).filter(
+        ManualBooking.tour_package_id.in_(fixture["package_ids"])
+    ).delete(synchronize_session=False)
+    db.query(TourPackage).filter(TourPackage.id.in_(fixture["package_ids"])).delete(synchronize_session=False)
+    db.query(Company).filter(Company.id.in_(fixture["company_ids"])).delete(synchronize_session=False)
+    db.query(User).filter(User.id.in_(fixture["user_ids"])).delete(synchronize_session=False)
+    db.commit()
+
+
+def legacy_stats(db, year: int, month: int):
+    """The 14-query, platform-wide version dashboard_stats used to run."""
+    monthly = []
+    for m in range(1, 13):
+        monthly.append(
+            db.query(func.count(ManualBooking.id))
+            .filter(
+                ManualBooking.is_deleted == False,
+                extract("year", ManualBooking.created_at) == year,
+                extract("month", ManualBooking.created_at) == m
+            )
+            .scalar()
+        )
+
+    for month_filter in ([], [extract("month", ManualBooking.created_at) == month]):
+        db.query(func.coalesce(func.sum(ManualBooking.total_amount), 0)).filter(
+            ManualBooking.is_deleted == False,
+            ManualBooking.payment_status == "paid",
+            extract("year", ManualBooking.created_at) == year,
+            *month_filter
+        ).scalar()
+
+    return monthly
+
+
+def timed(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def run(rows: int, companies: int, repeat: int, keep: bool):
+    year = date.today().year
+    db = SessionLocal()
+
+    started = time.perf_counter()
+    fixture = seed(db, rows, companies, year)
+    print(f"seeded {rows} bookings over {companies} companies in {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    for company_id in fixture["company_ids"]:
+        rebuild_company_kpis(db, company_id)
+    db.commit()
+    print(f"built KPI rollups in {time.perf_counter() - started:.1f}s")
+
+    try:
+        company_id = fixture["company_ids"][0]
+
+        legacy = timed(lambda: legacy_stats(db, year, date.today().month), repeat)
+        grouped = timed(lambda: booking_stats_for_year(db, company_id, year), repeat)
+
+        print(f"legacy (14 queries, all companies): {legacy:9.1f} ms")
+        print(f"rollup (1 query, one company):      {grouped:9.1f} ms")
+        print(f"speed-up: {legacy / grouped:.1f}x")
+    finally:
+        if not keep:
+            drop(db, fixture)
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--companies", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--keep", action="store_true", help="leave the seeded rows in place")
+    args = parser.parse_args()
+
+    run(args.rows, args.companies, args.repeat, args.keep)
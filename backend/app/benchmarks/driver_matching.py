@@ -0,0 +1,117 @@
+"""
+Times auto_assign_drivers for one busy day and compares the result with a
+first-fit greedy pass (each booking takes the first free linked driver
+with enough seats, what a dispatcher clicking through the form ends up
+doing).
+
+    python -m app.benchmarks.driver_matching --bookings 3000 --drivers 3000 --packages 30
+
+Seeds a scratch company in the database in DATABASE_URL: drivers with
+4-14 seats, each linked to three random packages, and bookings
+of 1-12 guests on one day. The run is a dry run first (matching only),
+then a real one. Scratch rows are removed afterwards.
+"""
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import insert
+
+from app.benchmarks.booking_import import create_fixture, drop_fixture
+from app.database.session import SessionLocal
+from app.models.driver import Driver
+from app.models.manual_booking import ManualBooking
+from app.models.tour_package import TourPackageDriver
+from app.services.driver_matching import _open_bookings, _package_drivers, auto_assign_drivers
+
+
+def seed(db, fixture, bookings: int, drivers: int, travel_date: date, seed: int = 0):
+    rng = random.Random(seed)
+    package_ids = fixture["package_ids"]
+
+    fixture["driver_ids"] = db.execute(
+        insert(Driver).returning(Driver.id, sort_by_parameter_order=True),
+        [
+            {
+                "company_id": fixture["company_id"],
+                "name": f"Driver {n}",
+                "phone_number": "0",
+                "seats": rng.choice([4, 4, 6, 7, 8, 12, 14]),
+                "is_deleted": False,
+            }
+            for n in range(drivers)
+        ],
+    ).scalars().all()
+    db.execute(insert(TourPackageDriver), [
+        {"tour_package_id": package_id, "driver_id": driver_id}
+        for driver_id in fixture["driver_ids"]
+        for package_id in rng.sample(package_ids, min(3, len(package_ids)))
+    ])
+    db.execute(insert(ManualBooking), [
+        {
+            "guest_name": f"Guest {n}",
+            "country_code": "+971",
+            "phone": f"50{n:07d}",
+            "adults": rng.randint(1, 8),
+            "kids": rng.choice([0, 0, 1, 2, 4]),
+            "tour_package_id": rng.choice(package_ids),
+            "travel_date": travel_date,
+            "total_amount": 100,
+            "remaining_amount": 100,
+            "payment_status": "pending",
+            "is_deleted": False,
+        }
+        for n in range(bookings)
+    ])
+    db.commit()
+
+
+def greedy(db, company_id: int, travel_date: date) -> int:
+    bookings = _open_bookings(db, company_id, travel_date, travel_date)
+    links, seats = _package_drivers(db, company_id, {b.tour_package_id for b in bookings})
+    busy = set()
+    assigned = 0
+    for booking in sorted(bookings, key=lambda b: b.id):
+        for driver_id in links.get(booking.tour_package_id, ()):
+            if driver_id not in busy and seats[driver_id] >= booking.party:
+                busy.add(driver_id)
+                assigned += 1
+                break
+    return assigned
+
+
+def run(bookings: int, drivers: int, packages: int):
+    db = SessionLocal()
+    fixture = create_fixture(db, packages, drivers=0)
+    travel_date = date.today() + timedelta(days=60)
+    try:
+        seed(db, fixture, bookings, drivers, travel_date)
+        company_id = fixture["company_id"]
+        print(f"{bookings} bookings, {drivers} drivers, {packages} packages ({db.get_bind().dialect.name})")
+
+        started = time.perf_counter()
+        baseline = greedy(db, company_id, travel_date)
+        print(f"  first-fit greedy   {baseline:>6} assigned  {time.perf_counter() - started:6.3f}s")
+
+        started = time.perf_counter()
+        proposed = auto_assign_drivers(db, company_id, travel_date, dry_run=True)
+        print(f"  matching, dry run  {proposed['assigned']:>6} assigned  {time.perf_counter() - started:6.3f}s")
+
+        started = time.perf_counter()
+        result = auto_assign_drivers(db, company_id, travel_date)
+        print(f"  matching, written  {result['assigned']:>6} assigned  {time.perf_counter() - started:6.3f}s")
+    finally:
+        db.rollback()
+        drop_fixture(db, fixture)
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bookings", type=int, default=3000)
+    parser.add_argument("--drivers", type=int, default=3000)
+    parser.add_argument("--packages", type=int, default=30)
+    args = parser.parse_args()
+
+    run(args.bookings, args.drivers, args.packages)
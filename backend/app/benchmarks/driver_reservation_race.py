@@ -0,0 +1,138 @@
+"""
+Fires many parallel bookings for the same driver and day against the
+database in DATABASE_URL and checks that exactly one of them gets the driver.
+
+    python -m app.benchmarks.driver_reservation_race --attempts 300 --workers 50
+
+Exits with status 1 when zero or more than one booking wins. The scratch
+company it creates is removed again afterwards.
+"""
+import argparse
+import sys
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.models.company import Company
+from app.models.driver import Driver
+from app.models.driver_assignment import DriverAssignment
+from app.models.manual_booking import ManualBooking
+from app.models.tour_package import TourPackage
+from app.models.user import User
+from app.services.driver_assignment_service import reserve_driver
+
+
+def create_fixture(db):
+    user = User(
+        email=f"race-{uuid.uuid4().hex}@example.com",
+        password_hash="!",
+        role="company",
+    )
+    db.add(user)
+    db.flush()
+
+    company = Company(user_id=user.id, company_name="Race check", status="active")
+    db.add(company)
+    db.flush()
+
+    package = TourPackage(
+        company_id=company.id,
+        title="Race check",
+        description="-",
+        country="-",
+        city="-",
+        price=1,
+    )
+    driver = Driver(company_id=company.id, name="Race check", phone_number="0", seats=4)
+    db.add_all([package, driver])
+    db.commit()
+
+    return {
+        "user_id": user.id,
+        "company_id": company.id,
+        "package_id": package.id,
+        "driver_id": driver.id,
+    }
+
+
+def drop_fixture(db, fixture):
+    booking_ids = db.query(ManualBooking.id).filter(
+        ManualBooking.tour_package_id == fixture["package_id"]
+    )
+    db.query(DriverAssignment).filter(
+        DriverAssignment.booking_id.in_(booking_ids)
+    ).delete(synchronize_session=False)
+    db.query(ManualBooking).filter(
+        ManualBooking.tour_package_id == fixture["package_id"]
+    ).delete(synchronize_session=False)
+    db.query(TourPackage).filter(TourPackage.id == fixture["package_id"]).delete()
+    db.query(Driver).filter(Driver.id == fixture["driver_id"]).delete()
+    db.query(Company).filter(Company.id == fixture["company_id"]).delete()
+    db.query(User).filter(User.id == fixture["user_id"]).delete()
+    db.commit()
+
+
+def attempt(Session, go: threading.Event, fixture, travel_date, n: int) -> bool:
+    go.wait()
+    db = Session()
+    try:
+        booking = ManualBooking(
+            guest_name=f"Race {n}",
+            phone="0",
+            tour_package_id=fixture["package_id"],
+            driver_id=fixture["driver_id"],
+            travel_date=travel_date,
+            total_amount=0,
+        )
+        db.add(booking)
+        db.flush()
+
+        if reserve_driver(db, fixture["driver_id"], travel_date, booking.id):
+            db.commit()
+            return True
+
+        db.rollback()
+        return False
+    finally:
+        db.close()
+
+
+def run(attempts: int, workers: int) -> int:
+    engine = create_engine(settings.DATABASE_URL, pool_size=workers, max_overflow=0)
+    Session = sessionmaker(bind=engine)
+
+    setup = Session()
+    fixture = create_fixture(setup)
+    travel_date = date.today() + timedelta(days=30)
+
+    go = threading.Event()
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(attempt, Session, go, fixture, travel_date, n)
+                for n in range(attempts)
+            ]
+            go.set()
+            results = [f.result() for f in futures]
+    finally:
+        drop_fixture(setup, fixture)
+        setup.close()
+        engine.dispose()
+
+    winners = sum(results)
+    print(f"{attempts} parallel bookings, {workers} connections -> {winners} won the driver")
+    return 0 if winners == 1 else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--attempts", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=50)
+    args = parser.parse_args()
+
+    sys.exit(run(args.attempts, args.workers))
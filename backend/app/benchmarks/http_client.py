@@ -0,0 +1,134 @@
+"""
+Tiny asyncio HTTP/1.1 client for the benchmarks: keep-alive connections,
+Content-Length and chunked bodies, nothing else. Avoids pulling an HTTP
+client library into requirements just to generate load. Also starts the
+app under uvicorn in-process for the benchmarks that need a server.
+"""
+import asyncio
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+import uvicorn
+
+
+def serve_in_thread(app, port: int):
+    """Runs `app` under uvicorn on 127.0.0.1:`port` in a daemon thread."""
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+
+class Connection:
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method: str, path: str, headers: dict = None, body: bytes = b""):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}"]
+        for name, value in (headers or {}).items():
+            lines.append(f"{name}: {value}")
+        if body:
+            lines.append(f"Content-Length: {len(body)}")
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed by server")
+        status = int(status_line.split()[1])
+
+        response_headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+
+        if response_headers.get("transfer-encoding") == "chunked":
+            chunks = []
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await self.reader.readline()
+                    break
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readline()
+            content = b"".join(chunks)
+        else:
+            content = await self.reader.readexactly(int(response_headers.get("content-length", 0)))
+
+        if response_headers.get("connection") == "close":
+            self.close()
+
+        return status, response_headers, content
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+def percentile(samples, pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies_ms, errors: int, elapsed: float) -> dict:
+    return {
+        "requests": len(latencies_ms) + errors,
+        "errors": errors,
+        "throughput_rps": round(len(latencies_ms) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies_ms, 50), 2),
+        "p95_ms": round(percentile(latencies_ms, 95), 2),
+        "p99_ms": round(percentile(latencies_ms, 99), 2),
+        "mean_ms": round(statistics.fmean(latencies_ms), 2) if latencies_ms else 0.0,
+    }
+
+
+async def load(base_url: str, make_request, concurrency: int, duration: float) -> dict:
+    """
+    Runs `concurrency` keep-alive clients for `duration` seconds. Each client
+    repeatedly awaits `make_request(connection)`, which must return the HTTP
+    status. Anything >= 400 or an exception counts as an error.
+    """
+    parts = urlsplit(base_url)
+    deadline = time.perf_counter() + duration
+    latencies = []
+    errors = 0
+
+    async def client():
+        nonlocal errors
+        connection = Connection(parts.hostname, parts.port or 80)
+        try:
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    status = await make_request(connection)
+                except (OSError, ConnectionError, asyncio.IncompleteReadError):
+                    connection.close()
+                    errors += 1
+                    continue
+                if status >= 400:
+                    errors += 1
+                else:
+                    latencies.append((time.perf_counter() - started) * 1000)
+        finally:
+            connection.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
@@ -0,0 +1,445 @@
+"""
+HTTP load test of the hot routes with a realistic traffic mix.
+
+    python -m app.benchmarks.load_test --duration 60 --concurrency 32 --workers 4
+    python -m app.benchmarks.load_test --compare benchmark-results/load-20261018-101500.json
+
+Without --database-url the app runs against a scratch SQLite file, so the
+whole run needs nothing but this box. Point --database-url at a local,
+migrated Postgres to measure the production stack. Either way the database
+is seeded with the query_plans fixture (companies, packages, drivers,
+bookings, capacity ledger, KPI rollups) plus an admin, and the app is
+started with uvicorn in a separate process.
+
+Each simulated client loops over weighted scenarios (see MIX): dispatcher
+datatables, calendar availability, booking creation, dashboards and the
+public catalogue. It sends them over one keep-alive connection, as a
+browser would. After --warmup seconds, every request's latency is recorded
+under its route label. Errors are 4xx/5xx responses, redirects to the
+login page and, for the form scenarios, anything but the redirect to
+their success page (see REDIRECT_TARGETS). The run prints throughput and
+p50/p95/p99 per route and writes the same numbers, with the run settings
+and git commit, as JSON. --compare prints the change against an earlier result file.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from urllib.parse import urlencode, urlsplit
+
+from app.benchmarks.http_client import Connection, summarize
+
+RESULTS_DIR = "benchmark-results"
+SEARCH_MIGRATION = "alembic/versions/c2d7a9e4f1b6_add_tour_search_index.py"
+
+
+# -------------------------------------------------
+# Traffic mix
+# -------------------------------------------------
+class Context:
+    """What the scenarios pick from: seeded ids and the auth cookies."""
+
+    def __init__(self, fixture, company_tokens, admin_token):
+        self.first_day = date.today().replace(day=1)
+        self.company_tokens = company_tokens
+        self.admin_token = admin_token
+        # seed() adds each company's packages in one run
+        per_company = len(fixture["package_ids"]) // len(fixture["company_ids"])
+        self.packages = [
+            fixture["package_ids"][n * per_company:(n + 1) * per_company]
+            for n in range(len(fixture["company_ids"]))
+        ]
+
+    def company(self, rng):
+        index = rng.randrange(len(self.company_tokens))
+        return self.company_tokens[index], self.packages[index]
+
+    def day(self, rng, spread: int = 120) -> date:
+        return self.first_day + timedelta(days=rng.randrange(spread))
+
+
+def _cookie(token: str) -> dict:
+    return {"Cookie": f"access_token={token}"}
+
+
+def booking_datatable(ctx, rng):
+    token, _ = ctx.company(rng)
+    params = {"draw": 1, "start": 0, "length": 10}
+    if rng.random() < 0.3:
+        params["search[value]"] = f"Guest {rng.randrange(1000)}"
+    if rng.random() < 0.3:
+        params.update({"order[0][column]": 2, "order[0][dir]": "asc"})
+    return "GET", "/manual-bookings/datatable?" + urlencode(params), _cookie(token), b""
+
+
+def driver_datatable(ctx, rng):
+    token, _ = ctx.company(rng)
+    return "GET", "/drivers/datatable?draw=1&start=0&length=10", _cookie(token), b""
+
+
+def booked_dates(ctx, rng):
+    token, packages = ctx.company(rng)
+    start = ctx.day(rng).replace(day=1)
+    path = f"/manual-bookings/booked-dates/{rng.choice(packages)}?start={start}&party_size={rng.randint(1, 6)}"
+    return "GET", path, _cookie(token), b""
+
+
+def available_drivers(ctx, rng):
+    token, packages = ctx.company(rng)
+    return "GET", f"/manual-bookings/available-drivers/{rng.choice(packages)}/{ctx.day(rng)}", _cookie(token), b""
+
+
+def create_booking(ctx, rng):
+    _, packages = ctx.company(rng)
+    form = {
+        "guest_name": f"Load {rng.randrange(10 ** 6)}",
+        "country_code": "+971",
+        "phone": f"5{rng.randrange(10 ** 8):08d}",
+        "adults": rng.randint(1, 4),
+        "kids": rng.randint(0, 2),
+        "tour_package_id": rng.choice(packages),
+        "travel_date": ctx.day(rng, spread=180).isoformat(),
+        "total_amount": 250,
+        "advance_amount": rng.choice([0, 100, 250]),
+    }
+    headers = {**_cookie(ctx.admin_token), "Content-Type": "application/x-www-form-urlencoded"}
+    return "POST", "/manual-bookings/create", headers, urlencode(form).encode()
+
+
+def dashboard_summary(ctx, rng):
+    token, _ = ctx.company(rng)
+    return "GET", "/company/dashboard/summary", _cookie(token), b""
+
+
+def dashboard_stats(ctx, rng):
+    token, _ = ctx.company(rng)
+    return "GET", "/company/dashboard/dashboard-stats", _cookie(token), b""
+
+
+def public_list(ctx, rng):
+    return "GET", f"/tour-packages/tours?page={rng.randint(1, 5)}", {}, b""
+
+
+def public_search(ctx, rng):
+    return "GET", f"/tour-packages/tours?search=package+{rng.randrange(10)}", {}, b""
+
+
+def public_availability(ctx, rng):
+    start = ctx.day(rng)
+    params = {"travel_date": start, "date_to": start + timedelta(days=6), "guests": rng.randint(1, 6)}
+    return "GET", "/tour-packages/tours/availability?" + urlencode(params), {}, b""
+
+
+def public_detail(ctx, rng):
+    _, packages = ctx.company(rng)
+    return "GET", f"/tour-packages/tours/{rng.choice(packages)}", {}, b""
+
+
+# (label, weight, scenario): roughly a day of dispatcher and visitor traffic
+MIX = [
+    ("booking datatable", 14, booking_datatable),
+    ("driver datatable", 4, driver_datatable),
+    ("booked dates", 10, booked_dates),
+    ("available drivers", 6, available_drivers),
+    ("create booking", 6, create_booking),
+    ("dashboard summary", 4, dashboard_summary),
+    ("dashboard stats", 4, dashboard_stats),
+    ("public tour list", 20, public_list),
+    ("public tour search", 12, public_search),
+    ("public tour availability", 8, public_availability),
+    ("public tour detail", 12, public_detail),
+]
+
+
+# where the auth dependencies send a request they refuse
+LOGIN_PATH = "/auth/login"
+
+# scenarios that succeed with a redirect, and where to: the form routes
+# flash-redirect back to the form on errors (e.g. driver already booked)
+REDIRECT_TARGETS = {
+    "create booking": "/manual-bookings/",  # manual_booking_list
+}
+
+
+def failed_response(label: str, status: int, headers: dict) -> bool:
+    location = urlsplit(headers.get("location", "")).path
+    expected = REDIRECT_TARGETS.get(label)
+    if expected is not None:
+        return not 300 <= status < 400 or location != expected
+    return status >= 400 or (300 <= status < 400 and location == LOGIN_PATH)
+
+
+async def drive(port: int, ctx: Context, concurrency: int, warmup: float, duration: float, seed: int):
+    labels = [label for label, _, _ in MIX]
+    weights = [weight for _, weight, _ in MIX]
+    scenarios = {label: scenario for label, _, scenario in MIX}
+
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    measure_from = time.perf_counter() + warmup
+    deadline = measure_from + duration
+
+    async def client(n: int):
+        rng = random.Random(seed + n)
+        connection = Connection("127.0.0.1", port)
+        try:
+            while time.perf_counter() < deadline:
+                label = rng.choices(labels, weights)[0]
+                method, path, headers, body = scenarios[label](ctx, rng)
+
+                started = time.perf_counter()
+                try:
+                    status, response_headers, _ = await connection.request(method, path, headers, body)
+                    failed = failed_response(label, status, response_headers)
+                except (OSError, ConnectionError, asyncio.IncompleteReadError):
+                    connection.close()
+                    failed = True
+                finished = time.perf_counter()
+
+                if started < measure_from:
+                    continue
+                if failed:
+                    errors[label] += 1
+                else:
+                    latencies[label].append((finished - started) * 1000)
+        finally:
+            connection.close()
+
+    await asyncio.gather(*(client(n) for n in range(concurrency)))
+    elapsed = time.perf_counter() - measure_from
+
+    routes = {
+        label: summarize(latencies[label], errors[label], elapsed)
+        for label in labels
+    }
+    total = summarize(
+        [ms for samples in latencies.values() for ms in samples],
+        sum(errors.values()),
+        elapsed,
+    )
+    return routes, total
+
+
+# -------------------------------------------------
+# Database and server
+# -------------------------------------------------
+def create_sqlite_schema(engine):
+    """Tables from the models plus the FTS5 search table from its migration."""
+    import importlib.util
+
+    from app.database.base import Base
+    from app.main import app  # noqa: F401  (registers every model)
+
+    Base.metadata.create_all(engine)
+
+    spec = importlib.util.spec_from_file_location("search_migration", SEARCH_MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    with engine.begin() as connection:
+        for statement in migration.SQLITE_UPGRADE:
+            connection.exec_driver_sql(statement)
+
+
+def seed_database(bookings: int, companies: int):
+    from app.benchmarks.query_plans import analyze, seed
+    from app.database.session import SessionLocal
+    from app.models.user import User
+
+    db = SessionLocal()
+    try:
+        fixture = seed(db, bookings, companies, packages_per_company=10, drivers_per_company=12)
+        admin = User(email=f"load-admin-{os.getpid()}@example.com", password_hash="!", role="admin")
+        db.add(admin)
+        db.commit()
+        fixture["admin_id"] = admin.id
+        analyze(db)
+        return fixture
+    finally:
+        db.close()
+
+
+def drop_database_rows(fixture):
+    from app.benchmarks.query_plans import drop
+    from app.database.session import SessionLocal
+    from app.models.manual_booking import ManualBooking
+    from app.models.user import User
+    from app.models.whatsapp_outbox import WhatsAppOutbox
+
+    db = SessionLocal()
+    try:
+        # confirmations queued by the "create booking" scenario
+        db.query(WhatsAppOutbox).filter(
+            WhatsAppOutbox.booking_id.in_(
+                db.query(ManualBooking.id).filter(ManualBooking.tour_package_id.in_(fixture["package_ids"]))
+            )
+        ).delete(synchronize_session=False)
+        db.query(User).filter(User.id == fixture["admin_id"]).delete()
+        db.commit()
+        drop(db, fixture)
+    finally:
+        db.close()
+
+
+def start_server(port: int, workers: int, env: dict):
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning", "--no-access-log",
+        ],
+        env=env,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"uvicorn exited with status {process.returncode}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise SystemExit("uvicorn did not start within 60s")
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# -------------------------------------------------
+# Reporting
+# -------------------------------------------------
+def print_table(routes: dict, total: dict):
+    print(f"{'route':<26} {'requests':>8} {'errors':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for label, stats in [*routes.items(), ("total", total)]:
+        print(
+            f"{label:<26} {stats['requests']:>8} {stats['errors']:>6} {stats['throughput_rps']:>8} "
+            f"{stats['p50_ms']:>8} {stats['p95_ms']:>8} {stats['p99_ms']:>8}"
+        )
+
+
+def print_comparison(result: dict, baseline_path: str):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    def change(new, old):
+        return f"{(new - old) / old * 100:+.0f}%" if old else "n/a"
+
+    print(f"\nagainst {baseline_path} ({baseline['meta'].get('commit')})")
+    print(f"{'route':<26} {'req/s':>8} {'p50':>7} {'p95':>7} {'p99':>7}")
+    rows = [*result["routes"].items(), ("total", result["total"])]
+    for label, stats in rows:
+        old = baseline["total"] if label == "total" else baseline["routes"].get(label)
+        if not old:
+            continue
+        print(
+            f"{label:<26} {change(stats['throughput_rps'], old['throughput_rps']):>8} "
+            f"{change(stats['p50_ms'], old['p50_ms']):>7} {change(stats['p95_ms'], old['p95_ms']):>7} "
+            f"{change(stats['p99_ms'], old['p99_ms']):>7}"
+        )
+
+
+def run(args):
+    scratch = None
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        scratch = tempfile.mkdtemp(prefix="load-test-")
+        os.environ["DATABASE_URL"] = f"sqlite:///{scratch}/load-test.db"
+
+    # settings read DATABASE_URL on import
+    from app.core.security import create_access_token
+    from app.database.session import engine
+
+    dialect = engine.dialect.name
+    if scratch:
+        create_sqlite_schema(engine)
+
+    print(f"seeding {args.bookings} bookings over {args.companies} companies ({dialect})")
+    fixture = seed_database(args.bookings, args.companies)
+    ctx = Context(
+        fixture,
+        company_tokens=[create_access_token({"user_id": uid, "role": "company"}) for uid in fixture["user_ids"]],
+        admin_token=create_access_token({"user_id": fixture["admin_id"], "role": "admin"}),
+    )
+
+    server = start_server(args.port, args.workers, dict(os.environ))
+    try:
+        print(f"{args.concurrency} clients, {args.workers} workers, "
+              f"{args.warmup:.0f}s warmup + {args.duration:.0f}s measured")
+        routes, total = asyncio.run(
+            drive(args.port, ctx, args.concurrency, args.warmup, args.duration, args.seed)
+        )
+    finally:
+        server.terminate()
+        server.wait()
+        if scratch:
+            engine.dispose()
+            for name in os.listdir(scratch):
+                os.remove(os.path.join(scratch, name))
+            os.rmdir(scratch)
+        elif not args.keep:
+            drop_database_rows(fixture)
+
+    result = {
+        "meta": {
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "database": dialect,
+            "python": sys.version.split()[0],
+            "bookings": args.bookings,
+            "companies": args.companies,
+            "concurrency": args.concurrency,
+            "workers": args.workers,
+            "warmup_s": args.warmup,
+            "duration_s": args.duration,
+            "seed": args.seed,
+            "mix": {label: weight for label, weight, _ in MIX},
+        },
+        "routes": routes,
+        "total": total,
+    }
+
+    print()
+    print_table(routes, total)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"load-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nwrote {output}")
+
+    if args.compare:
+        print_comparison(result, args.compare)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database-url", help="migrated database to use instead of a scratch SQLite file")
+    parser.add_argument("--bookings", type=int, default=50000)
+    parser.add_argument("--companies", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=2, help="uvicorn worker processes")
+    parser.add_argument("--warmup", type=float, default=5)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help=f"result file (default {RESULTS_DIR}/load-<time>.json)")
+    parser.add_argument("--compare", help="earlier result file to compare against")
+    parser.add_argument("--keep", action="store_true", help="leave the seeded rows in --database-url")
+    args = parser.parse_args()
+
+    run(args)
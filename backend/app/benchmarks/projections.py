@@ -0,0 +1,117 @@
+"""
+Per-row memory and CPU of the driver datatable query: ORM entities vs the
+DriverListRow projection.
+
+    python -m app.benchmarks.projections --rows 100000
+
+Seeds a scratch company with that many drivers in the database in
+DATABASE_URL and loads them three ways: full Driver entities (what the
+datatable did), plain SQLAlchemy Rows of the same columns, and the
+named-tuple projection. Time is the best of --repeat runs; memory is what
+the loaded rows (and, for entities, the session's identity map) keep
+alive, measured with tracemalloc. Scratch rows are removed afterwards.
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from sqlalchemy import select
+
+from app.benchmarks.booking_import import create_fixture, drop_fixture
+from app.database.bulk import bulk_insert
+from app.database.session import SessionLocal
+from app.models.driver import Driver
+from app.routers.web.driver import DriverListRow
+
+
+def seed_drivers(db, fixture, rows: int):
+    first_id = (db.query(Driver.id).order_by(Driver.id.desc()).limit(1).scalar() or 0) + 1
+    bulk_insert(
+        db, Driver.__table__,
+        ["id", "company_id", "name", "country_code", "phone_number", "vehicle_type", "vehicle_number", "seats", "is_deleted"],
+        (
+            (first_id + n, fixture["company_id"], f"Driver {n}", "+971", f"50{n:07d}", "Van", f"VN-{n}", 8, False)
+            for n in range(rows)
+        ),
+    )
+    db.commit()
+    fixture["driver_ids"] = list(range(first_id, first_id + rows))
+
+
+def _criteria(fixture):
+    return (Driver.is_deleted == False, Driver.company_id == fixture["company_id"])
+
+
+def load_entities(db, fixture):
+    return db.execute(select(Driver).where(*_criteria(fixture))).scalars().all()
+
+
+def load_rows(db, fixture):
+    return db.execute(DriverListRow.select().where(*_criteria(fixture))).all()
+
+
+def load_projection(db, fixture):
+    return DriverListRow.rows(db.execute(DriverListRow.select().where(*_criteria(fixture))))
+
+
+def measure(load, fixture, repeat: int):
+    best = None
+    for _ in range(repeat):
+        db = SessionLocal()
+        try:
+            gc.collect()
+            started = time.perf_counter()
+            load(db, fixture)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        finally:
+            db.close()
+
+    # memory on its own run, tracemalloc slows the loading down
+    db = SessionLocal()
+    try:
+        db.connection()  # checkout outside the measurement
+        gc.collect()
+        tracemalloc.start()
+        before, _ = tracemalloc.get_traced_memory()
+        rows = load(db, fixture)
+        gc.collect()
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        count = len(rows)
+        del rows
+    finally:
+        db.close()
+
+    return count, best, retained - before, peak - before
+
+
+def run(rows: int, repeat: int):
+    db = SessionLocal()
+    fixture = create_fixture(db, packages=1, drivers=0)
+    try:
+        seed_drivers(db, fixture, rows)
+        print(f"{rows} drivers ({db.get_bind().dialect.name}), best of {repeat}")
+        print(f"  {'':<18} {'time':>8} {'µs/row':>8} {'kept':>10} {'B/row':>7} {'peak':>10}")
+        for label, load in (
+            ("ORM entities", load_entities),
+            ("Row tuples", load_rows),
+            ("DriverListRow", load_projection),
+        ):
+            count, elapsed, retained, peak = measure(load, fixture, repeat)
+            print(f"  {label:<18} {elapsed:7.3f}s {elapsed / count * 1e6:8.2f} "
+                  f"{retained / 1024 / 1024:8.1f}MB {retained / count:7.0f} {peak / 1024 / 1024:8.1f}MB")
+    finally:
+        db.rollback()
+        drop_fixture(db, fixture)
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    run(args.rows, args.repeat)
@@ -0,0 +1,235 @@
+"""
+Page weight of the public tour list, original uploads vs generated variants.
+
+    python -m app.benchmarks.public_list_weight --tours 12 --viewport 1366 --dpr 2
+
+Seeds a scratch company whose tours carry camera-sized JPEGs (cover plus
+gallery images), then fetches /tour-packages/tours twice: once before the
+variants exist (every <img> is the original) and once after
+generate_variants has run for all of them. For each render it resolves the
+image a browser would download for the given viewport, DPR and accepted
+formats (sizes + srcset, deduplicated by URL) and adds up the bytes on disk.
+The time column is server time plus transfer at --mbps, a rough stand-in
+for time-to-render. Scratch rows and files are removed unless --keep.
+"""
+import argparse
+import asyncio
+import os
+import re
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
+from PIL import Image, ImageDraw, ImageFilter
+
+from app.benchmarks.http_client import Connection, serve_in_thread
+from app.database.session import SessionLocal
+from app.models.company import Company
+from app.models.driver import Driver  # noqa: F401  (mapper registry)
+from app.models.tour_package import TourPackage, TourPackageGalleryImage
+from app.models.user import User
+from app.services.image_variants import STATIC_DIR, delete_variants, generate_variants
+from app.utils.page_cache import bump_catalogue_version, page_cache
+
+UPLOAD_DIR = "uploads/tours"
+MEDIA_SIZE = re.compile(r"^\(min-width:\s*(\d+)px\)\s+(.+)$")
+
+
+# -------------------------------------------------
+# Fixture
+# -------------------------------------------------
+def camera_photo(path: str, seed: int, size=(4000, 3000)):
+    """A noisy gradient with shapes, compresses about like a real photo."""
+    image = Image.effect_noise(size, 40 + seed % 20).convert("RGB")
+    draw = ImageDraw.Draw(image, "RGBA")
+    for n in range(12):
+        x, y = (seed * 97 + n * 331) % size[0], (seed * 53 + n * 197) % size[1]
+        draw.ellipse((x, y, x + size[0] // 4, y + size[1] // 4), fill=(n * 20, 120, 255 - n * 20, 110))
+    image = image.filter(ImageFilter.GaussianBlur(1))
+    image.save(os.path.join(STATIC_DIR, path), "JPEG", quality=92)
+
+
+def seed(db, tours: int, gallery_per_tour: int):
+    user = User(email=f"weight-{uuid.uuid4().hex}@example.com", password_hash="!", role="company")
+    db.add(user)
+    db.flush()
+    company = Company(user_id=user.id, company_name="Page weight", status="active")
+    db.add(company)
+    db.flush()
+
+    os.makedirs(os.path.join(STATIC_DIR, UPLOAD_DIR), exist_ok=True)
+    fixture = {"user_id": user.id, "company_id": company.id, "package_ids": [], "images": []}
+
+    for n in range(tours):
+        package = TourPackage(
+            company_id=company.id, title=f"Weight tour {n}", description="-",
+            country="-", city="-", price=100, status="active",
+        )
+        db.add(package)
+        db.flush()
+        fixture["package_ids"].append(package.id)
+
+        for g in range(gallery_per_tour + 1):
+            path = f"{UPLOAD_DIR}/{uuid.uuid4().hex}_weight.jpg"
+            camera_photo(path, n * 10 + g)
+            db.add(TourPackageGalleryImage(
+                tour_package_id=package.id,
+                image_path=path,
+                image_type="cover" if g == 0 else "gallery",
+            ))
+            fixture["images"].append(path)
+
+    bump_catalogue_version(db)
+    db.commit()
+    return fixture
+
+
+def drop(db, fixture):
+    for path in fixture["images"]:
+        delete_variants(path)
+        os.remove(os.path.join(STATIC_DIR, path))
+
+    db.query(TourPackageGalleryImage).filter(
+        TourPackageGalleryImage.tour_package_id.in_(fixture["package_ids"])
+    ).delete(synchronize_session=False)
+    db.query(TourPackage).filter(TourPackage.id.in_(fixture["package_ids"])).delete(synchronize_session=False)
+    db.query(Company).filter(Company.id == fixture["company_id"]).delete(synchronize_session=False)
+    db.query(User).filter(User.id == fixture["user_id"]).delete(synchronize_session=False)
+    bump_catalogue_version(db)
+    db.commit()
+
+
+# -------------------------------------------------
+# What a browser would download
+# -------------------------------------------------
+class ImageCollector(HTMLParser):
+    """Collects one candidate list per <img>, the <source>s of its <picture> first."""
+
+    def __init__(self):
+        super().__init__()
+        self.images = []
+        self._sources = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "picture":
+            self._sources = []
+        elif tag == "source":
+            self._sources.append(attrs)
+        elif tag == "img" and attrs.get("src"):
+            self.images.append(self._sources + [attrs])
+            self._sources = []
+
+
+def slot_width(sizes: str, viewport: int) -> float:
+    for entry in (sizes or "100vw").split(","):
+        entry = entry.strip()
+        match = MEDIA_SIZE.match(entry)
+        if match:
+            if viewport < int(match.group(1)):
+                continue
+            entry = match.group(2)
+        if entry.endswith("vw"):
+            return viewport * float(entry[:-2]) / 100
+        if entry.endswith("px"):
+            return float(entry[:-2])
+    return viewport
+
+
+def choose(candidates, viewport: int, dpr: float, accept) -> str:
+    for attrs in candidates:
+        kind = attrs.get("type")
+        if kind and kind.split("/")[-1] not in accept:
+            continue
+        srcset = attrs.get("srcset")
+        if not srcset:
+            return attrs["src"]
+
+        target = slot_width(attrs.get("sizes"), viewport) * dpr
+        options = sorted(
+            (int(descriptor[:-1]), url)
+            for url, descriptor in (item.strip().rsplit(" ", 1) for item in srcset.split(","))
+        )
+        for width, url in options:
+            if width >= target:
+                return url
+        return options[-1][1]
+
+
+def page_weight(html: str, viewport: int, dpr: float, accept) -> tuple[int, int]:
+    collector = ImageCollector()
+    collector.feed(html)
+    urls = {choose(candidates, viewport, dpr, accept) for candidates in collector.images}
+    total = 0
+    for url in urls:
+        path = urlsplit(url).path.removeprefix("/static/")
+        total += os.path.getsize(os.path.join(STATIC_DIR, path))
+    return len(urls), total
+
+
+async def fetch(port: int, path: str):
+    connection = Connection("127.0.0.1", port)
+    try:
+        started = time.perf_counter()
+        status, _, body = await connection.request("GET", path)
+        return status, body.decode(), (time.perf_counter() - started) * 1000
+    finally:
+        connection.close()
+
+
+def measure(label, port, args):
+    page_cache.clear()
+    status, html, server_ms = asyncio.run(fetch(port, "/tour-packages/tours"))
+    assert status == 200, status
+    images, image_bytes = page_weight(html, args.viewport, args.dpr, args.accept.split(","))
+    total = len(html.encode()) + image_bytes
+    transfer_ms = total * 8 / (args.mbps * 1_000_000) * 1000
+    print(
+        f"{label:<12} {images:>6} {image_bytes / 1024:>12,.0f} {total / 1024:>12,.0f}"
+        f" {server_ms + transfer_ms:>12,.0f}"
+    )
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Public tour list page weight, originals vs variants")
+    parser.add_argument("--tours", type=int, default=12, help="one page of the public list")
+    parser.add_argument("--gallery", type=int, default=3, help="gallery images per tour")
+    parser.add_argument("--viewport", type=int, default=1366)
+    parser.add_argument("--dpr", type=float, default=2)
+    parser.add_argument("--accept", default="avif,webp,jpeg")
+    parser.add_argument("--mbps", type=float, default=20, help="bandwidth for the time estimate")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--keep", action="store_true")
+    args = parser.parse_args()
+
+    from app.main import app
+
+    db = SessionLocal()
+    fixture = seed(db, args.tours, args.gallery)
+    server, thread = serve_in_thread(app, args.port)
+
+    try:
+        print(f"{'':<12} {'images':>6} {'image KiB':>12} {'page KiB':>12} {'~ms':>12}")
+        before = measure("originals", args.port, args)
+
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            list(pool.map(generate_variants, fixture["images"]))
+        print(f"  variants for {len(fixture['images'])} images in {time.perf_counter() - started:.1f}s")
+
+        after = measure("variants", args.port, args)
+        print(f"page weight -{(1 - after / before) * 100:.1f}%")
+    finally:
+        server.should_exit = True
+        thread.join()
+        if not args.keep:
+            drop(db, fixture)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+"""
+Query-plan regression check for the hot endpoints.
+
+    python -m app.benchmarks.query_plans --bookings 50000 --verbose
+
+Seeds scratch companies into the database in DATABASE_URL. It then calls
+each hot endpoint in-process and runs EXPLAIN on every SELECT the endpoint
+issues, with the same parameters. It exits with status 1 if any plan has a
+sequential scan on an application table. The scratch rows are removed
+again unless --keep.
+
+On Postgres the EXPLAIN runs with enable_seqscan off. A Seq Scan that still
+shows up means no index can serve the query at all, so the result doesn't
+depend on seed volume or planner statistics. On SQLite (left un-ANALYZEd
+for the same reason), a bare "SCAN <table>" line in EXPLAIN QUERY PLAN
+counts as a failure.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import sys
+import uuid
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+
+from sqlalchemy import event, insert
+
+from app.benchmarks.http_client import Connection, serve_in_thread
+from app.commands.rebuild_kpi_rollups import rebuild_company_kpis
+from app.core.security import create_access_token
+from app.database.session import SessionLocal, async_engine, engine
+from app.models.company import Company
+from app.models.company_kpi import CompanyDailyKpi
+from app.models.driver import Driver
+from app.models.driver_assignment import DriverAssignment
+from app.models.manual_booking import ManualBooking
+from app.models.package_capacity import PackageDailyCapacity
+from app.models.tour_package import TourPackage, TourPackageDriver
+from app.models.user import User
+
+BATCH_SIZE = 10000
+
+# (label, path) - formatted with the fixture values below
+HOT_ENDPOINTS = [
+    ("booking datatable", "/manual-bookings/datatable?draw=1&start=0&length=10"),
+    ("booking datatable, next page", "/manual-bookings/datatable?draw=2&start=10&length=10&cursor={cursor}"),
+    ("booking datatable by travel date",
+     "/manual-bookings/datatable?draw=1&start=0&length=10&order[0][column]=2&order[0][dir]=asc"),
+    ("booked dates", "/manual-bookings/booked-dates/{package_id}?start={day}"),
+    ("available drivers", "/manual-bookings/available-drivers/{package_id}/{day}"),
+    ("all drivers", "/manual-bookings/all-drivers/{package_id}/{day}"),
+    ("tour list", "/tour-packages/?page=1"),
+    ("tour list available in window", "/tour-packages/?travel_date={day}&date_to={day_to}&guests=4"),
+    ("public tour list available in window", "/tour-packages/tours?travel_date={day}&date_to={day_to}&guests=4"),
+    ("public tour availability", "/tour-packages/tours/availability?travel_date={day}&date_to={day_to}&guests=4"),
+    ("public tour search", "/tour-packages/tours?search=package+3"),
+    ("driver datatable", "/drivers/datatable?draw=1&start=0&length=10"),
+    ("dashboard summary", "/company/dashboard/summary"),
+    ("dashboard stats", "/company/dashboard/dashboard-stats"),
+    ("dashboard active packages", "/company/dashboard/datatable/active-packages"),
+]
+
+SQLITE_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+
+
+# -------------------------------------------------
+# Fixture
+# -------------------------------------------------
+def seed(db, bookings: int, companies: int, packages_per_company: int, drivers_per_company: int):
+    rng = random.Random(7)
+    fixture = defaultdict(list)
+    first_day = date.today().replace(day=1)
+
+    for n in range(companies):
+        user = User(email=f"plans-{uuid.uuid4().hex}@example.com", password_hash="!", role="company")
+        db.add(user)
+        db.flush()
+        company = Company(user_id=user.id, company_name=f"Plans {n}", status="active")
+        db.add(company)
+        db.flush()
+
+        drivers = [
+            Driver(company_id=company.id, name=f"Driver {d}", phone_number="500000000", seats=rng.randint(4, 12))
+            for d in range(drivers_per_company)
+        ]
+        packages = [
+            TourPackage(
+                company_id=company.id, title=f"Package {p}", description="-",
+                country="-", city="-", price=100, status="active",
+            )
+            for p in range(packages_per_company)
+        ]
+        db.add_all(drivers + packages)
+        db.flush()
+
+        for package in packages:
+            for driver in rng.sample(drivers, min(3, len(drivers))):
+                db.add(TourPackageDriver(tour_package_id=package.id, driver_id=driver.id))
+            fixture["packages"].append((package.id, [d.id for d in drivers]))
+
+        fixture["user_ids"].append(user.id)
+        fixture["company_ids"].append(company.id)
+        fixture["package_ids"].extend(p.id for p in packages)
+        fixture["driver_ids"].extend(d.id for d in drivers)
+
+    db.commit()
+
+    ledger = Counter()
+    seats = Counter()
+    taken = set()
+    batch = []
+
+    def flush():
+        if batch:
+            db.execute(insert(ManualBooking.__table__), batch)
+            batch.clear()
+
+    for n in range(bookings):
+        package_id, driver_ids = rng.choice(fixture["packages"])
+        travel_date = first_day + timedelta(days=rng.randrange(180))
+        driver_id = rng.choice(driver_ids)
+        if (driver_id, travel_date) in taken:
+            driver_id = None
+        else:
+            taken.add((driver_id, travel_date))
+
+        adults, kids = rng.randint(1, 4), rng.randint(0, 2)
+        ledger[(package_id, travel_date)] += 1
+        seats[(package_id, travel_date)] += adults + kids
+
+        batch.append({
+            "guest_name": f"Guest {n}",
+            "country_code": "+971",
+            "phone": f"5{n:08d}",
+            "adults": adults,
+            "kids": kids,
+            "tour_package_id": package_id,
+            "driver_id": driver_id,
+            "travel_date": travel_date,
+            "total_amount": 250,
+            "advance_amount": 0,
+            "remaining_amount": 250,
+            "payment_status": "pending",
+            "is_deleted": rng.random() < 0.05,
+        })
+        if len(batch) == BATCH_SIZE:
+            flush()
+    flush()
+    db.commit()
+
+    # driver assignments and the capacity ledger, as the booking routes keep them
+    rows = db.query(ManualBooking.id, ManualBooking.driver_id, ManualBooking.travel_date).filter(
+        ManualBooking.tour_package_id.in_(fixture["package_ids"]),
+        ManualBooking.driver_id.isnot(None)
+    ).all()
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.execute(insert(DriverAssignment.__table__), [
+            {"driver_id": driver_id, "travel_date": travel_date, "booking_id": booking_id}
+            for booking_id, driver_id, travel_date in rows[start:start + BATCH_SIZE]
+        ])
+
+    ledger_rows = [
+        {
+            "tour_package_id": package_id, "travel_date": travel_date,
+            "drivers_available": 3, "seats_available": 24,
+            "bookings_count": count, "seats_booked": seats[(package_id, travel_date)],
+        }
+        for (package_id, travel_date), count in ledger.items()
+    ]
+    for start in range(0, len(ledger_rows), BATCH_SIZE):
+        db.execute(insert(PackageDailyCapacity.__table__), ledger_rows[start:start + BATCH_SIZE])
+
+    for company_id in fixture["company_ids"]:
+        rebuild_company_kpis(db, company_id)
+    db.commit()
+
+    return fixture
+
+
+def drop(db, fixture):
+    package_ids, driver_ids = fixture["package_ids"], fixture["driver_ids"]
+
+    db.query(DriverAssignment).filter(DriverAssignment.driver_id.in_(driver_ids)).delete(synchronize_session=False)
+    db.query(PackageDailyCapacity).filter(
+        PackageDailyCapacity.tour_package_id.in_(package_ids)
+    ).delete(synchronize_session=False)
+    db.query(CompanyDailyKpi).filter(
+        CompanyDailyKpi.company_id.in_(fixture["company_ids"])
+    ).delete(synchronize_session=False)
+    db.query(ManualBooking).filter(ManualBooking.tour_package_id.in_(package_ids)).delete(synchronize_session=False)
+    db.query(TourPackageDriver).filter(
+        TourPackageDriver.tour_package_id.in_(package_ids)
+    ).delete(synchronize_session=False)
+    db.query(Driver).filter(Driver.id.in_(driver_ids)).delete(synchronize_session=False)
+    db.query(TourPackage).filter(TourPackage.id.in_(package_ids)).delete(synchronize_session=False)
+    db.query(Company).filter(Company.id.in_(fixture["company_ids"])).delete(synchronize_session=False)
+    db.query(User).filter(User.id.in_(fixture["user_ids"])).delete(synchronize_session=False)
+    db.commit()
+
+
+def analyze(db):
+    # SQLite has no enable_seqscan. Without statistics its planner assumes
+    # an index is selective, which is the question this check asks.
+    if db.bind.dialect.name == "postgresql":
+        db.connection().exec_driver_sql("ANALYZE")
+        db.commit()
+
+
+# -------------------------------------------------
+# Plan capture
+# -------------------------------------------------
+def _postgres_seq_scans(cursor, statement, parameters):
+    cursor.execute("SET enable_seqscan = off")
+    try:
+        cursor.execute("EXPLAIN (FORMAT JSON) " + statement, parameters)
+        plan = cursor.fetchone()[0]
+    finally:
+        cursor.execute("RESET enable_seqscan")
+
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    scans = []
+    nodes = [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        if node.get("Node Type") == "Seq Scan":
+            scans.append(node.get("Relation Name"))
+        nodes.extend(node.get("Plans", []))
+
+    return scans, json.dumps(plan, indent=2)
+
+
+def _sqlite_seq_scans(cursor, statement, parameters):
+    cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+    details = [row[-1] for row in cursor.fetchall()]
+
+    scans = [m.group(1) for m in map(SQLITE_SCAN.match, details) if m]
+    return scans, "\n".join(details)
+
+
+class PlanRecorder:
+    """
+    EXPLAINs every SELECT that goes through the sync and async engines,
+    with the exact statement and parameters the app sent.
+    """
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.label = None
+        self.results = defaultdict(list)
+
+    def install(self):
+        for target in (engine, async_engine.sync_engine):
+            event.listen(target, "before_cursor_execute", self._before_execute)
+
+    def remove(self):
+        for target in (engine, async_engine.sync_engine):
+            event.remove(target, "before_cursor_execute", self._before_execute)
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self.label is None or executemany:
+            return
+        if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            return
+
+        explain = _postgres_seq_scans if conn.dialect.name == "postgresql" else _sqlite_seq_scans
+        explain_cursor = conn.connection.cursor()
+        try:
+            scans, plan = explain(explain_cursor, statement, parameters)
+        finally:
+            explain_cursor.close()
+
+        scans = [table for table in scans if table in self.tables]
+        self.results[self.label].append((statement, scans, plan))
+
+
+async def call_endpoints(port: int, token: str, endpoints):
+    connection = Connection("127.0.0.1", port)
+    try:
+        for label, path, recorder in endpoints:
+            recorder.label = label
+            status, _, _ = await connection.request("GET", path, headers={"Cookie": f"access_token={token}"})
+            recorder.label = None
+            if status >= 400:
+                raise SystemExit(f"{label}: GET {path} returned {status}")
+    finally:
+        connection.close()
+
+
+def run(bookings: int, companies: int, port: int, verbose: bool, keep: bool):
+    from app.main import app
+    from app.database.base import Base
+
+    db = SessionLocal()
+    fixture = seed(db, bookings, companies, packages_per_company=10, drivers_per_company=12)
+    analyze(db)
+    print(f"seeded {bookings} bookings over {companies} companies")
+
+    recorder = PlanRecorder(set(Base.metadata.tables))
+    server, thread = serve_in_thread(app, port)
+
+    try:
+        package_id = fixture["package_ids"][0]
+        cursor = db.query(ManualBooking.id).filter(
+            ManualBooking.tour_package_id.in_(fixture["package_ids"][:10])
+        ).order_by(ManualBooking.id.desc()).offset(10).limit(1).scalar()
+        values = {
+            "package_id": package_id,
+            "day": (date.today().replace(day=1) + timedelta(days=3)).isoformat(),
+            "day_to": (date.today().replace(day=1) + timedelta(days=9)).isoformat(),
+            "cursor": cursor,
+        }
+
+        token = create_access_token({"user_id": fixture["user_ids"][0], "role": "company"})
+        endpoints = [(label, path.format(**values), recorder) for label, path in HOT_ENDPOINTS]
+
+        recorder.install()
+        try:
+            asyncio.run(call_endpoints(port, token, endpoints))
+        finally:
+            recorder.remove()
+    finally:
+        server.should_exit = True
+        thread.join()
+        if not keep:
+            drop(db, fixture)
+        db.close()
+
+    failed = False
+    for label, _ in HOT_ENDPOINTS:
+        statements = recorder.results[label]
+        scanned = sorted({table for _, scans, _ in statements for table in scans})
+        failed |= bool(scanned)
+
+        status = f"SEQ SCAN on {', '.join(scanned)}" if scanned else "ok"
+        print(f"{label:<36} {len(statements):>2} queries  {status}")
+
+        if verbose or scanned:
+            for statement, scans, plan in statements:
+                if verbose or scans:
+                    print("\n    " + statement.replace("\n", "\n    "))
+                    print("    -> " + plan.replace("\n", "\n       ") + "\n")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bookings", type=int, default=50000)
+    parser.add_argument("--companies", type=int, default=20)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--verbose", action="store_true", help="print every plan, not only failing ones")
+    parser.add_argument("--keep", action="store_true", help="leave the seeded rows in place")
+    args = parser.parse_args()
+
+    run(args.bookings, args.companies, args.port, args.verbose, args.keep)
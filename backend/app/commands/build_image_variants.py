@@ -0,0 +1,85 @@
+"""
+Generates the resized AVIF/WebP/JPEG variants for uploads that don't have
+them yet: images uploaded before variants existed, or jobs lost when a web
+process stopped.
+
+    python -m app.commands.build_image_variants
+    python -m app.commands.build_image_variants --force --workers 8
+
+Run it from the backend directory (paths are relative to app/static).
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from app.database.session import SessionLocal
+from app.models.company import Company
+from app.models.driver import Driver
+from app.models.tour_package import TourPackageGalleryImage
+from app.services.image_variants import STATIC_DIR, generate_variants, read_manifest
+from app.utils.page_cache import bump_catalogue_version
+
+
+def collect_uploads(db):
+    """(image_path, shown on public pages) for every stored upload."""
+    tours = db.query(TourPackageGalleryImage.image_path).all()
+    logos = db.query(Company.logo).filter(Company.logo.isnot(None)).all()
+    drivers = db.query(Driver.image).filter(Driver.image.isnot(None)).all()
+
+    uploads = [(path, True) for path, in tours]
+    uploads += [(path, False) for path, in logos + drivers]
+    return [(path, public) for path, public in uploads if path]
+
+
+def run(force: bool = False, workers: int = 4):
+    db = SessionLocal()
+    try:
+        uploads = collect_uploads(db)
+    finally:
+        db.close()
+
+    pending = [
+        (path, public) for path, public in uploads
+        if os.path.exists(os.path.join(STATIC_DIR, path))
+        and (force or read_manifest(path) is None)
+    ]
+
+    started = time.perf_counter()
+    built = failed = 0
+    public_changed = False
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(generate_variants, path): (path, public) for path, public in pending}
+        for future in as_completed(futures):
+            path, public = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                failed += 1
+                print(f"❌ {path}: {e}")
+                continue
+            built += 1
+            public_changed = public_changed or public
+
+    if public_changed:
+        db = SessionLocal()
+        try:
+            bump_catalogue_version(db)
+            db.commit()
+        finally:
+            db.close()
+
+    print(
+        f"✅ Built variants for {built} of {len(uploads)} uploads "
+        f"({failed} failed) in {time.perf_counter() - started:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build resized image variants for uploads")
+    parser.add_argument("--force", action="store_true", help="rebuild variants that already exist")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    run(args.force, args.workers)
@@ -0,0 +1,114 @@
+"""
+Recomputes the company_daily_kpis rollups from manual_bookings.
+
+    python -m app.commands.rebuild_kpi_rollups               # every company
+    python -m app.commands.rebuild_kpi_rollups --company 12  # just one
+    python -m app.commands.rebuild_kpi_rollups --workers 8
+
+Each company is rebuilt in its own transaction, several companies in
+parallel, so the dashboards of the other companies keep working meanwhile.
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from sqlalchemy import case, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.database.session import SessionLocal
+from app.models.company import Company
+from app.models.company_kpi import CompanyDailyKpi
+from app.models.driver import Driver  # noqa: F401  (mapper registry)
+from app.models.manual_booking import ManualBooking
+from app.models.tour_package import TourPackage
+
+
+KPI_COLUMNS = [
+    "company_id",
+    "day",
+    "bookings_created",
+    "revenue",
+    "paid_revenue",
+    "pending_count",
+    "outstanding_amount",
+]
+
+
+def kpi_aggregate(*criteria):
+    """
+    SELECT of fresh rollup rows (KPI_COLUMNS) for the live bookings of the
+    packages matching `criteria`.
+    """
+    day = func.date(ManualBooking.created_at)
+    paid = ManualBooking.payment_status == "paid"
+
+    return (
+        select(
+            TourPackage.company_id,
+            day,
+            func.count(ManualBooking.id),
+            func.coalesce(func.sum(ManualBooking.total_amount), 0),
+            func.coalesce(func.sum(case((paid, ManualBooking.total_amount), else_=0)), 0),
+            func.sum(case((paid, 0), else_=1)),
+            func.coalesce(func.sum(ManualBooking.remaining_amount), 0),
+        )
+        .join(TourPackage, TourPackage.id == ManualBooking.tour_package_id)
+        .where(
+            *criteria,
+            ManualBooking.is_deleted == False,
+            ManualBooking.created_at.isnot(None)
+        )
+        .group_by(TourPackage.company_id, day)
+    )
+
+
+def rebuild_company_kpis(db: Session, company_id: int):
+    """
+    Replaces one company's rollup rows with a fresh aggregate. Does not commit.
+    """
+    db.query(CompanyDailyKpi).filter(
+        CompanyDailyKpi.company_id == company_id
+    ).delete(synchronize_session=False)
+
+    db.execute(
+        insert(CompanyDailyKpi).from_select(
+            KPI_COLUMNS,
+            kpi_aggregate(TourPackage.company_id == company_id),
+        )
+    )
+
+
+def _rebuild_one(company_id: int):
+    db = SessionLocal()
+    try:
+        rebuild_company_kpis(db, company_id)
+        db.commit()
+    finally:
+        db.close()
+    return company_id
+
+
+def run(company_ids=None, workers: int = 4):
+    if not company_ids:
+        db = SessionLocal()
+        try:
+            company_ids = [row[0] for row in db.query(Company.id).all()]
+        finally:
+            db.close()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_rebuild_one, company_id) for company_id in company_ids]
+        for future in as_completed(futures):
+            future.result()
+
+    print(f"✅ Rebuilt KPI rollups for {len(company_ids)} companies in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild company daily KPI rollups")
+    parser.add_argument("--company", type=int, action="append", help="company id (repeatable)")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    run(args.company, args.workers)
@@ -6,4 +6,45 @@ load_dotenv()
 class Settings:
     DATABASE_URL = os.getenv("DATABASE_URL")
 
+    # Decoded access tokens kept in memory per process (0 disables)
+    PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+    PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+
+    # Rendered public tour pages (see app/utils/page_cache.py)
+    PAGE_CACHE_SIZE = int(os.getenv("PAGE_CACHE_SIZE", "1000"))
+    PAGE_CACHE_VERSION_TTL = float(os.getenv("PAGE_CACHE_VERSION_TTL", "2"))
+
+    # Fingerprinted assets written by app.commands.build_static
+    STATIC_BUILD_DIR = os.getenv("STATIC_BUILD_DIR", "app/static-build")
+
+    # Jinja2 (see app/core/templates.py): reload edited templates, off in production
+    TEMPLATE_AUTO_RELOAD = os.getenv("TEMPLATE_AUTO_RELOAD", "0") == "1"
+    TEMPLATE_CACHE_DIR = os.getenv("TEMPLATE_CACHE_DIR", "app/.template-cache")
+
+    # Uploads (see app/services/storage.py)
+    STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local")
+    STORAGE_LOCAL_ROOT = os.getenv("STORAGE_LOCAL_ROOT", "app/static")
+    MAX_UPLOAD_MB = int(os.getenv("MAX_UPLOAD_MB", "10"))
+
+    # Rows accepted by one bookings import (app/services/booking_import.py)
+    BOOKING_IMPORT_MAX_ROWS = int(os.getenv("BOOKING_IMPORT_MAX_ROWS", "100000"))
+
+    # Processes that encode upload variants (see app/services/image_variants.py)
+    IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+
+    # Metrics (see app/utils/metrics.py); /metrics wants this bearer token when set
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+    # Requests at least this slow are logged with their slowest SQL (0 disables)
+    SLOW_REQUEST_MS = int(os.getenv("SLOW_REQUEST_MS", "1000"))
+    # Lazy-load detector and query budgets: off, log or raise (see app/utils/query_debug.py)
+    QUERY_DEBUG = os.getenv("QUERY_DEBUG", "off")
+
+    # WhatsApp Cloud API
+    WHATSAPP_API_URL = os.getenv("WHATSAPP_API_URL", "https://graph.facebook.com/v17.0")
+    WHATSAPP_ACCESS_TOKEN = os.getenv("WHATSAPP_ACCESS_TOKEN")
+    WHATSAPP_PHONE_NUMBER_ID = os.getenv("WHATSAPP_PHONE_NUMBER_ID")
+    WHATSAPP_WORKERS = int(os.getenv("WHATSAPP_WORKERS", "4"))
+    WHATSAPP_MAX_ATTEMPTS = int(os.getenv("WHATSAPP_MAX_ATTEMPTS", "6"))
+    WHATSAPP_PER_NUMBER_PER_MINUTE = int(os.getenv("WHATSAPP_PER_NUMBER_PER_MINUTE", "6"))
+
 settings = Settings()
@@ -0,0 +1,50 @@
+"""
+Bulk loading: COPY FROM STDIN on Postgres, batched executemany INSERTs
+elsewhere. Rows are tuples in `columns` order. Neither path returns ids,
+callers that need them allocate them up front.
+"""
+import csv
+import io
+from itertools import islice
+
+from sqlalchemy import insert
+
+BATCH_SIZE = 50000
+
+
+def copy_rows(db, table: str, columns: list, rows):
+    """
+    COPY ... FROM STDIN in the session's transaction (psycopg2). None goes
+    in as NULL, and so does an empty string.
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+    finally:
+        cursor.close()
+
+
+def bulk_insert(db, table, columns: list, rows, batch_size: int = BATCH_SIZE) -> int:
+    """
+    Loads `rows` into `table` (a Table) `batch_size` rows at a time, in the
+    session's transaction. Returns the number of rows. Does not commit.
+    """
+    postgres = db.get_bind().dialect.name == "postgresql"
+    rows = iter(rows)
+    count = 0
+
+    while batch := list(islice(rows, batch_size)):
+        if postgres:
+            copy_rows(db, table.name, columns, batch)
+        else:
+            db.execute(insert(table), [dict(zip(columns, row)) for row in batch])
+        count += len(batch)
+
+    return count
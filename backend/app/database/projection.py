@@ -0,0 +1,32 @@
+"""
+Column projections for read-only lists.
+
+A Projection selects just the columns a list shows and hands them back as
+named tuples (no per-instance __dict__): no ORM entities, no identity
+map, no attribute tracking. Use it where the rows are only read and
+serialised, load entities where they are changed.
+
+    DriverListRow = Projection("DriverListRow", id=Driver.id, name=Driver.name)
+
+    stmt = DriverListRow.select().where(Driver.company_id == company_id)
+    drivers = DriverListRow.rows(await db.execute(stmt))
+    drivers[0].name
+"""
+from collections import namedtuple
+
+from sqlalchemy import select
+
+
+class Projection:
+
+    def __init__(self, name: str, /, **columns):
+        self.columns = columns
+        self.row = namedtuple(name, columns)
+
+    def select(self):
+        """SELECT of the projected columns, in field order."""
+        return select(*(column.label(field) for field, column in self.columns.items()))
+
+    def rows(self, result) -> list:
+        """The rows of an executed select() as `self.row` tuples."""
+        return list(map(self.row._make, result.tuples()))
@@ -1,12 +1,48 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.utils.metrics import TimedAsyncQueuePool, TimedQueuePool, instrument_engine
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True, max_overflow=20)
+engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True, max_overflow=20, poolclass=TimedQueuePool)
+instrument_engine(engine, "sync")
 SessionLocal = sessionmaker(bind=engine)
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+# -------------------------------------------------
+# Async stack (asyncpg / aiosqlite) for `async def` routes
+# -------------------------------------------------
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_url(url: str):
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername))
+
+
+async_engine = create_async_engine(
+    async_database_url(settings.DATABASE_URL),
+    pool_pre_ping=True,
+    max_overflow=20,
+    poolclass=TimedAsyncQueuePool,
+)
+instrument_engine(async_engine.sync_engine, "async")
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+)
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
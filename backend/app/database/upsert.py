@@ -0,0 +1,16 @@
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+def dialect_insert(db, table):
+    """
+    INSERT construct for the session's dialect that supports
+    `on_conflict_do_update` / `on_conflict_do_nothing`.
+    """
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        return postgresql.insert(table)
+    if dialect == "sqlite":
+        return sqlite.insert(table)
+
+    raise NotImplementedError(f"Upsert is not supported on {dialect}")
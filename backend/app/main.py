@@ -1,10 +1,43 @@
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from fastapi.templating import Jinja2Templates
-from fastapi.staticfiles import StaticFiles
-from app.routers.web import auth, admin_dashboard, tour_package, company, manual_booking, driver, company_dashboard   
+from app.core.config import settings
+from app.core.templates import warm_templates
+from app.routers.web import auth, admin_dashboard, tour_package, company, manual_booking, driver, company_dashboard, metrics
+from app.services.whatsapp_worker import outbox_worker
+from app.services.image_variants import image_pool
+from app.utils.metrics import MetricsMiddleware
+from app.utils.query_debug import QueryDebugMiddleware
+from app.utils.static_assets import AssetStaticFiles, static_assets
 
-app = FastAPI()
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    static_assets.load()
+    warm_templates()
+
+    whatsapp_enabled = bool(settings.WHATSAPP_ACCESS_TOKEN and settings.WHATSAPP_PHONE_NUMBER_ID)
+    if whatsapp_enabled:
+        outbox_worker.start()
+    else:
+        logger.warning("WhatsApp credentials missing, outbox messages stay queued")
+
+    yield
+
+    if whatsapp_enabled:
+        outbox_worker.stop()
+
+    # let queued image variants finish, the backfill command covers a crash
+    image_pool.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
+if settings.QUERY_DEBUG != "off":
+    app.add_middleware(QueryDebugMiddleware, mode=settings.QUERY_DEBUG)
+app.add_middleware(MetricsMiddleware)
+app.mount("/static", AssetStaticFiles(directory="app/static", manifest=static_assets), name="static")
 
 app.include_router(auth.router)
 app.include_router(admin_dashboard.router)
@@ -13,5 +46,4 @@ app.include_router(tour_package.router)
 app.include_router(manual_booking.router)
 app.include_router(driver.router)
 app.include_router(company_dashboard.router)
-
-
+app.include_router(metrics.router)
@@ -1,4 +1,9 @@
 from .user import User
 from .company import Company
 from .tour_package import TourPackage
-from .manual_booking import ManualBooking
\ No newline at end of file
+from .manual_booking import ManualBooking
+from .package_capacity import PackageDailyCapacity
+from .driver_assignment import DriverAssignment
+from .whatsapp_outbox import WhatsAppOutbox
+from .company_kpi import CompanyDailyKpi
+from .catalogue_version import CatalogueVersion
@@ -0,0 +1,13 @@
+from sqlalchemy import BigInteger, Column, Integer
+from app.database.base import Base
+
+
+class CatalogueVersion(Base):
+    """
+    Single row (id = 1) whose version is bumped whenever anything shown on
+    the public tour pages changes. Cached public pages are keyed by it.
+    """
+    __tablename__ = "catalogue_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=1)
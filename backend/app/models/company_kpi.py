@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, Date, Numeric, ForeignKey, UniqueConstraint
+from app.database.base import Base
+
+
+class CompanyDailyKpi(Base):
+    """
+    Per company, per day (booking created_at date) rollup of the dashboard KPIs.
+    Maintained in the same transaction as booking create/update/delete and
+    rebuilt with `python -m app.commands.rebuild_kpi_rollups`.
+    """
+    __tablename__ = "company_daily_kpis"
+
+    id = Column(Integer, primary_key=True, index=True)
+    company_id = Column(
+        Integer,
+        ForeignKey("companies.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    day = Column(Date, nullable=False)
+    bookings_created = Column(Integer, nullable=False, default=0)
+    revenue = Column(Numeric(14, 2), nullable=False, default=0)
+    paid_revenue = Column(Numeric(14, 2), nullable=False, default=0)
+    pending_count = Column(Integer, nullable=False, default=0)
+    outstanding_amount = Column(Numeric(14, 2), nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("company_id", "day", name="uq_company_daily_kpis_company_day"),
+    )
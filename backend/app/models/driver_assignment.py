@@ -0,0 +1,36 @@
+from sqlalchemy import Column, Integer, Date, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import relationship
+from app.database.base import Base
+
+
+class DriverAssignment(Base):
+    """
+    A driver can hold at most one booking per travel date. The unique
+    constraint is what rejects a double booking, not a read-then-insert check.
+    """
+    __tablename__ = "driver_assignments"
+
+    id = Column(Integer, primary_key=True, index=True)
+    driver_id = Column(
+        Integer,
+        ForeignKey("drivers.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    travel_date = Column(Date, nullable=False, index=True)
+    booking_id = Column(
+        Integer,
+        ForeignKey("manual_bookings.id", ondelete="CASCADE"),
+        nullable=False,
+        unique=True
+    )
+
+    __table_args__ = (
+        UniqueConstraint(
+            "driver_id",
+            "travel_date",
+            name="uq_driver_assignments_driver_date"
+        ),
+    )
+
+    driver = relationship("Driver")
+    booking = relationship("ManualBooking")
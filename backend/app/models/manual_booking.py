@@ -7,7 +7,9 @@ from sqlalchemy import (
     Date,
     Time,
     Numeric,
-    DateTime
+    DateTime,
+    Index,
+    text
 )
 from sqlalchemy.sql import func
 from app.database.base import Base
@@ -46,6 +48,22 @@ class ManualBooking(Base):
     is_deleted = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # Partial on live rows: every hot query filters is_deleted = false
+    __table_args__ = (
+        Index(
+            "ix_manual_bookings_package_travel_date",
+            "tour_package_id", "travel_date",
+            postgresql_where=text("is_deleted = false"),
+            sqlite_where=text("is_deleted = 0"),
+        ),
+        Index(
+            "ix_manual_bookings_package_created_at",
+            "tour_package_id", "created_at",
+            postgresql_where=text("is_deleted = false"),
+            sqlite_where=text("is_deleted = 0"),
+        ),
+    )
+
     tour_package = relationship("TourPackage")
     driver = relationship("Driver", back_populates="bookings")
 
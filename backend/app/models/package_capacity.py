@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, Date, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import relationship
+from app.database.base import Base
+
+
+class PackageDailyCapacity(Base):
+    """
+    One row per (package, travel date) that has at least one booking.
+    Maintained in the same transaction as booking create/update/delete.
+    """
+    __tablename__ = "package_daily_capacity"
+
+    id = Column(Integer, primary_key=True, index=True)
+    tour_package_id = Column(
+        Integer,
+        ForeignKey("tour_packages.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    travel_date = Column(Date, nullable=False)
+    drivers_available = Column(Integer, nullable=False, default=0)
+    seats_available = Column(Integer, nullable=False, default=0)
+    bookings_count = Column(Integer, nullable=False, default=0)
+    seats_booked = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "tour_package_id",
+            "travel_date",
+            name="uq_package_daily_capacity_package_date"
+        ),
+    )
+
+    tour_package = relationship("TourPackage")
@@ -1,7 +1,7 @@
 from locale import currency
 from sqlalchemy import (
     Column, Integer, String, Text, Float,
-    Boolean, ForeignKey, Enum
+    Boolean, ForeignKey, Enum, Index, text
 )
 from sqlalchemy.orm import relationship
 from app.database.base import Base
@@ -22,6 +22,19 @@ class TourPackage(Base):
     excludes = Column(Text, nullable=True)
     status = Column(String(20), default="active")  
     is_deleted = Column(Boolean, default=False)
+
+    __table_args__ = (
+        # not partial: the bookings datatable joins without an is_deleted filter
+        Index("ix_tour_packages_company_id", "company_id", "id"),
+        # status is a bound parameter, so it's a key column, not in the predicate
+        Index(
+            "ix_tour_packages_status",
+            "status", "id",
+            postgresql_where=text("is_deleted = false"),
+            sqlite_where=text("is_deleted = 0"),
+        ),
+    )
+
     company = relationship("Company", back_populates="tour_packages")
     gallery_images = relationship(
         "TourPackageGalleryImage",
@@ -41,7 +54,8 @@ class TourPackageGalleryImage(Base):
     tour_package_id = Column(
         Integer,
         ForeignKey("tour_packages.id", ondelete="CASCADE"),
-        nullable=False
+        nullable=False,
+        index=True
     )
 
     image_path = Column(String(255), nullable=False)
@@ -63,7 +77,12 @@ class TourPackageDriver(Base):
     driver_id = Column(
         Integer,
         ForeignKey("drivers.id", ondelete="CASCADE"),
-        nullable=False
+        nullable=False,
+        index=True
+    )
+
+    __table_args__ = (
+        Index("ix_tour_package_drivers_package_driver", "tour_package_id", "driver_id"),
     )
 
     tour_package = relationship(
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Index
+from sqlalchemy.sql import func
+from app.database.base import Base
+
+
+class WhatsAppOutbox(Base):
+    """
+    Outgoing WhatsApp messages. Rows are written in the booking transaction
+    and delivered later by the outbox worker (app/services/whatsapp_worker.py).
+    """
+    __tablename__ = "whatsapp_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    booking_id = Column(
+        Integer,
+        ForeignKey("manual_bookings.id", ondelete="SET NULL"),
+        nullable=True
+    )
+    phone_number = Column(String(30), nullable=False)
+    payload = Column(JSON, nullable=False)
+    status = Column(String(20), nullable=False, default="pending")  # pending | sending | sent | failed
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_whatsapp_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
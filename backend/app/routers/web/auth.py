@@ -9,6 +9,7 @@ from app.schemas.user import LoginForm
 from app.auth.dependencies import get_current_user
 from fastapi.responses import HTMLResponse
 from app.auth.dependencies import redirect_to_login
+from app.auth.principal_cache import principal_cache
 from app.services.email_service import send_reset_password_email
 from jose import jwt
 from dotenv import load_dotenv
@@ -82,6 +83,8 @@ def logout(request: Request):
     """
     Logout the user: delete cookies and respond with success.
     """
+    principal_cache.discard(request.cookies.get("access_token"))
+
     response = JSONResponse({"success": True})  # AJAX-friendly response
     response.delete_cookie("access_token", path="/")
     response.delete_cookie("user_role", path="/")
@@ -175,6 +178,8 @@ def reset_password_submit(
     user.password_hash = hash_password(password)
     db.commit()
 
+    principal_cache.invalidate_user(user.id)
+
     return RedirectResponse(
         request.url_for("login_page"),
         status_code=303
@@ -1,4 +1,3 @@
-import os, uuid
 from fastapi import (
     APIRouter, Depends, Request, Form, UploadFile, File, Query, BackgroundTasks
 
@@ -6,28 +5,35 @@ from fastapi import (
 from fastapi.responses import (
     HTMLResponse, RedirectResponse, JSONResponse
 )
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import or_
 from pydantic import ValidationError
 
-from app.database.session import get_db
+from app.database.projection import Projection
+from app.database.session import get_db, get_async_db
 from app.core.templates import templates
 from app.core.security import hash_password
-from app.auth.dependencies import admin_only, get_current_user
+from app.auth.dependencies import admin_only, admin_only_async, get_current_user
+from app.auth.principal_cache import principal_cache
 from app.models.company import Company
 from app.models.user import User
 from app.schemas.company import CompanyCreate, CompanyUpdate
 from app.core.constants import COUNTRIES, CURRENCIES, COUNTRY_CODES
+from app.utils.datatable import compact_rows, selected_fields, url_pattern
 from app.utils.flash import flash_redirect
+from app.utils.query_debug import query_budget
+from app.utils.page_cache import bump_catalogue_version
 from app.services.email_service import send_company_created_email
+from app.services.image_variants import enqueue_variants
+from app.services.storage import UploadRejected, save_upload
 
 # -------------------------------------------------
 # Router config
 # -------------------------------------------------
 router = APIRouter(prefix="/companies", tags=["Companies"])
 
-UPLOAD_DIR = "app/static/uploads/companies"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+UPLOAD_DIR = "uploads/companies"
 
 # -------------------------------------------------
 # Helper: redirect with flash message
@@ -66,48 +72,43 @@ def render_form(
         status_code=status_code
     )
     
+CompanyListRow = Projection(
+    "CompanyListRow",
+    id=Company.id,
+    company_name=Company.company_name,
+    email=User.email,
+    country_code=Company.country_code,
+    phone=Company.phone,
+    status=Company.status,
+)
+
 @router.get("/datatable", name="company_datatable")
-def company_datatable(
+@query_budget(statements=2)
+async def company_datatable(
     request: Request,
-    db: Session = Depends(get_db),
-    _=Depends(admin_only)
+    db: AsyncSession = Depends(get_async_db),
+    _=Depends(admin_only_async)
 ):
-    companies = (
-        db.query(Company)
-        .filter(
-            Company.is_deleted == False,
-            Company.user.has(User.role == "company")
+    fields = selected_fields(request, CompanyListRow.row._fields)
+    companies = CompanyListRow.rows(
+        await db.execute(
+            CompanyListRow.select()
+            .select_from(Company)
+            .join(Company.user)
+            .where(
+                Company.is_deleted == False,
+                User.role == "company"
+            )
         )
-        .all()
     )
 
-    data = []
-    edit_icon = "/static/assets/icon/edit.svg"
-    trash_icon = "/static/assets/icon/trash.svg"
-    for company in companies:
-        data.append({
-            "company_name": company.company_name,
-            "email": company.user.email,
-            "phone": f"{company.country_code} {company.phone}",
-            "status": company.status,
-            "actions": f"""
-                <a href="{request.url_for('company_edit_page', company_id=company.id)}"
-           class="btn btn-sm btn-edit"
-           title="Edit Company">
-            <img src="{edit_icon}" alt="Edit" class="table-icon">
-        </a>
-
-        <a href="javascript:void(0)"
-           class="confirm-company-delete btn btn-sm btn-delete"
-           data-route="{request.url_for('company_delete', company_id=company.id)}"
-           title="Delete Company">
-            <img src="{trash_icon}" alt="Delete" class="table-icon">
-        </a>
-            """
-        })
-
+    # raw columns, the list page builds the cells and action links
     return JSONResponse({
-        "data": data   # ✅ ONLY THIS
+        **compact_rows(companies, fields),
+        "urls": {
+            "edit": url_pattern(request, "company_edit_page", "company_id"),
+            "delete": url_pattern(request, "company_delete", "company_id"),
+        },
     })
 
 
@@ -141,7 +142,7 @@ def create_page(
     return render_form(request, currencies=CURRENCIES, countries=COUNTRIES, country_codes=COUNTRY_CODES)
 
 @router.post("/create", name="company_create")
-async def create_company(
+def create_company(
     request: Request,
     background_tasks: BackgroundTasks,
     company_name: str = Form(...),
@@ -284,6 +285,8 @@ def update_company(
     company.currency = currency
     company.country = country
     db.commit()
+
+    principal_cache.invalidate_company(company.id)
     
     return flash_redirect(
         url=request.url_for("company_list"),
@@ -307,10 +310,15 @@ def delete_company(
     if not company:
         return redirect_with_message(request, "Company not found")
 
+    user_id = company.user_id
+
     db.delete(company.user)
     db.delete(company)
+    bump_catalogue_version(db)
     db.commit()
 
+    principal_cache.invalidate_user(user_id)
+
     return True
 
 # =================================================
@@ -319,6 +327,7 @@ def delete_company(
 @router.get("/my-profile", response_class=HTMLResponse, name="my_profile")
 def my_profile(
     request: Request,
+    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     if isinstance(current_user, RedirectResponse):
@@ -327,7 +336,7 @@ def my_profile(
     if not current_user.company:
         return redirect_with_message(request, "Company profile not found")
 
-    company = current_user.company
+    company = db.get(Company, current_user.company.id)
 
     return render_form(
         request,
@@ -359,9 +368,12 @@ def update_my_profile(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    company = current_user.company
     if isinstance(current_user, RedirectResponse):
         return current_user
+    if not current_user.company:
+        return redirect_with_message(request, "Company profile not found")
+
+    company = db.get(Company, current_user.company.id)
     # ✅ Validate using CompanyUpdate
     try:
         form = CompanyUpdate(
@@ -390,14 +402,15 @@ def update_my_profile(
         )
 
     if logo and logo.filename:
-        ext = logo.filename.split(".")[-1].lower()
-        filename = f"company_{company.id}_{uuid.uuid4().hex}.{ext}"
-        filepath = os.path.join(UPLOAD_DIR, filename)
-
-        with open(filepath, "wb") as f:
-            f.write(logo.file.read())
-
-        company.logo = f"uploads/companies/{filename}"
+        try:
+            company.logo = save_upload(logo, UPLOAD_DIR).key
+        except UploadRejected as e:
+            return flash_redirect(
+                url=request.url_for("my_profile"),
+                message=str(e),
+                category="error",
+            )
+        enqueue_variants(company.logo)
 
     # ✅ Update fields
     company.company_name = form.company_name
@@ -408,6 +421,8 @@ def update_my_profile(
 
     db.commit()
 
+    principal_cache.invalidate_company(company.id)
+
     return flash_redirect(
         url=request.url_for("my_profile"),
         message="Profile updated successfully"
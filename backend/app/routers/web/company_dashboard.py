@@ -1,24 +1,40 @@
 from fastapi import APIRouter, Depends, Request
 from fastapi.responses import JSONResponse, HTMLResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from app.database.session import get_db
+from app.database.projection import Projection
+from app.database.session import get_db, get_async_db
 from app.models.manual_booking import ManualBooking
 from app.models.user import User
 from app.models.tour_package import TourPackage
-from app.auth.dependencies import get_current_user
+from app.auth.dependencies import get_current_user, get_current_user_async
+from app.services.dashboard_service import booking_stats_for_year, kpi_totals
 from typing import Optional
 from datetime import datetime
-from sqlalchemy import extract, func
+from sqlalchemy import func
 from fastapi import Depends
 from sqlalchemy.orm import Session
-from fastapi.templating import Jinja2Templates
-
-# Templates directory
-templates = Jinja2Templates(directory="app/templates")
+from app.core.templates import templates
 
 router = APIRouter(prefix="/company/dashboard", tags=["Dashboard"])
 
+CustomerRow = Projection(
+    "CustomerRow",
+    guest_name=ManualBooking.guest_name,
+    country_code=ManualBooking.country_code,
+    phone=ManualBooking.phone,
+    email=ManualBooking.email,
+)
+ActivePackageRow = Projection(
+    "ActivePackageRow",
+    title=TourPackage.title,
+    country=TourPackage.country,
+    city=TourPackage.city,
+    price=TourPackage.price,
+    currency=TourPackage.currency,
+)
+
 # =================================================
 # MAIN DASHBOARD PAGE
 # =================================================
@@ -40,14 +56,15 @@ def dashboard_index(
 # CUSTOMER DATATABLE API
 # =================================================
 @router.get("/customers/datatable", name="dashboard_customers_datatable")
-def customers_datatable(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+async def customers_datatable(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
-    bookings = (
-        db.query(ManualBooking)
-        .filter(ManualBooking.is_deleted == False)
-        .all()
+    bookings = CustomerRow.rows(
+        await db.execute(
+            CustomerRow.select()
+            .where(ManualBooking.is_deleted == False)
+        )
     )
 
     data = [
@@ -61,20 +78,21 @@ def customers_datatable(
     return {"data": data}
 
 @router.get("/datatable/active-packages", name="dashboard_active_packages")
-def active_packages_datatable(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+async def active_packages_datatable(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
     company = current_user.company
 
-    packages = (
-        db.query(TourPackage)
-        .filter(
-            TourPackage.company_id == company.id,
-            TourPackage.status == "active",
-            TourPackage.is_deleted == False
+    packages = ActivePackageRow.rows(
+        await db.execute(
+            ActivePackageRow.select()
+            .where(
+                TourPackage.company_id == company.id,
+                TourPackage.status == "active",
+                TourPackage.is_deleted == False
+            )
         )
-        .all()
     )
 
     data = [
@@ -90,34 +108,31 @@ def active_packages_datatable(
 # KPI SUMMARY
 # =================================================
 @router.get("/summary", name="dashboard_summary")
-def dashboard_summary(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+async def dashboard_summary(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
     """
     Returns dashboard KPI summary (bookings, revenue, pending payments)
     """
-    total_bookings = db.query(ManualBooking).filter(ManualBooking.is_deleted == False).count()
-
-    pending_payments = db.query(ManualBooking).filter(
-        ManualBooking.is_deleted == False,
-        ManualBooking.payment_status != "paid"
-    ).count()
+    company = current_user.company if current_user else None
 
-    total_revenue = db.query(
-        func.coalesce(func.sum(ManualBooking.total_amount), 0)
-    ).filter(ManualBooking.is_deleted == False).scalar()
+    totals = await db.run_sync(kpi_totals, company.id) if company else {
+        "total_bookings": 0,
+        "pending_payments": 0,
+        "total_revenue": 0.0,
+    }
 
     return JSONResponse({
-        "total_bookings": total_bookings,
-        "pending_payments": pending_payments,
-        "total_revenue": float(total_revenue)
+        "total_bookings": totals["total_bookings"],
+        "pending_payments": totals["pending_payments"],
+        "total_revenue": totals["total_revenue"]
     })
 
 @router.get("/dashboard-stats", name="dashboard_stats")
-def dashboard_stats(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+async def dashboard_stats(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
     now = datetime.now()
     current_year = now.year
@@ -126,46 +141,21 @@ def dashboard_stats(
     company = current_user.company if current_user else None
     currency = company.currency if company else "USD"
 
-    # Monthly bookings array for chart
-    monthly_bookings = []
-    for month in range(1, 13):
-        count = (
-            db.query(func.count(ManualBooking.id))
-            .filter(
-                ManualBooking.is_deleted == False,
-                extract("year", ManualBooking.created_at) == current_year,
-                extract("month", ManualBooking.created_at) == month
-            )
-            .scalar()
+    # Monthly bookings and paid revenue for the whole year, from the rollups
+    if company:
+        monthly_bookings, monthly_paid_revenue = await db.run_sync(
+            booking_stats_for_year, company.id, current_year
         )
-        monthly_bookings.append(count)
+    else:
+        monthly_bookings, monthly_paid_revenue = [0] * 12, [0.0] * 12
 
     # Yearly and current month bookings
     yearly_bookings = sum(monthly_bookings)
     monthly_bookings_current = monthly_bookings[current_month - 1]
 
-    # Yearly revenue (paid only)
-    yearly_revenue = (
-        db.query(func.coalesce(func.sum(ManualBooking.total_amount), 0))
-        .filter(
-            ManualBooking.is_deleted == False,
-            ManualBooking.payment_status == "paid",
-            extract("year", ManualBooking.created_at) == current_year
-        )
-        .scalar()
-    )
-
-    # Monthly revenue (paid only)
-    monthly_revenue = (
-        db.query(func.coalesce(func.sum(ManualBooking.total_amount), 0))
-        .filter(
-            ManualBooking.is_deleted == False,
-            ManualBooking.payment_status == "paid",
-            extract("year", ManualBooking.created_at) == current_year,
-            extract("month", ManualBooking.created_at) == current_month
-        )
-        .scalar()
-    )
+    # Yearly / monthly revenue (paid only)
+    yearly_revenue = sum(monthly_paid_revenue)
+    monthly_revenue = monthly_paid_revenue[current_month - 1]
 
     return JSONResponse({
         "year": current_year,
@@ -1,18 +1,23 @@
-import os, uuid
 from fastapi import (
     APIRouter, Depends, Request, Form, UploadFile, File
 )
 from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydantic import ValidationError
 from app.core.constants import COUNTRY_CODES
-from app.database.session import get_db
+from app.database.projection import Projection
+from app.database.session import get_db, get_async_db
 from app.core.templates import templates
-from app.auth.dependencies import company_only
+from app.auth.dependencies import company_only, company_only_async
 from app.models.driver import Driver
 from app.schemas.driver import DriverCreate, DriverUpdate
+from app.utils.datatable import compact_rows, selected_fields, url_pattern
 from app.utils.flash import flash_redirect
 from app.models.user import User
+from app.services.capacity_service import refresh_driver_capacity
+from app.services.image_variants import enqueue_variants
+from app.services.storage import UploadRejected, save_upload
 
 
 # -------------------------------------------------
@@ -20,8 +25,19 @@ from app.models.user import User
 # -------------------------------------------------
 router = APIRouter(prefix="/drivers", tags=["Drivers"])
 
-UPLOAD_DIR = "app/static/uploads/drivers"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+UPLOAD_DIR = "uploads/drivers"
+
+# what the datatable shows, no entities needed
+DriverListRow = Projection(
+    "DriverListRow",
+    id=Driver.id,
+    name=Driver.name,
+    vehicle_type=Driver.vehicle_type,
+    vehicle_number=Driver.vehicle_number,
+    seats=Driver.seats,
+    country_code=Driver.country_code,
+    phone_number=Driver.phone_number,
+)
 
 # -------------------------------------------------
 # Helper: render form
@@ -64,38 +80,26 @@ def driver_list(
 # DATATABLE API
 # =================================================
 @router.get("/datatable", name="driver_datatable")
-def driver_datatable(
+async def driver_datatable(
     request: Request,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(company_only)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(company_only_async)
 ):
-    drivers = db.query(Driver).filter(Driver.is_deleted == False, Driver.company_id == current_user.company.id).all()
-
-    data = []
-    edit_icon = "/static/assets/icon/edit.svg"
-    trash_icon = "/static/assets/icon/trash.svg"
-    for d in drivers:
-        data.append({
-            "id": d.id,
-            "name": d.name,
-            "vehicle": f"{d.vehicle_type} ({d.vehicle_number})",
-            "seats": d.seats,
-            "phone": f"{d.country_code}{d.phone_number}",
-            "actions": f"""
-                <a href="{request.url_for('driver_edit_page', driver_id=d.id)}"
-                   class="btn btn-sm btn-edit">
-                   <img src="{edit_icon}" alt="Edit" class="table-icon">
-                </a>
-
-                <a href="javascript:void(0)"
-                   class="confirm-driver-delete btn btn-sm btn-delete"
-                   data-route="{request.url_for('driver_delete', driver_id=d.id)}">
-                   <img src="{trash_icon}" alt="Delete" class="table-icon">
-                </a>
-            """
-        })
-
-    return JSONResponse({"data": data})
+    fields = selected_fields(request, DriverListRow.row._fields)
+    drivers = DriverListRow.rows(
+        await db.execute(
+            DriverListRow.select().where(Driver.is_deleted == False, Driver.company_id == current_user.company.id)
+        )
+    )
+
+    # raw columns, the list page builds the cells and action links
+    return JSONResponse({
+        **compact_rows(drivers, fields),
+        "urls": {
+            "edit": url_pattern(request, "driver_edit_page", "driver_id"),
+            "delete": url_pattern(request, "driver_delete", "driver_id"),
+        },
+    })
 
 # =================================================
 # CREATE
@@ -108,7 +112,7 @@ def create_page(
     return render_form(request, country_codes=COUNTRY_CODES)
 
 @router.post("/create", name="driver_create")
-async def driver_create(
+def driver_create(
     request: Request,
     name: str = Form(...),
     country_code: str = Form(...),
@@ -135,14 +139,15 @@ async def driver_create(
 
     # ✅ IMAGE UPLOAD
     if image and image.filename:
-        ext = image.filename.split(".")[-1]
-        filename = f"driver_{uuid.uuid4().hex}.{ext}"
-        path =  os.path.join(UPLOAD_DIR, filename)
-
-        with open(path, "wb") as f:
-            f.write(image.file.read())
-
-        driver.image = f"uploads/drivers/{filename}"
+        try:
+            driver.image = save_upload(image, UPLOAD_DIR).key
+        except UploadRejected as e:
+            return flash_redirect(
+                url=request.url_for("driver_create_page"),
+                message=str(e),
+                category="error",
+            )
+        enqueue_variants(driver.image)
 
     db.add(driver)
     db.commit()
@@ -201,13 +206,17 @@ def update_driver(
     driver.phone_number = phone_number
 
     if image and image.filename:
-        ext = image.filename.split(".")[-1]
-        filename = f"driver_{uuid.uuid4().hex}.{ext}"
-        path = os.path.join(UPLOAD_DIR, filename)
-        with open(path, "wb") as f:
-            f.write(image.file.read())
-        driver.image = f"uploads/drivers/{filename}"
-
+        try:
+            driver.image = save_upload(image, UPLOAD_DIR).key
+        except UploadRejected as e:
+            return flash_redirect(
+                url=request.url_for("driver_edit_page", driver_id=driver.id),
+                message=str(e),
+                category="error",
+            )
+        enqueue_variants(driver.image)
+
+    refresh_driver_capacity(db, driver.id)
     db.commit()
 
     return flash_redirect(
@@ -227,5 +236,6 @@ def delete_driver(
     driver = db.query(Driver).get(driver_id)
     if driver:
         driver.is_deleted = True
+        refresh_driver_capacity(db, driver.id)
         db.commit()
     return True
@@ -1,21 +1,41 @@
 from urllib import request
-from fastapi import APIRouter, Depends, Request, Form
-from sqlalchemy.orm import Session
-from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
-from app.database.session import get_db
+from fastapi import APIRouter, Depends, Request, Form, UploadFile, File
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, StreamingResponse
+from app.database.projection import Projection
+from app.database.session import get_db, get_async_db
 from app.models.manual_booking import ManualBooking
 from app.models.tour_package import TourPackage,TourPackageDriver
 from app.models.driver import Driver
 from app.schemas.manual_booking import ManualBookingCreate
 from app.core.templates import templates
-from app.auth.dependencies import admin_only, company_only
+from app.auth.dependencies import admin_only, company_only, company_only_async
 from app.utils.flash import flash_redirect
+from app.utils.query_debug import query_budget
+from app.utils.datatable import (
+    parse_datatable_params, count_statement, apply_keyset, encode_cursor, decode_cursor,
+    compact_rows, selected_fields, url_pattern
+)
 from typing import Optional, List
-from sqlalchemy import func,and_,or_
-from datetime import date
+from sqlalchemy import func,and_,or_,select
+from datetime import date, timedelta
 from twilio.rest import Client
 from app.core.constants import COUNTRY_CODES
-from app.services.whatsapp_service import send_whatsapp_booking_confirmation, format_phone
+from app.services.capacity_service import (
+    record_booking, release_booking, package_capacity, capacity_window, MAX_WINDOW_DAYS
+)
+from app.services.driver_matching import AutoAssignError, auto_assign_drivers
+from app.services.driver_assignment_service import (
+    reserve_driver, release_driver, booked_drivers_on
+)
+from app.services.kpi_service import record_booking_kpis, release_booking_kpis
+from app.services.booking_export import (
+    FORMATS as EXPORT_FORMATS, BookingExportError, export_query, parse_statuses, stream_bookings
+)
+from app.services.booking_import import COLUMNS as IMPORT_COLUMNS, BookingImportError, import_bookings
+from app.services.whatsapp_service import enqueue_booking_confirmation
+from app.services.whatsapp_worker import outbox_worker
 
 router = APIRouter(prefix="/manual-bookings", tags=["Manual Booking"])
 
@@ -95,7 +115,7 @@ def create_manual_booking(
     pickup_location: str = Form(None),
     tour_package_id: int = Form(...),
     driver_id: int = Form(None),
-    travel_date: str = Form(...),
+    travel_date: date = Form(...),
     travel_time: str = Form(None),
     total_amount: float = Form(...),
     advance_amount: float = Form(0),
@@ -103,25 +123,6 @@ def create_manual_booking(
     current_user=Depends(admin_only),
 ):
 
-    # ✅ DRIVER CONFLICT CHECK
-    if driver_id:
-        conflict = (
-            db.query(ManualBooking)
-            .filter(
-                ManualBooking.driver_id == driver_id,
-                ManualBooking.travel_date == travel_date,
-                ManualBooking.is_deleted == False
-            )
-            .first()
-        )
-
-        if conflict:
-            return flash_redirect(
-                url=request.url_for("manual_booking_create"),
-                message="Selected driver is already booked for this date.",
-                category="error",
-            )
-
     remaining_amount = total_amount - advance_amount
 
     payment_status = (
@@ -149,15 +150,23 @@ def create_manual_booking(
     )
 
     db.add(booking)
-    db.commit()
-    db.refresh(booking)
+    db.flush()
+
+    # ✅ DRIVER RESERVATION (unique driver/day)
+    if driver_id and not reserve_driver(db, driver_id, travel_date, booking.id):
+        db.rollback()
+        return flash_redirect(
+            url=request.url_for("manual_booking_create"),
+            message="Selected driver is already booked for this date.",
+            category="error",
+        )
 
-    try:
-        phone_number = format_phone(country_code, phone)
-        send_whatsapp_booking_confirmation(phone_number, booking)
+    record_booking(db, booking)
+    record_booking_kpis(db, booking)
+    enqueue_booking_confirmation(db, booking)
+    db.commit()
 
-    except Exception as e:
-       print("WhatsApp send failed for booking %s", booking.id)
+    outbox_worker.wake()
 
     return flash_redirect(
         url=request.url_for("manual_booking_list"),
@@ -165,73 +174,190 @@ def create_manual_booking(
     )
 
 # =================================================
-# DATATABLE API
+# BULK IMPORT (CSV / XLSX)
 # =================================================
-@router.get("/datatable", name="manual_booking_datatable")
-def manual_booking_datatable(
+@router.get("/import", response_class=HTMLResponse, name="manual_booking_import_page")
+def manual_booking_import_page(
     request: Request,
+    _=Depends(company_only),
+):
+    return templates.TemplateResponse(
+        "manual_booking/import.html",
+        {"request": request, "columns": IMPORT_COLUMNS}
+    )
+
+
+@router.post("/import", name="manual_booking_import")
+def import_manual_bookings(
+    file: UploadFile = File(...),
+    dry_run: bool = Form(False),
     db: Session = Depends(get_db),
     current_user=Depends(company_only),
 ):
-    bookings = (
-        db.query(ManualBooking)
-        .filter(
+    if isinstance(current_user, RedirectResponse):
+        return current_user
+
+    try:
+        report = import_bookings(db, current_user.company.id, file.filename, file.file, dry_run=dry_run)
+    except BookingImportError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+    return JSONResponse(report)
+
+# =================================================
+# EXPORT (CSV / NDJSON, streamed)
+# =================================================
+@router.get("/export", name="manual_booking_export")
+def export_manual_bookings(
+    format: str = "csv",
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    status: Optional[str] = None,
+    current_user=Depends(company_only),
+):
+    if isinstance(current_user, RedirectResponse):
+        return current_user
+
+    if format not in EXPORT_FORMATS:
+        return JSONResponse({"error": f"Unknown format {format}, expected csv or ndjson"}, status_code=400)
+    try:
+        statuses = parse_statuses(status)
+    except BookingExportError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+    query = export_query(current_user.company.id, date_from, date_to, statuses)
+    filename = f"bookings-{date.today():%Y%m%d}.{format}"
+
+    return StreamingResponse(
+        stream_bookings(query, format),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+# =================================================
+# AUTO-ASSIGN DRIVERS
+# =================================================
+@router.post("/auto-assign", name="manual_booking_auto_assign")
+def auto_assign(
+    start_date: date = Form(...),
+    end_date: Optional[date] = Form(None),
+    dry_run: bool = Form(False),
+    db: Session = Depends(get_db),
+    current_user=Depends(company_only),
+):
+    if isinstance(current_user, RedirectResponse):
+        return current_user
+
+    try:
+        result = auto_assign_drivers(db, current_user.company.id, start_date, end_date, dry_run=dry_run)
+    except AutoAssignError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+    return JSONResponse(result)
+
+# =================================================
+# DATATABLE API
+# =================================================
+ManualBookingListRow = Projection(
+    "ManualBookingListRow",
+    id=ManualBooking.id,
+    guest_name=ManualBooking.guest_name,
+    country_code=ManualBooking.country_code,
+    phone=ManualBooking.phone,
+    email=ManualBooking.email,
+    adults=ManualBooking.adults,
+    kids=ManualBooking.kids,
+    package_title=TourPackage.title,
+    travel_date=ManualBooking.travel_date,
+    travel_time=ManualBooking.travel_time,
+    pickup_location=ManualBooking.pickup_location,
+    currency=TourPackage.currency,
+    total_amount=ManualBooking.total_amount,
+    advance_amount=ManualBooking.advance_amount,
+    remaining_amount=ManualBooking.remaining_amount,
+)
+
+# user (cold principal cache), total count, filtered count (searches), page
+@router.get("/datatable", name="manual_booking_datatable")
+@query_budget(statements=4)
+async def manual_booking_datatable(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(company_only_async),
+):
+    params = parse_datatable_params(
+        request,
+        orderable_columns={0: "id", 2: "travel_date"},
+        default_order="id",
+    )
+
+    fields = selected_fields(request, ManualBookingListRow.row._fields)
+
+    base_query = (
+        ManualBookingListRow.select()
+        .select_from(ManualBooking)
+        .join(ManualBooking.tour_package)
+        .where(
             ManualBooking.is_deleted == False,
-            ManualBooking.tour_package.has(
-                TourPackage.company_id == current_user.id
+            TourPackage.company_id == current_user.company.id
+        )
+    )
+    records_total = await db.scalar(count_statement(base_query))
+
+    query = base_query
+    records_filtered = records_total
+    if params["search"]:
+        term = f"%{params['search']}%"
+        query = query.where(
+            or_(
+                ManualBooking.guest_name.ilike(term),
+                ManualBooking.phone.ilike(term),
+                ManualBooking.email.ilike(term),
+                ManualBooking.pickup_location.ilike(term),
+                TourPackage.title.ilike(term),
             )
         )
-        .order_by(ManualBooking.id.desc())
-        .all()
+        records_filtered = await db.scalar(count_statement(query))
+
+    # 🔑 Keyset columns per sortable column
+    if params["order"] == "travel_date":
+        key_columns = [ManualBooking.travel_date, ManualBooking.id]
+        key_types = (date, int)
+    else:
+        key_columns = [ManualBooking.id]
+        key_types = (int,)
+
+    cursor = decode_cursor(params["cursor"], key_types) if params["cursor"] else None
+
+    page = apply_keyset(
+        query,
+        key_columns,
+        params["direction"],
+        cursor,
+        params["start"],
+        params["length"],
     )
-    
-    company = current_user.company
+    bookings = ManualBookingListRow.rows(await db.execute(page))
 
-    edit_icon = "/static/assets/icon/edit.svg"
-    trash_icon = "/static/assets/icon/trash.svg"
-
-    data = []
-    for booking in bookings:
-        data.append({
-            "id": booking.id,
-           "guest_details": f"""
-                <strong>{booking.guest_name}</strong><br>
-                📞 {booking.country_code}{booking.phone}<br>
-                ✉️ {booking.email or "-"}<br>
-                👨‍👩‍👧‍👦 {booking.adults} - {booking.kids}
-            """,
-
-            "travel_details": f"""
-                <strong>{booking.tour_package.title}</strong><br>
-                📅 {booking.travel_date.strftime("%d-%m-%Y")}<br>
-                ⏰ {booking.travel_time or "-"}<br>
-                📍 {booking.pickup_location or "-"}
-            """,
-
-            "payment_details": f"""
-                <strong>{booking.tour_package.currency} {booking.total_amount}</strong><br>
-                Advance: {booking.tour_package.currency} {booking.advance_amount}<br>
-                Remaining: {booking.tour_package.currency} {booking.remaining_amount}<br>
-            """,
-            
-            "status": "Paid" if booking.remaining_amount == 0 else "Pending",
-            "actions": f"""
-                <a href="{request.url_for('manual_booking_edit', booking_id=booking.id)}"
-                   class="btn btn-sm btn-edit"
-                   title="Edit Booking">
-                    <img src="{edit_icon}" class="table-icon">
-                </a>
-
-                <a href="javascript:void(0)"
-                   class="confirm-manual-booking-delete btn btn-sm btn-delete"
-                   data-route="{request.url_for('manual_booking_delete', booking_id=booking.id)}"
-                   title="Delete Booking">
-                    <img src="{trash_icon}" class="table-icon">
-                </a>
-            """
-        })
+    next_cursor = None
+    if len(bookings) == params["length"]:
+        last = bookings[-1]
+        next_cursor = encode_cursor(
+            [getattr(last, column.key) for column in key_columns]
+        )
 
-    return JSONResponse({"data": data})
+    return JSONResponse({
+        "draw": params["draw"],
+        "recordsTotal": records_total,
+        "recordsFiltered": records_filtered,
+        # raw columns, the list page builds the cells and action links
+        **compact_rows(bookings, fields),
+        "urls": {
+            "edit": url_pattern(request, "manual_booking_edit", "booking_id"),
+            "delete": url_pattern(request, "manual_booking_delete", "booking_id"),
+        },
+        "next_cursor": next_cursor,
+    })
 
 @router.get("/", response_class=HTMLResponse, name="manual_booking_list")
 def manual_booking_list(
@@ -263,17 +389,9 @@ def edit_manual_booking(
     )
 
     # 🔹 Drivers already booked on same date (except current booking)
-    booked_driver_ids = (
-        db.query(ManualBooking.driver_id)
-        .filter(
-            ManualBooking.travel_date == booking.travel_date,
-            ManualBooking.driver_id.isnot(None),
-            ManualBooking.id != booking.id,
-            ManualBooking.is_deleted == False
-        )
-        .all()
+    booked_driver_ids = booked_drivers_on(
+        db, booking.travel_date, exclude_booking_id=booking.id
     )
-    booked_driver_ids = [d[0] for d in booked_driver_ids]
 
     # 🔹 Drivers assigned to selected package
     drivers = (
@@ -313,7 +431,7 @@ def update_manual_booking(
     phone: str = Form(...),
     email: str = Form(None),
     pickup_location: str = Form(None),
-    travel_date: str = Form(...),
+    travel_date: date = Form(...),
     travel_time: str = Form(None),
     total_amount: float = Form(...),
     advance_amount: float = Form(...),
@@ -323,30 +441,24 @@ def update_manual_booking(
 
     booking = db.query(ManualBooking).get(booking_id)
 
-    # ✅ DRIVER CONFLICT CHECK
-    if driver_id:
-        conflict = (
-            db.query(ManualBooking)
-            .filter(
-                ManualBooking.id != booking_id,
-                ManualBooking.driver_id == driver_id,
-                ManualBooking.travel_date == travel_date,
-                ManualBooking.is_deleted == False
-            )
-            .first()
+    # ✅ DRIVER RESERVATION (unique driver/day)
+    release_driver(db, booking.id)
+
+    if driver_id and not reserve_driver(db, driver_id, travel_date, booking.id):
+        db.rollback()
+        return flash_redirect(
+            url=request.url_for(
+                "manual_booking_edit",
+                booking_id=booking_id
+            ),
+            message="Selected driver is already booked for this date.",
+            category="error",
         )
 
-        if conflict:
-            return flash_redirect(
-                url=request.url_for(
-                    "manual_booking_edit",
-                    booking_id=booking_id
-                ),
-                message="Selected driver is already booked for this date.",
-                category="error",
-            )
-
     # ✅ UPDATE BOOKING
+    release_booking(db, booking)
+    release_booking_kpis(db, booking)
+
     booking.guest_name = guest_name
     booking.country_code = country_code
     booking.phone = phone
@@ -368,6 +480,8 @@ def update_manual_booking(
         else "pending"
     )
 
+    record_booking(db, booking)
+    record_booking_kpis(db, booking)
     db.commit()
 
     return flash_redirect(
@@ -383,8 +497,12 @@ def delete_manual_booking(
     current_user=Depends(admin_only),
 ):
     booking = db.query(ManualBooking).get(booking_id)
-    db.delete(booking)
-    db.commit()
+    if booking:
+        release_booking(db, booking)
+        release_booking_kpis(db, booking)
+        release_driver(db, booking.id)
+        db.delete(booking)
+        db.commit()
 
     return {"success": True}
 
@@ -392,6 +510,7 @@ def delete_manual_booking(
     "/tour-packages/{package_id}/availability",
     name="tour_package_availability_page"
 )
+@query_budget(statements=3)
 def tour_package_availability_page(
     request: Request,
     package_id: int,
@@ -409,6 +528,7 @@ def tour_package_availability_page(
     # 🔹 Fetch drivers with details
     drivers = (
         db.query(TourPackageDriver)
+        .options(joinedload(TourPackageDriver.driver))
         .filter(
             TourPackageDriver.tour_package_id == package.id
         )
@@ -437,26 +557,70 @@ def tour_package_availability_page(
     )
 
 @router.get("/booked-dates/{package_id}", name="get_booked_dates")
-def get_booked_dates(
+async def get_booked_dates(
     package_id: int,
-    db: Session = Depends(get_db)
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    party_size: int = 1,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    # 1️⃣ Total drivers assigned to package
-    total_drivers = (
-        db.query(TourPackageDriver)
-        .filter(TourPackageDriver.tour_package_id == package_id)
-        .count()
-    )
+    # 1️⃣ Window to answer (defaults to the current month)
+    if not start:
+        start = date.today().replace(day=1)
+    if not end or end <= start:
+        end = (start + timedelta(days=32)).replace(day=1)
+    end = min(end, start + timedelta(days=MAX_WINDOW_DAYS))
+
+    capacity = await db.run_sync(package_capacity, [package_id])
+    drivers_total, seats_total = capacity[package_id]
+
+    # 2️⃣ Capacity ledger rows inside the window
+    ledger = await db.run_sync(capacity_window, package_id, start, end)
+
+    booked_dates = []
+    availability = {}
+    seats_remaining = {}
+
+    # 3️⃣ Remaining drivers/seats per booked date
+    day = start
+    while day < end:
+        row = ledger.get(day)
+        date_str = day.strftime("%Y-%m-%d")
+
+        if row:
+            remaining_drivers = max(row.drivers_available - row.bookings_count, 0)
+            remaining_seats = max(row.seats_available - row.seats_booked, 0)
+
+            availability[date_str] = remaining_drivers
+            seats_remaining[date_str] = remaining_seats
+        else:
+            remaining_drivers = drivers_total
+            remaining_seats = seats_total
+
+        # disable date only if full
+        if remaining_drivers == 0 or remaining_seats < party_size:
+            booked_dates.append(date_str)
+
+        day += timedelta(days=1)
 
-    # 2️⃣ All bookings (for display)
+    # 4️⃣ Bookings inside the window (for display)
     bookings = (
-        db.query(ManualBooking)
-        .filter(
-            ManualBooking.tour_package_id == package_id,
-            ManualBooking.is_deleted == False
+        await db.execute(
+            select(
+                ManualBooking.id,
+                ManualBooking.guest_name,
+                ManualBooking.pickup_location,
+                ManualBooking.travel_date,
+                ManualBooking.travel_time,
+            )
+            .where(
+                ManualBooking.tour_package_id == package_id,
+                ManualBooking.travel_date >= start,
+                ManualBooking.travel_date < end,
+                ManualBooking.is_deleted == False
+            )
         )
-        .all()
-    )
+    ).all()
 
     bookings_data = []
     for b in bookings:
@@ -465,76 +629,54 @@ def get_booked_dates(
             "guest_name": b.guest_name,
             "pickup_location": b.pickup_location or "",
             "travel_date": b.travel_date.strftime("%Y-%m-%d"),
-            "travel_time": b.travel_time or "",
+            "travel_time": str(b.travel_time or ""),
         })
 
-    # 3️⃣ Count bookings per date
-    booking_counts = (
-        db.query(
-            ManualBooking.travel_date,
-            func.count(ManualBooking.id).label("count")
-        )
-        .filter(
-            ManualBooking.tour_package_id == package_id,
-            ManualBooking.is_deleted == False
-        )
-        .group_by(ManualBooking.travel_date)
-        .all()
-    )
-
-    booked_dates = []
-    availability = {}
-
-    # 4️⃣ Calculate remaining drivers per date
-    for travel_date, count in booking_counts:
-        date_str = travel_date.strftime("%Y-%m-%d")
-        remaining = max(total_drivers - count, 0)
-
-        availability[date_str] = remaining
-
-        # disable date only if full
-        if remaining == 0:
-            booked_dates.append(date_str)
-
     return {
-        "booked_dates": booked_dates,   # used by calendar
-        "bookings": bookings_data,      # used by popup/list
-        "availability": availability,   # ✅ NEW
-        "total_drivers": total_drivers  # optional but useful
+        "booked_dates": booked_dates,       # used by calendar
+        "bookings": bookings_data,          # used by popup/list
+        "availability": availability,       # remaining drivers per booked date
+        "seats_remaining": seats_remaining, # remaining seats per booked date
+        "total_drivers": drivers_total,
+        "total_seats": seats_total,
     }
 
+# the driver pickers' rows
+DriverOptionRow = Projection(
+    "DriverOptionRow",
+    id=Driver.id,
+    name=Driver.name,
+    country_code=Driver.country_code,
+    phone_number=Driver.phone_number,
+    vehicle_type=Driver.vehicle_type,
+    vehicle_number=Driver.vehicle_number,
+    seats=Driver.seats,
+)
+
 @router.get("/available-drivers/{package_id}/{travel_date}")
-def get_available_drivers(
+async def get_available_drivers(
     package_id: int,
     travel_date: date,
-    db: Session = Depends(get_db),
-    current_user=Depends(company_only),
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(company_only_async),
 ):
     company_id = current_user.company.id
 
     # Step 1: Get drivers already booked on this date
-    booked_driver_ids = (
-        db.query(ManualBooking.driver_id)
-        .filter(
-            ManualBooking.travel_date == travel_date,
-            ManualBooking.driver_id.isnot(None),
-            ManualBooking.is_deleted == False
-        )
-        .all()
-    )
-    booked_driver_ids = [d[0] for d in booked_driver_ids]
+    booked_driver_ids = booked_drivers_on(db, travel_date)
 
     # Step 2: Get drivers assigned to this package and company
-    drivers = (
-        db.query(Driver)
-        .join(TourPackageDriver, TourPackageDriver.driver_id == Driver.id)
-        .filter(
-            TourPackageDriver.tour_package_id == package_id,
-            Driver.company_id == company_id,
-            Driver.is_deleted == False,
-            ~Driver.id.in_(booked_driver_ids)
+    drivers = DriverOptionRow.rows(
+        await db.execute(
+            DriverOptionRow.select()
+            .join(TourPackageDriver, TourPackageDriver.driver_id == Driver.id)
+            .where(
+                TourPackageDriver.tour_package_id == package_id,
+                Driver.company_id == company_id,
+                Driver.is_deleted == False,
+                ~Driver.id.in_(booked_driver_ids)
+            )
         )
-        .all()
     )
 
     # Step 3: Return only the available drivers
@@ -552,42 +694,34 @@ def get_available_drivers(
     ]
 
 @router.get("/all-drivers/{package_id}/{travel_date}")
-def get_all_package_drivers(
+async def get_all_package_drivers(
     package_id: int,
     travel_date: date,
-    db: Session = Depends(get_db),
-    current_user=Depends(company_only),
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(company_only_async),
 ):
     company_id = current_user.company.id
 
     # 1️⃣ Drivers already booked on this date (ANY package)
-    booked_driver_ids = (
-        db.query(ManualBooking.driver_id)
-        .filter(
-            ManualBooking.travel_date == travel_date,
-            ManualBooking.driver_id.isnot(None),
-            ManualBooking.is_deleted == False
-        )
-        .all()
-    )
-    booked_driver_ids = [d[0] for d in booked_driver_ids]
+    booked_driver_ids = booked_drivers_on(db, travel_date)
 
     # 2️⃣ All drivers of company
     #    - assigned to any package OR no package
     #    - NOT booked on that date
-    drivers = (
-        db.query(Driver)
-        .outerjoin(
-            TourPackageDriver,
-            TourPackageDriver.driver_id == Driver.id
-        )
-        .filter(
-            Driver.company_id == company_id,
-            Driver.is_deleted == False,
-            ~Driver.id.in_(booked_driver_ids)
+    drivers = DriverOptionRow.rows(
+        await db.execute(
+            DriverOptionRow.select()
+            .outerjoin(
+                TourPackageDriver,
+                TourPackageDriver.driver_id == Driver.id
+            )
+            .where(
+                Driver.company_id == company_id,
+                Driver.is_deleted == False,
+                ~Driver.id.in_(booked_driver_ids)
+            )
+            .distinct()
         )
-        .distinct()
-        .all()
     )
 
     return [
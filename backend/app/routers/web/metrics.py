@@ -0,0 +1,26 @@
+import hmac
+
+from fastapi import APIRouter, Request
+from fastapi.responses import PlainTextResponse, Response
+
+from app.core.config import settings
+from app.utils.metrics import CONTENT_TYPE, render
+
+router = APIRouter(tags=["Metrics"])
+
+
+# =================================================
+# PROMETHEUS SCRAPE
+# =================================================
+@router.get("/metrics", include_in_schema=False, name="metrics")
+async def metrics(request: Request):
+    """
+    This process's metrics in the Prometheus text format. Needs
+    `Authorization: Bearer <METRICS_TOKEN>` when METRICS_TOKEN is set.
+    """
+    if settings.METRICS_TOKEN:
+        expected = f"Bearer {settings.METRICS_TOKEN}"
+        if not hmac.compare_digest(request.headers.get("authorization", "").encode(), expected.encode()):
+            return PlainTextResponse("Forbidden", status_code=403)
+
+    return Response(render(), media_type=CONTENT_TYPE)
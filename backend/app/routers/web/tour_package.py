@@ -1,13 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, Form, UploadFile, File
-from fastapi.responses import HTMLResponse, RedirectResponse
-from sqlalchemy.orm import Session
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from pydantic import ValidationError
 from typing import List, Optional
-from uuid import uuid4
-import os
 from datetime import date
-from sqlalchemy import or_
-from app.database.session import get_db
+from sqlalchemy import or_, select
+from app.database.session import get_db, get_async_db
 from app.core.templates import templates
 from app.auth.dependencies import company_only, get_current_user
 from app.utils.pagination import paginate
@@ -17,12 +16,19 @@ from sqlalchemy import or_
 from app.models.driver import Driver
 from app.core.constants import COUNTRIES, CURRENCIES
 from app.utils.flash import flash_redirect
+from app.utils.query_debug import query_budget
 from app.models.manual_booking import ManualBooking
+from app.services.capacity_service import (
+    available_dates, available_filter, refresh_package_capacity, search_window
+)
+from app.services.tour_search import search_public_tours
+from app.services.image_variants import delete_variants, enqueue_variants
+from app.services.storage import UploadRejected, save_upload, storage
+from app.utils.page_cache import bump_catalogue_version, cached_page
 
 router = APIRouter(prefix="/tour-packages", tags=["Tour Packages"])
 
-UPLOAD_DIR = "app/static/uploads/tours"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+UPLOAD_DIR = "uploads/tours"
 
 def render_form(request: Request, *, package=None, form=None, errors=None, status_code=200):
     return templates.TemplateResponse(
@@ -39,10 +45,13 @@ def render_form(request: Request, *, package=None, form=None, errors=None, statu
 
 
 @router.get("/", response_class=HTMLResponse, name="my_tour_list")
+@query_budget(statements=4)
 def my_tour_list(
     request: Request,
     search: str = "",
     travel_date: date | None = None,
+    date_to: date | None = None,
+    guests: int = 1,
     page: int = 1,
     db: Session = Depends(get_db),
     current_user=Depends(company_only),
@@ -51,7 +60,9 @@ def my_tour_list(
         return current_user
     company = current_user.company
 
-    query = db.query(TourPackage).filter(
+    query = db.query(TourPackage).options(
+        selectinload(TourPackage.gallery_images)
+    ).filter(
         TourPackage.company_id == company.id,
         TourPackage.is_deleted == False
     )
@@ -66,18 +77,10 @@ def my_tour_list(
             )
         )
 
-    # 📅 AVAILABILITY FILTER (IMPORTANT)
+    # 📅 AVAILABILITY FILTER: room for the guests on some day of the window
     if travel_date:
-        booked_subquery = (
-            db.query(ManualBooking.tour_package_id)
-            .filter(
-                ManualBooking.travel_date == travel_date
-                )
-            .subquery()
-        )
-
         query = query.filter(
-            TourPackage.id.notin_(booked_subquery)
+            available_filter(*search_window(travel_date, date_to), max(guests, 1))
         )
 
     pagination = paginate(
@@ -100,6 +103,8 @@ def my_tour_list(
             "pagination": pagination,
             "search": search,
             "travel_date": travel_date,
+            "date_to": date_to,
+            "guests": guests,
         }
     )
     
@@ -167,7 +172,20 @@ def create_package(
     except ValidationError as e:
         errors = {err["loc"][0]: err["msg"] for err in e.errors()}
         return render_form(request, form=form_data, errors=errors, countries=COUNTRIES, status_code=400)
-    # Save cover image
+    # Store the uploads first, a rejected file leaves nothing to roll back
+    try:
+        cover_path = save_image(cover_image)
+        gallery_paths = [
+            save_image(img) for img in gallery_images or []
+            if img.content_type.startswith("image/")
+        ]
+    except UploadRejected as e:
+        return flash_redirect(
+            url=request.url_for("tour_package_create_page"),
+            message=str(e),
+            category="error",
+        )
+
     package = TourPackage(
     company_id=current_user.company.id,
     **validated.dict()
@@ -175,7 +193,6 @@ def create_package(
     db.add(package)
     db.flush()
     
-    cover_path = save_image(cover_image)
     db.add(
         TourPackageGalleryImage(
             tour_package_id=package.id,
@@ -184,19 +201,16 @@ def create_package(
         )
     )
     
-    if gallery_images:
-        for img in gallery_images:
-            if not img.content_type.startswith("image/"):
-                continue
-
-            db.add(
-                TourPackageGalleryImage(
-                    tour_package_id=package.id,
-                    image_path=save_image(img),
-                    image_type="gallery"
-                )
+    for path in gallery_paths:
+        db.add(
+            TourPackageGalleryImage(
+                tour_package_id=package.id,
+                image_path=path,
+                image_type="gallery"
             )
+        )
 
+    bump_catalogue_version(db)
     db.commit()
 
     for driver_id in driver_ids:
@@ -288,6 +302,24 @@ def update_package(
             status_code=303
         )
 
+    # Store the uploads first, a rejected file leaves nothing to roll back
+    try:
+        cover_path = (
+            save_image(cover_image)
+            if cover_image and cover_image.content_type.startswith("image/")
+            else None
+        )
+        gallery_paths = [
+            save_image(img) for img in gallery_images or []
+            if img and img.content_type.startswith("image/")
+        ]
+    except UploadRejected as e:
+        return flash_redirect(
+            url=request.url_for("tour_package_edit_page", package_id=package.id),
+            message=str(e),
+            category="error",
+        )
+
     update_data = TourPackageUpdate(
         title=title,
         description=description,
@@ -303,7 +335,7 @@ def update_package(
     for field, value in update_data.dict().items():
         setattr(package, field, value)
 
-    if cover_image and cover_image.content_type.startswith("image/"):
+    if cover_path:
 
         # Find existing cover
         old_cover = db.query(TourPackageGalleryImage).filter(
@@ -322,21 +354,20 @@ def update_package(
         # Save new cover
         new_cover = TourPackageGalleryImage(
             tour_package_id=package.id,
-            image_path=save_image(cover_image),
+            image_path=cover_path,
             image_type="cover"
         )
         db.add(new_cover)
 
-    if gallery_images:
-        for img in gallery_images:
-            if img and img.content_type.startswith("image/"):
-                db.add(
-                    TourPackageGalleryImage(
-                        tour_package_id=package.id,
-                        image_path=save_image(img),
-                        image_type="gallery"
-                    )
-                )
+    for path in gallery_paths:
+        db.add(
+            TourPackageGalleryImage(
+                tour_package_id=package.id,
+                image_path=path,
+                image_type="gallery"
+            )
+        )
+    bump_catalogue_version(db)
     db.commit()
 
     # Update drivers
@@ -352,6 +383,7 @@ def update_package(
             )
         )
 
+    refresh_package_capacity(db, [package.id])
     db.commit()
 
     return flash_redirect(
@@ -373,6 +405,7 @@ def delete_package(
 
     if package:
         package.is_deleted = True
+        bump_catalogue_version(db)
         db.commit()
 
     return flash_redirect(
@@ -380,59 +413,105 @@ def delete_package(
         message="Tour Package deleted successfully"
     )
 
-def save_image(file: UploadFile) -> str:
-    filename = f"{uuid4().hex}_{file.filename.replace(' ', '_')}"
-    path = f"{UPLOAD_DIR}/{filename}"
+def parse_date(value: str | None) -> date | None:
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
 
-    with open(path, "wb") as f:
-        f.write(file.file.read())
+def save_image(file: UploadFile) -> str:
+    image_path = save_upload(file, UPLOAD_DIR).key
+    enqueue_variants(image_path, refresh_catalogue=True)
+    return image_path
 
-    return path.replace("app/static/", "")
+def availability_params(travel_date: str | None, date_to: str | None, guests: int):
+    """(start, end, party size) for search_public_tours, None without a date."""
+    start = parse_date(travel_date)
+    if not start:
+        return None
+    return (*search_window(start, parse_date(date_to)), max(guests, 1))
 
 @router.get("/tours", name="public_tour_list")
-def public_tour_list(
+@query_budget(statements=5)
+async def public_tour_list(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     search: str = "",
-    travel_date: str | None = None
+    travel_date: str | None = None,
+    date_to: str | None = None,
+    guests: int = 1,
+    page: int = 1
 ):
-    query = (
-        db.query(TourPackage)
-        .filter(
-            TourPackage.is_deleted == False,
-            TourPackage.status == "active"
+    async def render():
+        # Ranked full-text search, one page at a time
+        results = await db.run_sync(
+            search_public_tours,
+            search,
+            page,
+            available=availability_params(travel_date, date_to, guests)
         )
-    )
 
-    if search:
-        query = query.filter(
-            TourPackage.title.ilike(f"%{search}%") |
-            TourPackage.city.ilike(f"%{search}%") |
-            TourPackage.country.ilike(f"%{search}%")
+        template = (
+            "tour_packages/_public_grid.html"
+            if request.headers.get("X-Requested-With") == "XMLHttpRequest"
+            else "tour_packages/public_list.html"
         )
 
-    if travel_date:
-        booked_subquery = (
-            db.query(ManualBooking.tour_package_id)
-            .filter(ManualBooking.travel_date == travel_date)
-            .subquery()
-        )
-
-        query = query.filter(
-            TourPackage.id.notin_(booked_subquery)
+        return templates.TemplateResponse(
+            template,
+            {
+                "request": request,
+                "tours": results["items"],
+                "pagination": results,
+                "search": search,
+                "travel_date": travel_date,
+            }
         )
 
-    tours = query.order_by(TourPackage.id.desc()).all()
+    # availability depends on bookings, which don't bump the catalogue version
+    return await cached_page(request, db, render, cacheable=not travel_date)
 
-    return templates.TemplateResponse(
-        "tour_packages/public_list.html",
-        {
-            "request": request,
-            "tours": tours,
-            "search": search,
-            "travel_date": travel_date,
-        }
-    )
+@router.get("/tours/availability", name="public_tour_availability")
+async def public_tour_availability(
+    travel_date: str,
+    db: AsyncSession = Depends(get_async_db),
+    date_to: str | None = None,
+    guests: int = 1,
+    search: str = "",
+    page: int = 1
+):
+    """
+    Catalogue tours with room for `guests` on some day between travel_date
+    and date_to, one page at a time, each with the days it still has room.
+    """
+    available = availability_params(travel_date, date_to, guests)
+    if not available:
+        return JSONResponse({"error": "travel_date must be a date (YYYY-MM-DD)"}, status_code=400)
+
+    results = await db.run_sync(search_public_tours, search, page, available=available)
+    dates = await db.run_sync(available_dates, [tour.id for tour in results["items"]], *available)
+
+    start, end, party_size = available
+    return {
+        "travel_date": start.isoformat(),
+        "date_to": end.isoformat(),
+        "guests": party_size,
+        "page": results["page"],
+        "total": results["total"],
+        "total_pages": results["total_pages"],
+        "tours": [
+            {
+                "id": tour.id,
+                "title": tour.title,
+                "city": tour.city,
+                "country": tour.country,
+                "price": tour.price,
+                "currency": tour.currency,
+                "available_dates": [day.isoformat() for day in dates[tour.id]],
+            }
+            for tour in results["items"]
+        ],
+    }
     
 @router.post("/gallery-image/{image_id}/delete", name="delete_gallery_image")
 def delete_gallery_image(
@@ -450,37 +529,53 @@ def delete_gallery_image(
     if not image:
         raise HTTPException(status_code=404, detail="Image not found")
 
-    # delete file from disk (optional but recommended)
-    file_path = f"static/{image.image_path}"
-    if os.path.exists(file_path):
-        os.remove(file_path)
-
     db.delete(image)
+    db.flush()
+
+    # uploads are stored by content, other rows may point at the same file
+    shared = db.query(TourPackageGalleryImage.id).filter(
+        TourPackageGalleryImage.image_path == image.image_path
+    ).first()
+
+    bump_catalogue_version(db)
     db.commit()
 
+    if not shared:
+        storage.delete(image.image_path)
+        delete_variants(image.image_path)
+
     return {"success": True}
 
 @router.get("/tours/{slug}", response_class=HTMLResponse)
-def tour_detail(
+async def tour_detail(
     slug: str,
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    tour = db.query(TourPackage)\
-        .filter(
-            TourPackage.id == slug,
-            TourPackage.is_deleted == False,
-            TourPackage.status == "active"
-        )\
-        .first()
+    async def render():
+        tour = None
+        if slug.isdigit():
+            tour = (
+                await db.execute(
+                    select(TourPackage)
+                    .options(selectinload(TourPackage.gallery_images))
+                    .where(
+                        TourPackage.id == int(slug),
+                        TourPackage.is_deleted == False,
+                        TourPackage.status == "active"
+                    )
+                )
+            ).scalar_one_or_none()
 
-    if not tour:
-        raise HTTPException(status_code=404, detail="Tour not found")
+        if not tour:
+            raise HTTPException(status_code=404, detail="Tour not found")
 
-    return templates.TemplateResponse(
-        "tour_packages/public_tour_detail.html",
-        {
-            "request": request,
-            "tour": tour
-        }
-    )
+        return templates.TemplateResponse(
+            "tour_packages/public_tour_detail.html",
+            {
+                "request": request,
+                "tour": tour
+            }
+        )
+
+    return await cached_page(request, db, render)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from datetime import date, time
 from typing import Optional
 
@@ -16,6 +16,13 @@ class ManualBookingCreate(BaseModel):
     advance_amount: float = 0
 
 
+class ManualBookingImportRow(ManualBookingCreate):
+    """One spreadsheet row of a bulk import, the create form's extra fields included."""
+    adults: int = Field(1, ge=0)
+    kids: int = Field(0, ge=0)
+    driver_id: Optional[int] = None
+
+
 class ManualBookingUpdate(BaseModel):
     guest_name: str
     country_code: str
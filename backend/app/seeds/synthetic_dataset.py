@@ -0,0 +1,508 @@
+"""
+Generates a deterministic, production-sized dataset for local profiling.
+
+    python -m app.seeds.synthetic_dataset --seed 42 --companies 2000 --packages 30000 \\
+        --drivers 30000 --bookings 1000000
+
+The same seed, scale and --anchor date produce the same rows (ids aside,
+they continue from what the tables already hold). What comes out:
+
+- companies in a handful of markets, sized on a Pareto curve: a few big
+  operators, a long tail with one or two packages. 10% inactive, 2% deleted.
+- packages spread over the companies by size, with a cover and 0-6
+  gallery images each (paths only, no files), prices per market.
+- drivers spread the same way, vehicles from sedans to coaches, each
+  linked to 1-5 packages of their company.
+- bookings over --days-back past and --days-ahead future days, weighted
+  by package popularity, season and weekday, thinning out into the future.
+  Created 0-6 months ahead of travel. Most past bookings are paid and
+  have a driver, one driver per day, the future ones are mixed.
+- driver assignments, the package capacity ledger and the KPI rollups
+  that go with the bookings.
+
+Rows go in with COPY on Postgres and batched executemany elsewhere, in one
+transaction. Ids are picked up front, run it against a database nobody
+else is writing to. Company logins are seed-<seed>-company-<n>@example.com
+with SEED_PASSWORD.
+"""
+import argparse
+import math
+import random
+import time
+from bisect import bisect_left
+from datetime import date, datetime, time as day_time, timedelta, timezone
+from itertools import accumulate
+
+from sqlalchemy import and_, func, insert, select, text
+from sqlalchemy.orm import Session
+
+from app.commands.rebuild_kpi_rollups import KPI_COLUMNS, kpi_aggregate
+from app.core.security import hash_password
+from app.database.bulk import bulk_insert
+from app.database.session import SessionLocal
+from app.models.company import Company
+from app.models.company_kpi import CompanyDailyKpi
+from app.models.driver import Driver
+from app.models.driver_assignment import DriverAssignment
+from app.models.manual_booking import ManualBooking
+from app.models.package_capacity import PackageDailyCapacity
+from app.models.tour_package import TourPackage, TourPackageDriver, TourPackageGalleryImage
+from app.models.user import User
+from app.utils.page_cache import bump_catalogue_version
+
+SEED_PASSWORD = "12345678"
+
+BATCH_SIZE = 50000
+
+# country, dialling code, currency, cities, share of the companies, price range
+MARKETS = [
+    ("UAE", "+971", "AED", ["Dubai", "Abu Dhabi", "Sharjah", "Ras Al Khaimah"], 8, (80, 900)),
+    ("Saudi Arabia", "+966", "SAR", ["Riyadh", "Jeddah", "AlUla"], 3, (100, 1200)),
+    ("India", "+91", "USD", ["Goa", "Jaipur", "Agra", "Kochi"], 3, (15, 250)),
+    ("Italy", "+39", "EUR", ["Rome", "Florence", "Venice"], 1, (40, 400)),
+    ("Spain", "+34", "EUR", ["Barcelona", "Seville", "Madrid"], 1, (30, 350)),
+    ("United States", "+1", "USD", ["New York", "Orlando", "Las Vegas"], 1, (50, 600)),
+]
+
+COMPANY_WORDS = ["Desert", "Golden", "Blue", "Royal", "Sunrise", "Oasis", "Falcon", "Pearl", "Atlas", "Horizon"]
+COMPANY_KINDS = ["Tours", "Travels", "Adventures", "Holidays", "Excursions"]
+TOUR_KINDS = [
+    "Desert Safari", "City Tour", "Dhow Cruise", "Mountain Trek", "Island Hopping",
+    "Food Walk", "Heritage Walk", "Sunset Cruise", "Theme Park Trip", "Day Trip",
+]
+FIRST_NAMES = ["Aisha", "Omar", "Priya", "Rahul", "Maria", "John", "Fatima", "Ahmed", "Sara", "Luca", "Emma", "Wei"]
+LAST_NAMES = ["Khan", "Sharma", "Rossi", "Smith", "Garcia", "Haddad", "Patel", "Chen", "Mueller", "Nasser"]
+PICKUPS = ["Hotel lobby", "Airport arrivals", "Marina mall", "City centre metro", "Old town gate"]
+TRAVEL_TIMES = [day_time(hour, minute) for hour in range(6, 20) for minute in (0, 30)]
+BOOKING_TIMES = [day_time(hour, minute) for hour in range(7, 23) for minute in range(60)]
+ADVANCE_SHARES = [0.2, 0.3, 0.5]
+
+# seats, vehicle, weight
+VEHICLES = [(4, "Sedan", 30), (6, "SUV", 15), (7, "SUV", 20), (8, "Van", 10), (12, "Van", 12), (14, "Minibus", 8), (22, "Coach", 5)]
+ADULTS = [1, 2, 3, 4, 5, 6, 8, 10]
+ADULT_WEIGHTS = [18, 42, 12, 14, 5, 4, 3, 2]
+KIDS = [0, 1, 2, 3, 4]
+KID_WEIGHTS = [62, 18, 14, 4, 2]
+
+
+def _cumulative(weights) -> list:
+    return list(accumulate(weights))
+
+
+def _spread(rng: random.Random, total: int, weights: list, minimum: int = 0) -> list:
+    """`total` split over len(weights) slots in proportion, `minimum` each."""
+    counts = [minimum] * len(weights)
+    extra = total - minimum * len(weights)
+    if extra > 0:
+        for slot in rng.choices(range(len(weights)), cum_weights=_cumulative(weights), k=extra):
+            counts[slot] += 1
+    return counts
+
+
+def _next_id(db: Session, model) -> int:
+    return (db.query(func.max(model.id)).scalar() or 0) + 1
+
+
+# -------------------------------------------------
+# Generation
+# -------------------------------------------------
+def generate_companies(rng, seed: int, count: int, first_user_id: int, first_company_id: int, password_hash: str):
+    markets = rng.choices(MARKETS, weights=[m[4] for m in MARKETS], k=count)
+    users, companies = [], []
+
+    for n in range(count):
+        country, country_code, currency = markets[n][:3]
+        roll = rng.random()
+        users.append((first_user_id + n, f"seed-{seed}-company-{n + 1}@example.com", password_hash, "company"))
+        companies.append((
+            first_company_id + n,
+            first_user_id + n,
+            f"{rng.choice(COMPANY_WORDS)} {rng.choice(COMPANY_KINDS)} {n + 1}",
+            country_code,
+            f"{rng.randrange(10 ** 8, 10 ** 9)}",
+            "inactive" if roll < 0.10 else "active",
+            currency,
+            country,
+            roll > 0.98,
+        ))
+
+    # a few big operators and a long tail
+    sizes = [rng.paretovariate(1.2) for _ in range(count)]
+    return users, companies, markets, sizes
+
+
+def generate_packages(rng, companies, markets, sizes, count: int, first_id: int):
+    per_company = _spread(rng, count, sizes, minimum=1 if count >= len(companies) else 0)
+    packages, owners, prices, weights = [], [], [], []
+
+    package_id = first_id
+    for index, company in enumerate(companies):
+        country, _, currency, cities, _, (low, high) = markets[index]
+        for _ in range(per_company[index]):
+            city = rng.choice(cities)
+            kind = rng.choice(TOUR_KINDS)
+            price = round(rng.uniform(low, high), 2)
+            roll = rng.random()
+            deleted = roll > 0.98
+            packages.append((
+                package_id,
+                company[0],
+                f"{city} {kind}",
+                f"{kind} in {city}, hotel pickup and drop-off included.",
+                country,
+                currency,
+                city,
+                price,
+                "Pickup, the tour, drop-off.",
+                "Meals and tips",
+                "inactive" if roll < 0.08 else "active",
+                deleted,
+            ))
+            owners.append(index)
+            prices.append(price)
+            # bookings follow the operator's size and the package's own pull
+            weights.append(sizes[index] * rng.lognormvariate(0, 1) * (0.2 if deleted else 1))
+            package_id += 1
+
+    return packages, owners, prices, weights
+
+
+def generate_gallery(rng, packages):
+    for package in packages:
+        yield (package[0], f"uploads/tours/seed/{package[0]}-cover.jpg", "cover")
+        for n in range(rng.choice([0, 1, 2, 3, 3, 4, 4, 5, 6])):
+            yield (package[0], f"uploads/tours/seed/{package[0]}-{n + 1}.jpg", "gallery")
+
+
+def generate_drivers(rng, companies, markets, sizes, count: int, first_id: int):
+    per_company = _spread(rng, count, sizes, minimum=1 if count >= len(companies) else 0)
+    cum_vehicles = _cumulative([v[2] for v in VEHICLES])
+    drivers, owners = [], []
+
+    driver_id = first_id
+    for index, company in enumerate(companies):
+        for _ in range(per_company[index]):
+            seats, vehicle, _ = rng.choices(VEHICLES, cum_weights=cum_vehicles)[0]
+            drivers.append((
+                driver_id,
+                company[0],
+                f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                markets[index][1],
+                f"{rng.randrange(10 ** 8, 10 ** 9)}",
+                vehicle,
+                f"{vehicle[:2].upper()}-{driver_id}",
+                seats,
+                rng.random() > 0.97,
+            ))
+            owners.append(index)
+            driver_id += 1
+
+    return drivers, owners
+
+
+def generate_links(rng, packages, package_owners, drivers, driver_owners):
+    by_company = {}
+    for driver, owner in zip(drivers, driver_owners):
+        by_company.setdefault(owner, []).append(driver)
+
+    links = []
+    for package, owner in zip(packages, package_owners):
+        pool = by_company.get(owner, [])
+        for driver in rng.sample(pool, min(len(pool), rng.choice([1, 2, 2, 3, 3, 4, 5]))):
+            links.append((package[0], driver[0]))
+    return links
+
+
+class BookingGenerator:
+    """
+    Bookings in id order, `batch()` at a time, with the driver assignments
+    they get. Keeps the driver/day pairs already given out.
+    """
+
+    def __init__(self, rng, packages, prices, weights, drivers, links, anchor: date, days_back: int, days_ahead: int):
+        self.rng = rng
+        self.anchor = anchor
+        self.package_ids = [package[0] for package in packages]
+        self.package_weights = _cumulative(weights)
+        self.prices = dict(zip(self.package_ids, prices))
+
+        # the package's live drivers, smallest vehicle first
+        seats = {driver[0]: driver[7] for driver in drivers if not driver[8]}
+        linked = {}
+        for package_id, driver_id in links:
+            if driver_id in seats:
+                linked.setdefault(package_id, []).append((seats[driver_id], driver_id))
+        self.linked = {package_id: sorted(pairs) for package_id, pairs in linked.items()}
+        self.taken = set()
+
+        # season (peak around new year), weekends and the thinning future
+        self.days = [anchor + timedelta(days=offset) for offset in range(-days_back, days_ahead + 1)]
+        self.day_weights = _cumulative([
+            (1.4 + math.cos(2 * math.pi * day.timetuple().tm_yday / 365))
+            * (1.3 if day.weekday() in (4, 5) else 1.0)
+            * (math.exp(-(day - anchor).days / 60) if day > anchor else 1.0)
+            for day in self.days
+        ])
+        self.cum_adults = _cumulative(ADULT_WEIGHTS)
+        self.cum_kids = _cumulative(KID_WEIGHTS)
+
+    def _driver(self, package_id: int, travel_date: date, party: int):
+        pairs = self.linked.get(package_id)
+        if not pairs:
+            return None
+        for _, driver_id in pairs[bisect_left(pairs, (party, 0)):]:
+            key = (driver_id, travel_date)
+            if key not in self.taken:
+                self.taken.add(key)
+                return driver_id
+        return None
+
+    def batch(self, first_id: int, count: int) -> tuple:
+        # rand() indexing rather than rng.choice/randrange, a few times cheaper
+        rng = self.rng
+        rand = rng.random
+        anchor = self.anchor
+        package_ids = rng.choices(self.package_ids, cum_weights=self.package_weights, k=count)
+        days = rng.choices(self.days, cum_weights=self.day_weights, k=count)
+        adults = rng.choices(ADULTS, cum_weights=self.cum_adults, k=count)
+        kids = rng.choices(KIDS, cum_weights=self.cum_kids, k=count)
+
+        bookings, assignments = [], []
+        for n in range(count):
+            booking_id = first_id + n
+            package_id = package_ids[n]
+            travel_date = days[n]
+            past = travel_date < anchor
+            deleted = rand() < 0.03
+            total = round(self.prices[package_id] * (adults[n] + 0.5 * kids[n]), 2)
+
+            roll = rand()
+            if roll < (0.85 if past else 0.35):
+                status, advance = "paid", total
+            elif roll < (0.95 if past else 0.75):
+                status, advance = "partial", round(total * ADVANCE_SHARES[int(rand() * 3)], 2)
+            else:
+                status, advance = "pending", 0
+
+            driver_id = None
+            if not deleted and rand() < (0.9 if past else 0.4):
+                driver_id = self._driver(package_id, travel_date, adults[n] + kids[n])
+                if driver_id:
+                    assignments.append((driver_id, travel_date, booking_id))
+
+            # booked about three weeks ahead on average
+            created = travel_date - timedelta(days=min(int(-21 * math.log(1 - rand())), 180))
+            if created > anchor:
+                created = anchor - timedelta(days=int(rand() * 15))
+            first = FIRST_NAMES[int(rand() * len(FIRST_NAMES))]
+            last = LAST_NAMES[int(rand() * len(LAST_NAMES))]
+
+            bookings.append((
+                booking_id,
+                f"{first} {last}",
+                "+971",
+                f"5{10 ** 7 + int(rand() * 9 * 10 ** 7)}",
+                f"{first}.{last}{booking_id}@example.com".lower() if rand() < 0.6 else None,
+                adults[n],
+                kids[n],
+                package_id,
+                driver_id,
+                travel_date,
+                TRAVEL_TIMES[int(rand() * len(TRAVEL_TIMES))] if rand() < 0.7 else None,
+                total,
+                advance,
+                round(total - advance, 2),
+                PICKUPS[int(rand() * len(PICKUPS))] if rand() < 0.8 else None,
+                status,
+                deleted,
+                datetime.combine(created, BOOKING_TIMES[int(rand() * len(BOOKING_TIMES))], tzinfo=timezone.utc),
+            ))
+
+        return bookings, assignments
+
+
+# -------------------------------------------------
+# Loading
+# -------------------------------------------------
+def _columns(model, names: str) -> tuple:
+    columns = names.split()
+    return model.__table__, columns
+
+
+USER_COLUMNS = _columns(User, "id email password_hash role")
+COMPANY_COLUMNS = _columns(Company, "id user_id company_name country_code phone status currency country is_deleted")
+PACKAGE_COLUMNS = _columns(
+    TourPackage, "id company_id title description country currency city price itinerary excludes status is_deleted"
+)
+GALLERY_COLUMNS = _columns(TourPackageGalleryImage, "tour_package_id image_path image_type")
+DRIVER_COLUMNS = _columns(
+    Driver, "id company_id name country_code phone_number vehicle_type vehicle_number seats is_deleted"
+)
+LINK_COLUMNS = _columns(TourPackageDriver, "tour_package_id driver_id")
+BOOKING_COLUMNS = _columns(
+    ManualBooking,
+    "id guest_name country_code phone email adults kids tour_package_id driver_id travel_date travel_time "
+    "total_amount advance_amount remaining_amount pickup_location payment_status is_deleted created_at",
+)
+ASSIGNMENT_COLUMNS = _columns(DriverAssignment, "driver_id travel_date booking_id")
+
+
+def record_ledger(db: Session, first_package_id: int, last_package_id: int):
+    """The package capacity ledger rows of the seeded packages, in one INSERT ... SELECT."""
+    seeded = TourPackageDriver.tour_package_id.between(first_package_id, last_package_id)
+    capacity = (
+        select(
+            TourPackageDriver.tour_package_id,
+            func.count(TourPackageDriver.id).label("drivers"),
+            func.coalesce(func.sum(Driver.seats), 0).label("seats"),
+        )
+        .join(Driver, and_(Driver.id == TourPackageDriver.driver_id, Driver.is_deleted == False))
+        .where(seeded)
+        .group_by(TourPackageDriver.tour_package_id)
+        .subquery()
+    )
+
+    db.execute(
+        insert(PackageDailyCapacity).from_select(
+            ["tour_package_id", "travel_date", "drivers_available", "seats_available", "bookings_count", "seats_booked"],
+            select(
+                ManualBooking.tour_package_id,
+                ManualBooking.travel_date,
+                func.coalesce(capacity.c.drivers, 0),
+                func.coalesce(capacity.c.seats, 0),
+                func.count(ManualBooking.id),
+                func.sum(ManualBooking.adults + ManualBooking.kids),
+            )
+            .outerjoin(capacity, capacity.c.tour_package_id == ManualBooking.tour_package_id)
+            .where(
+                ManualBooking.is_deleted == False,
+                ManualBooking.tour_package_id.between(first_package_id, last_package_id)
+            )
+            .group_by(ManualBooking.tour_package_id, ManualBooking.travel_date, capacity.c.drivers, capacity.c.seats)
+        )
+    )
+
+
+def record_kpis(db: Session, first_company_id: int, last_company_id: int):
+    """The KPI rollup rows of the seeded companies, in one INSERT ... SELECT."""
+    db.execute(
+        insert(CompanyDailyKpi).from_select(
+            KPI_COLUMNS,
+            kpi_aggregate(TourPackage.company_id.between(first_company_id, last_company_id)),
+        )
+    )
+
+
+def _analyze(db: Session):
+    db.execute(text("ANALYZE"))
+    db.commit()
+
+
+def _reset_sequences(db: Session, tables):
+    """Moves the id sequences past the explicitly numbered rows (Postgres)."""
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    for table in tables:
+        db.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+            f"(SELECT COALESCE(MAX(id), 1) FROM {table.name}))"
+        ))
+
+
+def run(
+    seed: int = 42,
+    companies: int = 2000,
+    packages: int = 30000,
+    drivers: int = 30000,
+    bookings: int = 1000000,
+    days_back: int = 365,
+    days_ahead: int = 180,
+    anchor: date = None,
+):
+    anchor = anchor or date.today()
+    rng = random.Random(seed)
+    db = SessionLocal()
+    timings = []
+
+    def step(label, load):
+        started = time.perf_counter()
+        rows = load()
+        timings.append((label, rows, time.perf_counter() - started))
+        print(f"  {label:<24} {rows if rows is not None else '':>10}  {timings[-1][2]:7.2f}s")
+
+    try:
+        if db.query(User.id).filter(User.email == f"seed-{seed}-company-1@example.com").first():
+            print(f"❌ The dataset for seed {seed} is already loaded")
+            return
+
+        print(f"Seed {seed}, anchor {anchor}: {companies} companies, {packages} packages, "
+              f"{drivers} drivers, {bookings} bookings ({db.get_bind().dialect.name})")
+        started = time.perf_counter()
+
+        users, company_rows, markets, sizes = generate_companies(
+            rng, seed, companies, _next_id(db, User), _next_id(db, Company), hash_password(SEED_PASSWORD)
+        )
+        package_rows, package_owners, prices, weights = generate_packages(
+            rng, company_rows, markets, sizes, packages, _next_id(db, TourPackage)
+        )
+        driver_rows, driver_owners = generate_drivers(rng, company_rows, markets, sizes, drivers, _next_id(db, Driver))
+        links = generate_links(rng, package_rows, package_owners, driver_rows, driver_owners)
+
+        step("users", lambda: bulk_insert(db, *USER_COLUMNS, users))
+        step("companies", lambda: bulk_insert(db, *COMPANY_COLUMNS, company_rows))
+        step("tour_packages", lambda: bulk_insert(db, *PACKAGE_COLUMNS, package_rows))
+        step("gallery images", lambda: bulk_insert(db, *GALLERY_COLUMNS, generate_gallery(rng, package_rows)))
+        step("drivers", lambda: bulk_insert(db, *DRIVER_COLUMNS, driver_rows))
+        step("package drivers", lambda: bulk_insert(db, *LINK_COLUMNS, links))
+
+        generator = BookingGenerator(
+            rng, package_rows, prices, weights, driver_rows, links, anchor, days_back, days_ahead
+        )
+        first_booking_id = _next_id(db, ManualBooking)
+        counts = {"bookings": 0, "assignments": 0}
+
+        def load_bookings():
+            for offset in range(0, bookings, BATCH_SIZE):
+                batch, assignments = generator.batch(first_booking_id + offset, min(BATCH_SIZE, bookings - offset))
+                counts["bookings"] += bulk_insert(db, *BOOKING_COLUMNS, batch)
+                counts["assignments"] += bulk_insert(db, *ASSIGNMENT_COLUMNS, assignments)
+            return counts["bookings"]
+
+        step("manual bookings", load_bookings)
+        print(f"  {'(driver assignments)':<24} {counts['assignments']:>10}")
+
+        if package_rows:
+            step("capacity ledger", lambda: record_ledger(db, package_rows[0][0], package_rows[-1][0]))
+        if company_rows:
+            step("kpi rollups", lambda: record_kpis(db, company_rows[0][0], company_rows[-1][0]))
+
+        _reset_sequences(db, [User.__table__, Company.__table__, TourPackage.__table__, Driver.__table__,
+                              ManualBooking.__table__])
+        bump_catalogue_version(db)
+        step("commit", db.commit)
+
+        if db.get_bind().dialect.name == "postgresql":
+            step("analyze", lambda: _analyze(db))
+
+        print(f"✅ Loaded in {time.perf_counter() - started:.1f}s, company password: {SEED_PASSWORD}")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--companies", type=int, default=2000)
+    parser.add_argument("--packages", type=int, default=30000)
+    parser.add_argument("--drivers", type=int, default=30000)
+    parser.add_argument("--bookings", type=int, default=1000000)
+    parser.add_argument("--days-back", type=int, default=365)
+    parser.add_argument("--days-ahead", type=int, default=180)
+    parser.add_argument("--anchor", type=date.fromisoformat, help="the 'today' of the dataset, YYYY-MM-DD")
+    args = parser.parse_args()
+
+    run(args.seed, args.companies, args.packages, args.drivers, args.bookings,
+        args.days_back, args.days_ahead, args.anchor)
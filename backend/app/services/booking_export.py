@@ -0,0 +1,146 @@
+"""
+Streaming export of a company's manual bookings as CSV or NDJSON.
+
+The query selects plain columns (booking, package title/currency, driver
+name), no ORM objects, and is executed with `yield_per`, which on Postgres
+is a server-side cursor. Rows are formatted and flushed in ~64 KB chunks,
+so memory stays flat whatever the number of bookings.
+
+The generator opens its own session: it runs while the response is being
+sent, after the request's dependencies may already have been closed.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from sqlalchemy import select
+
+from app.database.session import SessionLocal
+from app.models.driver import Driver
+from app.models.manual_booking import ManualBooking
+from app.models.tour_package import TourPackage
+
+YIELD_PER = 1000
+CHUNK_SIZE = 64 * 1024
+
+FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+PAYMENT_STATUSES = ("pending", "partial", "paid")
+
+EXPORT_COLUMNS = [
+    ManualBooking.id.label("booking_id"),
+    ManualBooking.guest_name,
+    ManualBooking.country_code,
+    ManualBooking.phone,
+    ManualBooking.email,
+    ManualBooking.adults,
+    ManualBooking.kids,
+    ManualBooking.tour_package_id,
+    TourPackage.title.label("package_title"),
+    ManualBooking.travel_date,
+    ManualBooking.travel_time,
+    ManualBooking.pickup_location,
+    ManualBooking.driver_id,
+    Driver.name.label("driver_name"),
+    TourPackage.currency,
+    ManualBooking.total_amount,
+    ManualBooking.advance_amount,
+    ManualBooking.remaining_amount,
+    ManualBooking.payment_status,
+    ManualBooking.created_at,
+]
+HEADER = [column.key for column in EXPORT_COLUMNS]
+
+
+class BookingExportError(Exception):
+    """Invalid export filters, the message is safe to show."""
+
+
+def parse_statuses(value: str | None) -> list:
+    """`paid,partial` -> ["paid", "partial"]; empty means every status."""
+    statuses = [s.strip().lower() for s in (value or "").split(",") if s.strip()]
+    unknown = sorted(set(statuses) - set(PAYMENT_STATUSES))
+    if unknown:
+        raise BookingExportError(
+            f"Unknown status {', '.join(unknown)}, expected {', '.join(PAYMENT_STATUSES)}"
+        )
+    return statuses
+
+
+def export_query(company_id: int, date_from: date = None, date_to: date = None, statuses=()):
+    """Live bookings of the company, optionally by travel date range and payment status."""
+    query = (
+        select(*EXPORT_COLUMNS)
+        .join(TourPackage, TourPackage.id == ManualBooking.tour_package_id)
+        .outerjoin(Driver, Driver.id == ManualBooking.driver_id)
+        .where(
+            ManualBooking.is_deleted == False,
+            TourPackage.company_id == company_id
+        )
+        .order_by(ManualBooking.travel_date, ManualBooking.id)
+    )
+    if date_from:
+        query = query.where(ManualBooking.travel_date >= date_from)
+    if date_to:
+        query = query.where(ManualBooking.travel_date <= date_to)
+    if statuses:
+        query = query.where(ManualBooking.payment_status.in_(statuses))
+    return query
+
+
+def _value(value):
+    if value is None:
+        return None
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    return value
+
+
+def _csv_chunks(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(HEADER)
+
+    for row in rows:
+        writer.writerow(["" if value is None else _value(value) for value in row])
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue().encode()
+
+
+def _ndjson_chunks(rows):
+    lines = []
+    size = 0
+
+    for row in rows:
+        line = json.dumps(dict(zip(HEADER, map(_value, row))), ensure_ascii=False)
+        lines.append(line)
+        size += len(line) + 1
+        if size >= CHUNK_SIZE:
+            yield ("\n".join(lines) + "\n").encode()
+            lines = []
+            size = 0
+
+    if lines:
+        yield ("\n".join(lines) + "\n").encode()
+
+
+def stream_bookings(query, fmt: str = "csv"):
+    """Yields the encoded export of `query` chunk by chunk."""
+    chunks = _csv_chunks if fmt == "csv" else _ndjson_chunks
+
+    db = SessionLocal()
+    try:
+        rows = db.execute(query.execution_options(yield_per=YIELD_PER))
+        yield from chunks(rows)
+    finally:
+        db.close()
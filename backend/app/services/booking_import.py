@@ -0,0 +1,398 @@
+"""
+Bulk import of manual bookings from a CSV or XLSX export.
+
+Rows are read one at a time from the uploaded file and validated with
+ManualBookingImportRow. Package ownership, driver links and driver/day
+conflicts (against the database and within the file) are then checked for
+the whole batch in a handful of set-based queries. The accepted rows go in
+with one COPY (Postgres) or executemany INSERT, together with their driver
+assignments, capacity ledger and KPI rollups, in a single transaction.
+
+Imported bookings don't queue WhatsApp confirmations: they are re-keyed
+from partner sheets, the guests have already been confirmed.
+"""
+import csv
+import io
+import os
+import zipfile
+from collections import Counter, defaultdict
+from datetime import date, datetime, timezone
+
+from openpyxl import load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+from pydantic import ValidationError
+from sqlalchemy import insert, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database.bulk import copy_rows
+from app.database.upsert import dialect_insert
+from app.models.company_kpi import CompanyDailyKpi
+from app.models.driver import Driver
+from app.models.driver_assignment import DriverAssignment
+from app.models.manual_booking import ManualBooking
+from app.models.package_capacity import PackageDailyCapacity
+from app.models.tour_package import TourPackage, TourPackageDriver
+from app.schemas.manual_booking import ManualBookingImportRow
+from app.services.capacity_service import package_capacity
+
+COLUMNS = list(ManualBookingImportRow.model_fields)
+REQUIRED_COLUMNS = [name for name, field in ManualBookingImportRow.model_fields.items() if field.is_required()]
+
+# columns that spreadsheets like to turn into numbers
+TEXT_COLUMNS = {"guest_name", "country_code", "phone", "email", "pickup_location"}
+
+MAX_REPORTED_ERRORS = 1000
+
+BOOKING_COLUMNS = [
+    "guest_name", "country_code", "phone", "email", "adults", "kids",
+    "tour_package_id", "driver_id", "travel_date", "travel_time",
+    "total_amount", "advance_amount", "remaining_amount", "pickup_location",
+    "payment_status", "is_deleted", "created_at",
+]
+
+
+class BookingImportError(Exception):
+    """The file as a whole can't be imported, the message is safe to show."""
+
+
+# -------------------------------------------------
+# Reading
+# -------------------------------------------------
+def _header(values) -> list:
+    header = [str(value or "").strip().lower().replace(" ", "_") for value in values]
+    missing = [name for name in REQUIRED_COLUMNS if name not in header]
+    if missing:
+        raise BookingImportError(f"Missing column(s): {', '.join(missing)}")
+    return header
+
+
+def _read_csv(file):
+    reader = csv.reader(io.TextIOWrapper(file, encoding="utf-8-sig", newline=""))
+    try:
+        header = _header(next(reader, []))
+        for number, values in enumerate(reader, start=2):
+            yield number, dict(zip(header, values))
+    except UnicodeDecodeError:
+        raise BookingImportError("Save the CSV file as UTF-8") from None
+
+
+def _read_xlsx(file):
+    try:
+        workbook = load_workbook(file, read_only=True, data_only=True)
+    except (InvalidFileException, zipfile.BadZipFile):
+        raise BookingImportError("The file is not a valid .xlsx workbook") from None
+
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = _header(next(rows, []))
+        for number, values in enumerate(rows, start=2):
+            yield number, dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+READERS = {".csv": _read_csv, ".xlsx": _read_xlsx}
+
+
+def read_rows(filename: str, file):
+    """Yields (sheet row number, {column: raw value}) from an uploaded file."""
+    reader = READERS.get(os.path.splitext(filename or "")[1].lower())
+    if reader is None:
+        raise BookingImportError("Upload a .csv or .xlsx file")
+    file.seek(0)
+    return reader(file)
+
+
+def _clean(raw: dict) -> dict:
+    """Drops blank cells (so schema defaults apply) and undoes spreadsheet typing."""
+    row = {}
+    for column, value in raw.items():
+        if column not in COLUMNS or value is None:
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+            if not value:
+                continue
+        elif isinstance(value, float) and value.is_integer() and column in TEXT_COLUMNS:
+            value = str(int(value))
+        elif isinstance(value, datetime) and column == "travel_date":
+            value = value.date()
+        elif isinstance(value, (int, float)) and column in TEXT_COLUMNS:
+            value = str(value)
+        row[column] = value
+    return row
+
+
+def _error_messages(error: ValidationError) -> list:
+    return [
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}"
+        for err in error.errors()
+    ]
+
+
+# -------------------------------------------------
+# Validation
+# -------------------------------------------------
+class ImportReport:
+    def __init__(self):
+        self.total = 0
+        self.accepted = []  # (row number, ManualBookingImportRow)
+        self.errors = {}    # row number -> [messages]
+
+    def reject(self, number: int, message: str):
+        self.errors.setdefault(number, []).append(message)
+
+    def as_dict(self, imported: int, dry_run: bool) -> dict:
+        rows = sorted(self.errors.items())
+        return {
+            "total": self.total,
+            "imported": imported,
+            "rejected": len(rows),
+            "dry_run": dry_run,
+            "errors": [
+                {"row": number, "errors": messages}
+                for number, messages in rows[:MAX_REPORTED_ERRORS]
+            ],
+            "errors_truncated": len(rows) > MAX_REPORTED_ERRORS,
+        }
+
+
+def validate_rows(rows) -> ImportReport:
+    report = ImportReport()
+
+    for number, raw in rows:
+        row = _clean(raw)
+        if not row:
+            continue
+
+        report.total += 1
+        if report.total > settings.BOOKING_IMPORT_MAX_ROWS:
+            raise BookingImportError(
+                f"The file has more than {settings.BOOKING_IMPORT_MAX_ROWS} rows, split it up"
+            )
+
+        try:
+            report.accepted.append((number, ManualBookingImportRow(**row)))
+        except ValidationError as e:
+            for message in _error_messages(e):
+                report.reject(number, message)
+
+    return report
+
+
+def check_batch(db: Session, company_id: int, report: ImportReport):
+    """
+    Set-based checks for the rows that passed validation: the package is
+    the company's, the driver is linked to it and is free that day (in the
+    database and among earlier rows of the file). Rejected rows are
+    removed from `report.accepted`.
+    """
+    rows = report.accepted
+    if not rows:
+        return
+
+    package_ids = {row.tour_package_id for _, row in rows}
+    owned = set(db.scalars(
+        select(TourPackage.id).where(
+            TourPackage.id.in_(package_ids),
+            TourPackage.company_id == company_id,
+            TourPackage.is_deleted == False
+        )
+    ))
+
+    driver_ids = {row.driver_id for _, row in rows if row.driver_id}
+    linked = set()
+    taken = set()
+    if driver_ids:
+        linked = set(db.execute(
+            select(TourPackageDriver.tour_package_id, TourPackageDriver.driver_id)
+            .join(Driver, Driver.id == TourPackageDriver.driver_id)
+            .where(
+                TourPackageDriver.tour_package_id.in_(owned),
+                TourPackageDriver.driver_id.in_(driver_ids),
+                Driver.is_deleted == False
+            )
+        ).tuples())
+
+        dates = [row.travel_date for _, row in rows if row.driver_id]
+        taken = set(db.execute(
+            select(DriverAssignment.driver_id, DriverAssignment.travel_date).where(
+                DriverAssignment.driver_id.in_(driver_ids),
+                DriverAssignment.travel_date.between(min(dates), max(dates))
+            )
+        ).tuples())
+
+    accepted = []
+    for number, row in rows:
+        if row.tour_package_id not in owned:
+            report.reject(number, f"tour_package_id: package {row.tour_package_id} not found")
+            continue
+
+        if row.driver_id:
+            slot = (row.driver_id, row.travel_date)
+            if (row.tour_package_id, row.driver_id) not in linked:
+                report.reject(number, f"driver_id: driver {row.driver_id} is not assigned to this package")
+                continue
+            if slot in taken:
+                report.reject(number, f"driver_id: driver {row.driver_id} is already booked on {row.travel_date}")
+                continue
+            taken.add(slot)
+
+        accepted.append((number, row))
+
+    report.accepted = accepted
+
+
+# -------------------------------------------------
+# Writing
+# -------------------------------------------------
+def _booking_values(row: ManualBookingImportRow, created_at: datetime) -> dict:
+    remaining_amount = row.total_amount - row.advance_amount
+    payment_status = (
+        "paid" if remaining_amount == 0
+        else "partial" if row.advance_amount > 0
+        else "pending"
+    )
+    return {
+        "guest_name": row.guest_name,
+        "country_code": row.country_code,
+        "phone": row.phone,
+        "email": row.email,
+        "adults": row.adults,
+        "kids": row.kids,
+        "tour_package_id": row.tour_package_id,
+        "driver_id": row.driver_id,
+        "travel_date": row.travel_date,
+        "travel_time": row.travel_time,
+        "total_amount": row.total_amount,
+        "advance_amount": row.advance_amount,
+        "remaining_amount": remaining_amount,
+        "pickup_location": row.pickup_location,
+        "payment_status": payment_status,
+        "is_deleted": False,
+        "created_at": created_at,
+    }
+
+
+def _insert_bookings(db: Session, values: list) -> list:
+    """Inserts the bookings and returns their ids, in order."""
+    table = ManualBooking.__table__
+
+    if db.get_bind().dialect.name == "postgresql":
+        # ids up front, so the rows can go in with COPY and still be referenced
+        ids = db.execute(
+            text("SELECT nextval(pg_get_serial_sequence('manual_bookings', 'id')) FROM generate_series(1, :n)"),
+            {"n": len(values)},
+        ).scalars().all()
+        copy_rows(
+            db, table.name, ["id"] + BOOKING_COLUMNS,
+            ([booking_id] + [row[column] for column in BOOKING_COLUMNS] for booking_id, row in zip(ids, values)),
+        )
+        return ids
+
+    return db.execute(
+        insert(table).returning(table.c.id, sort_by_parameter_order=True),
+        values,
+    ).scalars().all()
+
+
+def _insert_assignments(db: Session, rows: list):
+    if not rows:
+        return
+
+    table = DriverAssignment.__table__
+    if db.get_bind().dialect.name == "postgresql":
+        copy_rows(db, table.name, ["driver_id", "travel_date", "booking_id"],
+                  ((row["driver_id"], row["travel_date"], row["booking_id"]) for row in rows))
+    else:
+        db.execute(insert(table), rows)
+
+
+def _record_ledger(db: Session, values: list):
+    """record_booking for the whole batch, one upsert per package/day."""
+    counts = Counter()
+    seats = Counter()
+    for row in values:
+        key = (row["tour_package_id"], row["travel_date"])
+        counts[key] += 1
+        seats[key] += row["adults"] + row["kids"]
+
+    capacity = package_capacity(db, list({package_id for package_id, _ in counts}))
+
+    table = PackageDailyCapacity.__table__
+    stmt = dialect_insert(db, table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.tour_package_id, table.c.travel_date],
+        set_={
+            "drivers_available": stmt.excluded.drivers_available,
+            "seats_available": stmt.excluded.seats_available,
+            "bookings_count": table.c.bookings_count + stmt.excluded.bookings_count,
+            "seats_booked": table.c.seats_booked + stmt.excluded.seats_booked,
+        },
+    )
+    db.execute(stmt, [
+        {
+            "tour_package_id": package_id,
+            "travel_date": travel_date,
+            "drivers_available": capacity[package_id][0],
+            "seats_available": capacity[package_id][1],
+            "bookings_count": count,
+            "seats_booked": seats[(package_id, travel_date)],
+        }
+        for (package_id, travel_date), count in counts.items()
+    ])
+
+
+def _record_kpis(db: Session, company_id: int, day: date, values: list):
+    """record_booking_kpis for the whole batch, they all land on `day`."""
+    totals = defaultdict(float)
+    for row in values:
+        paid = row["payment_status"] == "paid"
+        totals["bookings_created"] += 1
+        totals["revenue"] += row["total_amount"]
+        totals["paid_revenue"] += row["total_amount"] if paid else 0
+        totals["pending_count"] += 0 if paid else 1
+        totals["outstanding_amount"] += row["remaining_amount"]
+
+    table = CompanyDailyKpi.__table__
+    stmt = dialect_insert(db, table).values(company_id=company_id, day=day, **totals)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.company_id, table.c.day],
+        set_={key: table.c[key] + value for key, value in totals.items()},
+    )
+    db.execute(stmt)
+
+
+def import_bookings(db: Session, company_id: int, filename: str, file, dry_run: bool = False) -> dict:
+    """
+    Validates and imports a bookings sheet for one company. Returns the
+    report; with `dry_run` nothing is written. Raises BookingImportError
+    for problems with the file as a whole.
+    """
+    report = validate_rows(read_rows(filename, file))
+    check_batch(db, company_id, report)
+
+    if dry_run or not report.accepted:
+        return report.as_dict(imported=0, dry_run=dry_run)
+
+    created_at = datetime.now(timezone.utc)
+    values = [_booking_values(row, created_at) for _, row in report.accepted]
+
+    try:
+        ids = _insert_bookings(db, values)
+        _insert_assignments(db, [
+            {"driver_id": row["driver_id"], "travel_date": row["travel_date"], "booking_id": booking_id}
+            for booking_id, row in zip(ids, values)
+            if row["driver_id"]
+        ])
+        _record_ledger(db, values)
+        _record_kpis(db, company_id, created_at.date(), values)
+        db.commit()
+    except IntegrityError:
+        # a driver got booked through the form since check_batch ran
+        db.rollback()
+        raise BookingImportError("A driver was booked while the file was importing, nothing was imported. Please retry.")
+
+    return report.as_dict(imported=len(ids), dry_run=False)
@@ -0,0 +1,246 @@
+from collections import defaultdict
+from datetime import date, timedelta
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import Session
+
+from app.database.upsert import dialect_insert
+from app.models.driver import Driver
+from app.models.package_capacity import PackageDailyCapacity
+from app.models.tour_package import TourPackage, TourPackageDriver
+
+MAX_WINDOW_DAYS = 370
+
+# longest date window the catalogue availability search accepts
+MAX_SEARCH_DAYS = 62
+
+
+def _as_date(value) -> date:
+    return value if isinstance(value, date) else date.fromisoformat(str(value))
+
+
+def booking_seats(booking) -> int:
+    return (booking.adults or 0) + (booking.kids or 0)
+
+
+def package_capacity(db: Session, package_ids):
+    """
+    Returns {package_id: (drivers, seats)} for the drivers currently linked
+    to each package.
+    """
+    rows = (
+        db.query(
+            TourPackageDriver.tour_package_id,
+            func.count(TourPackageDriver.id),
+            func.coalesce(func.sum(Driver.seats), 0)
+        )
+        .join(Driver, Driver.id == TourPackageDriver.driver_id)
+        .filter(
+            TourPackageDriver.tour_package_id.in_(package_ids),
+            Driver.is_deleted == False
+        )
+        .group_by(TourPackageDriver.tour_package_id)
+        .all()
+    )
+
+    capacity = {package_id: (0, 0) for package_id in package_ids}
+    for package_id, drivers, seats in rows:
+        capacity[package_id] = (drivers, int(seats))
+
+    return capacity
+
+
+def record_booking(db: Session, booking):
+    """
+    Adds a booking to its package/day ledger row, creating the row if needed.
+    Does not commit.
+    """
+    drivers, seats = package_capacity(db, [booking.tour_package_id])[booking.tour_package_id]
+    booked = booking_seats(booking)
+
+    table = PackageDailyCapacity.__table__
+    stmt = dialect_insert(db, table).values(
+        tour_package_id=booking.tour_package_id,
+        travel_date=_as_date(booking.travel_date),
+        drivers_available=drivers,
+        seats_available=seats,
+        bookings_count=1,
+        seats_booked=booked,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.tour_package_id, table.c.travel_date],
+        set_={
+            "drivers_available": drivers,
+            "seats_available": seats,
+            "bookings_count": table.c.bookings_count + 1,
+            "seats_booked": table.c.seats_booked + booked,
+        },
+    )
+    db.execute(stmt)
+
+
+def release_booking(db: Session, booking):
+    """
+    Removes a booking from its package/day ledger row. Does not commit.
+    """
+    db.query(PackageDailyCapacity).filter(
+        PackageDailyCapacity.tour_package_id == booking.tour_package_id,
+        PackageDailyCapacity.travel_date == _as_date(booking.travel_date)
+    ).update(
+        {
+            PackageDailyCapacity.bookings_count: PackageDailyCapacity.bookings_count - 1,
+            PackageDailyCapacity.seats_booked: PackageDailyCapacity.seats_booked - booking_seats(booking),
+        },
+        synchronize_session=False
+    )
+
+
+def refresh_package_capacity(db: Session, package_ids):
+    """
+    Re-stamps drivers/seats available on every ledger row of the given
+    packages, after their driver links or a driver's seats changed.
+    Does not commit.
+    """
+    package_ids = list(set(package_ids))
+    if not package_ids:
+        return
+
+    for package_id, (drivers, seats) in package_capacity(db, package_ids).items():
+        db.query(PackageDailyCapacity).filter(
+            PackageDailyCapacity.tour_package_id == package_id
+        ).update(
+            {
+                PackageDailyCapacity.drivers_available: drivers,
+                PackageDailyCapacity.seats_available: seats,
+            },
+            synchronize_session=False
+        )
+
+
+def refresh_driver_capacity(db: Session, driver_id: int):
+    package_ids = [
+        row[0]
+        for row in db.query(TourPackageDriver.tour_package_id)
+        .filter(TourPackageDriver.driver_id == driver_id)
+        .all()
+    ]
+    refresh_package_capacity(db, package_ids)
+
+
+def capacity_window(db: Session, package_id: int, start: date, end: date):
+    """
+    Ledger rows for one package with start <= travel_date < end, keyed by date.
+    """
+    end = min(end, start + timedelta(days=MAX_WINDOW_DAYS))
+
+    rows = (
+        db.query(PackageDailyCapacity)
+        .filter(
+            PackageDailyCapacity.tour_package_id == package_id,
+            PackageDailyCapacity.travel_date >= start,
+            PackageDailyCapacity.travel_date < end
+        )
+        .all()
+    )
+
+    return {row.travel_date: row for row in rows}
+
+
+# -------------------------------------------------
+# Availability search (many packages, date window)
+# -------------------------------------------------
+# A day is available for a party when, as on the booking calendar, at least
+# one linked driver is left and the seats left cover the party. Days without
+# a ledger row have the package's full capacity, so only the ledger rows
+# inside the window need reading.
+def _full_day(party_size: int):
+    return or_(
+        PackageDailyCapacity.drivers_available - PackageDailyCapacity.bookings_count <= 0,
+        PackageDailyCapacity.seats_available - PackageDailyCapacity.seats_booked < party_size
+    )
+
+
+def _capacity_totals():
+    return (
+        select(
+            TourPackageDriver.tour_package_id,
+            func.count(TourPackageDriver.id).label("drivers"),
+            func.coalesce(func.sum(Driver.seats), 0).label("seats")
+        )
+        .join(Driver, Driver.id == TourPackageDriver.driver_id)
+        .where(Driver.is_deleted == False)
+        .group_by(TourPackageDriver.tour_package_id)
+    )
+
+
+def search_window(start: date, end: date = None) -> tuple:
+    """Inclusive (start, end), one day by default, clamped to MAX_SEARCH_DAYS."""
+    end = end if end and end >= start else start
+    return start, min(end, start + timedelta(days=MAX_SEARCH_DAYS - 1))
+
+
+def available_filter(start: date, end: date, party_size: int = 1):
+    """
+    WHERE clause on TourPackage: some day between start and end (inclusive)
+    still has a driver and `party_size` seats free.
+    """
+    days = (end - start).days + 1
+    totals = _capacity_totals().subquery()
+
+    full_days = (
+        select(func.count())
+        .where(
+            PackageDailyCapacity.tour_package_id == TourPackage.id,
+            PackageDailyCapacity.travel_date.between(start, end),
+            _full_day(party_size)
+        )
+        .correlate(TourPackage)
+        .scalar_subquery()
+    )
+
+    return and_(
+        TourPackage.id.in_(
+            select(totals.c.tour_package_id).where(
+                totals.c.drivers > 0,
+                totals.c.seats >= party_size
+            )
+        ),
+        full_days < days
+    )
+
+
+def available_dates(db: Session, package_ids, start: date, end: date, party_size: int = 1) -> dict:
+    """
+    {package_id: [dates]} of the days between start and end (inclusive)
+    each package can still take `party_size` guests on. Two queries for
+    any number of packages.
+    """
+    package_ids = list(set(package_ids))
+    if not package_ids:
+        return {}
+
+    totals = {
+        package_id: (drivers, int(seats))
+        for package_id, drivers, seats in db.execute(
+            _capacity_totals().where(TourPackageDriver.tour_package_id.in_(package_ids))
+        )
+    }
+
+    full = defaultdict(set)
+    for package_id, travel_date in db.execute(
+        select(PackageDailyCapacity.tour_package_id, PackageDailyCapacity.travel_date).where(
+            PackageDailyCapacity.tour_package_id.in_(package_ids),
+            PackageDailyCapacity.travel_date.between(start, end),
+            _full_day(party_size)
+        )
+    ):
+        full[package_id].add(travel_date)
+
+    days = [start + timedelta(days=n) for n in range((end - start).days + 1)]
+    result = {}
+    for package_id in package_ids:
+        drivers, seats = totals.get(package_id, (0, 0))
+        if drivers == 0 or seats < party_size:
+            result[package_id] = []
+        else:
+            result[package_id] = [day for day in days if day not in full[package_id]]
+    return result
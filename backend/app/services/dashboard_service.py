@@ -0,0 +1,62 @@
+from datetime import date
+from sqlalchemy import extract, func
+from sqlalchemy.orm import Session
+
+from app.models.company_kpi import CompanyDailyKpi
+
+
+def booking_stats_for_year(db: Session, company_id: int, year: int):
+    """
+    Bookings created per month and paid revenue per month for one company,
+    read from the daily KPI rollups in a single grouped query (at most 366
+    rows scanned). Returns two lists of 12 values (Jan..Dec).
+    """
+    month = extract("month", CompanyDailyKpi.day).label("month")
+
+    rows = (
+        db.query(
+            month,
+            func.coalesce(func.sum(CompanyDailyKpi.bookings_created), 0),
+            func.coalesce(func.sum(CompanyDailyKpi.paid_revenue), 0)
+        )
+        .filter(
+            CompanyDailyKpi.company_id == company_id,
+            CompanyDailyKpi.day >= date(year, 1, 1),
+            CompanyDailyKpi.day < date(year + 1, 1, 1)
+        )
+        .group_by(month)
+        .all()
+    )
+
+    bookings = [0] * 12
+    revenue = [0.0] * 12
+    for m, count, paid in rows:
+        bookings[int(m) - 1] = int(count)
+        revenue[int(m) - 1] = float(paid)
+
+    return bookings, revenue
+
+
+def kpi_totals(db: Session, company_id: int) -> dict:
+    """
+    All-time KPI totals for one company, summed from its daily rollups.
+    """
+    row = (
+        db.query(
+            func.coalesce(func.sum(CompanyDailyKpi.bookings_created), 0),
+            func.coalesce(func.sum(CompanyDailyKpi.revenue), 0),
+            func.coalesce(func.sum(CompanyDailyKpi.paid_revenue), 0),
+            func.coalesce(func.sum(CompanyDailyKpi.pending_count), 0),
+            func.coalesce(func.sum(CompanyDailyKpi.outstanding_amount), 0)
+        )
+        .filter(CompanyDailyKpi.company_id == company_id)
+        .one()
+    )
+
+    return {
+        "total_bookings": int(row[0]),
+        "total_revenue": float(row[1]),
+        "paid_revenue": float(row[2]),
+        "pending_payments": int(row[3]),
+        "outstanding_amount": float(row[4]),
+    }
@@ -0,0 +1,57 @@
+from datetime import date
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.database.upsert import dialect_insert
+from app.models.driver_assignment import DriverAssignment
+
+
+def _as_date(value) -> date:
+    return value if isinstance(value, date) else date.fromisoformat(str(value))
+
+
+def reserve_driver(db: Session, driver_id: int, travel_date, booking_id: int) -> bool:
+    """
+    Claims `driver_id` for `travel_date` on behalf of a booking with a single
+    INSERT ... ON CONFLICT DO NOTHING. Returns False when another booking
+    already holds the driver that day. Does not commit.
+    """
+    table = DriverAssignment.__table__
+
+    stmt = (
+        dialect_insert(db, table)
+        .values(
+            driver_id=driver_id,
+            travel_date=_as_date(travel_date),
+            booking_id=booking_id,
+        )
+        .on_conflict_do_nothing(
+            index_elements=[table.c.driver_id, table.c.travel_date]
+        )
+        .returning(table.c.id)
+    )
+
+    return db.execute(stmt).first() is not None
+
+
+def release_driver(db: Session, booking_id: int):
+    """
+    Frees whatever driver/day the booking holds. Does not commit.
+    """
+    db.query(DriverAssignment).filter(
+        DriverAssignment.booking_id == booking_id
+    ).delete(synchronize_session=False)
+
+
+def booked_drivers_on(db: Session, travel_date, exclude_booking_id: int = None):
+    """
+    SELECT of driver ids already taken on `travel_date`, for use in IN().
+    """
+    query = select(DriverAssignment.driver_id).where(
+        DriverAssignment.travel_date == _as_date(travel_date)
+    )
+
+    if exclude_booking_id:
+        query = query.where(DriverAssignment.booking_id != exclude_booking_id)
+
+    return query
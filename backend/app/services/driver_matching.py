@@ -0,0 +1,263 @@
+"""
+Automatic driver assignment for the unassigned bookings of a date range.
+
+Each travel day is a bipartite matching problem: bookings on one side,
+the company's drivers still free that day on the other, with an edge
+where the driver is linked to the booking's package (TourPackageDriver)
+and has `seats >= adults + kids`. Hopcroft-Karp finds a maximum matching,
+so no booking is left without a driver when some rearrangement of the
+drivers would have covered it. Among equally large matchings it leans to
+the smallest vehicle that fits, keeping the big ones for big parties.
+
+The inputs come from three set-based queries for the whole range and the
+result is written in one transaction. A driver booked by hand in the
+meantime hits the driver/day unique constraint and rolls the run back.
+"""
+from bisect import bisect_left
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from datetime import date
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.driver import Driver
+from app.models.driver_assignment import DriverAssignment
+from app.models.manual_booking import ManualBooking
+from app.models.tour_package import TourPackage, TourPackageDriver
+
+MAX_DAYS = 31
+
+UNMATCHED = -1
+
+
+class AutoAssignError(Exception):
+    """The run can't be done as requested, the message is safe to show."""
+
+
+@dataclass(frozen=True)
+class OpenBooking:
+    id: int
+    travel_date: date
+    tour_package_id: int
+    party: int
+
+
+# -------------------------------------------------
+# Matching
+# -------------------------------------------------
+def max_matching(adjacency: list, right_count: int) -> list:
+    """
+    Hopcroft-Karp. `adjacency[u]` lists the right vertices of left vertex
+    u in order of preference. Returns, per left vertex, its matched right
+    vertex or UNMATCHED.
+    """
+    left_count = len(adjacency)
+    match_left = [UNMATCHED] * left_count
+    match_right = [UNMATCHED] * right_count
+
+    # greedy start, most of the matching is settled here
+    for u, edges in enumerate(adjacency):
+        for v in edges:
+            if match_right[v] == UNMATCHED:
+                match_left[u] = v
+                match_right[v] = u
+                break
+
+    while True:
+        # BFS: layer the graph from every free left vertex
+        free = [u for u in range(left_count) if match_left[u] == UNMATCHED and adjacency[u]]
+        layer = [None] * left_count
+        queue = deque(free)
+        for u in free:
+            layer[u] = 0
+
+        reachable = False
+        while queue:
+            u = queue.popleft()
+            for v in adjacency[u]:
+                w = match_right[v]
+                if w == UNMATCHED:
+                    reachable = True
+                elif layer[w] is None:
+                    layer[w] = layer[u] + 1
+                    queue.append(w)
+
+        if not reachable:
+            return match_left
+
+        # DFS (iterative): vertex-disjoint shortest augmenting paths
+        position = [0] * left_count
+        for root in free:
+            stack = [root]
+            via = []
+            while stack:
+                u = stack[-1]
+                if position[u] == len(adjacency[u]):
+                    layer[u] = None  # dead end for the rest of this phase
+                    stack.pop()
+                    if via:
+                        via.pop()
+                    continue
+
+                v = adjacency[u][position[u]]
+                position[u] += 1
+                w = match_right[v]
+
+                if w == UNMATCHED:
+                    via.append(v)
+                    for left, right in zip(stack, via):
+                        match_left[left] = right
+                        match_right[right] = left
+                    break
+
+                if layer[w] is not None and layer[w] == layer[u] + 1:
+                    stack.append(w)
+                    via.append(v)
+
+
+def match_day(bookings: list, drivers: dict, links: dict) -> dict:
+    """
+    {booking id: driver id} for one day. `drivers` maps the free drivers
+    to their seats, `links` a package id to the drivers linked to it.
+    """
+    # big parties first, they have the fewest options
+    bookings = sorted(bookings, key=lambda b: (-b.party, b.id))
+    driver_ids = sorted(drivers)
+    index = {driver_id: i for i, driver_id in enumerate(driver_ids)}
+
+    # per package, its free drivers by seats: the drivers that fit a party
+    # are a suffix of that list, smallest vehicle first
+    by_package = {}
+    for package_id in {b.tour_package_id for b in bookings}:
+        linked = sorted(
+            (drivers[driver_id], driver_id)
+            for driver_id in links.get(package_id, ())
+            if driver_id in drivers
+        )
+        by_package[package_id] = ([seats for seats, _ in linked], [index[d] for _, d in linked])
+
+    adjacency = []
+    for booking in bookings:
+        seats, vertices = by_package[booking.tour_package_id]
+        adjacency.append(vertices[bisect_left(seats, booking.party):])
+
+    matching = max_matching(adjacency, len(driver_ids))
+    return {
+        booking.id: driver_ids[v]
+        for booking, v in zip(bookings, matching)
+        if v != UNMATCHED
+    }
+
+
+# -------------------------------------------------
+# Loading and writing
+# -------------------------------------------------
+def _open_bookings(db: Session, company_id: int, start: date, end: date) -> list:
+    rows = db.execute(
+        select(
+            ManualBooking.id,
+            ManualBooking.travel_date,
+            ManualBooking.tour_package_id,
+            ManualBooking.adults + ManualBooking.kids,
+        )
+        .join(TourPackage, TourPackage.id == ManualBooking.tour_package_id)
+        .outerjoin(DriverAssignment, DriverAssignment.booking_id == ManualBooking.id)
+        .where(
+            TourPackage.company_id == company_id,
+            ManualBooking.is_deleted == False,
+            ManualBooking.driver_id.is_(None),
+            DriverAssignment.id.is_(None),
+            ManualBooking.travel_date.between(start, end)
+        )
+    ).all()
+    return [OpenBooking(*row) for row in rows]
+
+
+def _package_drivers(db: Session, company_id: int, package_ids) -> tuple:
+    """({package id: [driver ids]}, {driver id: seats}) for the linked, live drivers."""
+    rows = db.execute(
+        select(TourPackageDriver.tour_package_id, Driver.id, Driver.seats)
+        .join(Driver, Driver.id == TourPackageDriver.driver_id)
+        .where(
+            TourPackageDriver.tour_package_id.in_(package_ids),
+            Driver.company_id == company_id,
+            Driver.is_deleted == False,
+            Driver.seats.is_not(None)
+        )
+    ).all()
+
+    links = defaultdict(list)
+    seats = {}
+    for package_id, driver_id, driver_seats in rows:
+        links[package_id].append(driver_id)
+        seats[driver_id] = driver_seats
+    return links, seats
+
+
+def _taken(db: Session, driver_ids, start: date, end: date) -> set:
+    return set(db.execute(
+        select(DriverAssignment.driver_id, DriverAssignment.travel_date).where(
+            DriverAssignment.driver_id.in_(driver_ids),
+            DriverAssignment.travel_date.between(start, end)
+        )
+    ).tuples())
+
+
+def auto_assign_drivers(db: Session, company_id: int, start: date, end: date = None, dry_run: bool = False) -> dict:
+    """
+    Assigns drivers to the company's unassigned bookings travelling between
+    `start` and `end` (inclusive, one day by default) and commits. With
+    `dry_run` the proposed assignments are returned but not written.
+    """
+    end = end or start
+    if end < start:
+        raise AutoAssignError("The end date is before the start date")
+    if (end - start).days >= MAX_DAYS:
+        raise AutoAssignError(f"Pick a range of at most {MAX_DAYS} days")
+
+    bookings = _open_bookings(db, company_id, start, end)
+    links, seats = _package_drivers(db, company_id, {b.tour_package_id for b in bookings})
+    taken = _taken(db, list(seats), start, end) if seats else set()
+
+    by_day = defaultdict(list)
+    for booking in bookings:
+        by_day[booking.travel_date].append(booking)
+
+    assignments = []
+    days = []
+    for day in sorted(by_day):
+        free = {driver_id: s for driver_id, s in seats.items() if (driver_id, day) not in taken}
+        matched = match_day(by_day[day], free, links)
+        assignments.extend(
+            {"booking_id": booking_id, "driver_id": driver_id, "travel_date": day}
+            for booking_id, driver_id in sorted(matched.items())
+        )
+        days.append({
+            "date": day.isoformat(),
+            "bookings": len(by_day[day]),
+            "assigned": len(matched),
+            "unassigned": sorted(b.id for b in by_day[day] if b.id not in matched),
+        })
+
+    if assignments and not dry_run:
+        try:
+            db.execute(insert(DriverAssignment), assignments)
+            db.execute(update(ManualBooking), [
+                {"id": row["booking_id"], "driver_id": row["driver_id"]} for row in assignments
+            ])
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            raise AutoAssignError("A driver was booked while assigning, nothing was changed. Please retry.")
+
+    return {
+        "dry_run": dry_run,
+        "bookings": len(bookings),
+        "assigned": len(assignments),
+        "days": days,
+        "assignments": [
+            {"booking_id": row["booking_id"], "driver_id": row["driver_id"]} for row in assignments
+        ],
+    }
@@ -0,0 +1,293 @@
+"""
+Resized, re-encoded copies of uploaded images.
+
+Every upload (tour gallery, company logo, driver photo) keeps its original
+file, stored by app/services/storage.py (local backend). Next to it, under
+a `variants/` directory, a process pool writes the image at each of WIDTHS
+(never upscaled) as AVIF, WebP and JPEG with the metadata dropped:
+
+    uploads/tours/9f86d0...jpg
+    uploads/tours/variants/9f86d0...-480.avif
+    uploads/tours/variants/9f86d0...-480.webp
+    uploads/tours/variants/9f86d0...-480.jpg
+    ...
+    uploads/tours/variants/9f86d0....json      # written last
+
+The JSON manifest marks the set as complete. Templates build `srcset` from
+it (see partials/_picture.html) and fall back to the original until it
+exists.
+"""
+import json
+import logging
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+
+from PIL import Image, ImageOps, features
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+STATIC_DIR = settings.STORAGE_LOCAL_ROOT
+VARIANT_DIR = "variants"
+
+# card thumbnails at 1x/2x, the detail hero, a large modal view
+WIDTHS = (160, 480, 960, 1600)
+
+# (format, extension, Pillow save options), best compression first
+ENCODINGS = [
+    ("avif", "avif", {"format": "AVIF", "quality": 55, "speed": 8}),
+    ("webp", "webp", {"format": "WEBP", "quality": 78, "method": 4}),
+    ("jpeg", "jpg", {"format": "JPEG", "quality": 80, "optimize": True, "progressive": True}),
+]
+EXTENSIONS = {fmt: ext for fmt, ext, _ in ENCODINGS}
+
+
+def _paths(image_path: str):
+    """(variant directory, file stem) for an image path relative to static."""
+    directory, filename = os.path.split(image_path)
+    return os.path.join(directory, VARIANT_DIR), os.path.splitext(filename)[0]
+
+
+def variant_path(image_path: str, width: int, fmt: str) -> str:
+    directory, stem = _paths(image_path)
+    return f"{directory}/{stem}-{width}.{EXTENSIONS[fmt]}"
+
+
+def manifest_path(image_path: str) -> str:
+    directory, stem = _paths(image_path)
+    return f"{directory}/{stem}.json"
+
+
+def _flatten(image: Image.Image) -> Image.Image:
+    """RGB copy with any transparency composited onto white (for JPEG)."""
+    if image.mode == "RGB":
+        return image
+    rgba = image.convert("RGBA")
+    background = Image.new("RGB", rgba.size, (255, 255, 255))
+    background.paste(rgba, mask=rgba.getchannel("A"))
+    return background
+
+
+# -------------------------------------------------
+# Worker side (runs in the process pool)
+# -------------------------------------------------
+def generate_variants(image_path: str, static_dir: str = STATIC_DIR) -> dict:
+    """
+    Writes every width/format of `image_path` and then its manifest.
+    Returns the manifest.
+    """
+    source = os.path.join(static_dir, image_path)
+
+    with Image.open(source) as original:
+        # bake the EXIF orientation into the pixels, the tags themselves are
+        # not carried over to the variants
+        image = ImageOps.exif_transpose(original)
+        image.load()
+
+    if image.mode not in ("RGB", "RGBA"):
+        has_alpha = image.mode in ("LA", "PA") or "transparency" in image.info
+        image = image.convert("RGBA" if has_alpha else "RGB")
+
+    width, height = image.size
+    widths = [w for w in WIDTHS if w <= width] or [width]
+    if width < WIDTHS[-1] and widths[-1] != width:
+        widths.append(width)
+
+    encodings = [
+        (fmt, ext, options) for fmt, ext, options in ENCODINGS
+        if fmt != "avif" or features.check("avif")
+    ]
+
+    os.makedirs(os.path.join(static_dir, _paths(image_path)[0]), exist_ok=True)
+
+    for w in widths:
+        resized = image if w == width else image.resize(
+            (w, max(1, round(height * w / width))), Image.Resampling.LANCZOS
+        )
+        for fmt, _, options in encodings:
+            frame = _flatten(resized) if fmt == "jpeg" else resized
+            frame.save(os.path.join(static_dir, variant_path(image_path, w, fmt)), **options)
+
+    manifest = {
+        "width": width,
+        "height": height,
+        "widths": widths,
+        "formats": [fmt for fmt, _, _ in encodings],
+    }
+
+    target = os.path.join(static_dir, manifest_path(image_path))
+    with open(target + ".tmp", "w") as f:
+        json.dump(manifest, f)
+    os.replace(target + ".tmp", target)
+
+    return manifest
+
+
+def delete_variants(image_path: str, static_dir: str = STATIC_DIR):
+    manifest = read_manifest(image_path, static_dir)
+    variant_cache.discard(image_path)
+    if manifest is None:
+        return
+
+    os.remove(os.path.join(static_dir, manifest_path(image_path)))
+    for w in manifest["widths"]:
+        for fmt in manifest["formats"]:
+            path = os.path.join(static_dir, variant_path(image_path, w, fmt))
+            if os.path.exists(path):
+                os.remove(path)
+
+
+# -------------------------------------------------
+# App side
+# -------------------------------------------------
+class ImagePool:
+    """
+    Lazily started process pool for `generate_variants`, so encoding never
+    holds the GIL of a web worker. The pool uses spawn, forking a process
+    that already runs uvicorn and the outbox threads is unsafe.
+
+    Jobs live only in memory. Anything lost to a restart is picked up by
+    `python -m app.commands.build_image_variants`.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor.submit(fn, *args)
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+image_pool = ImagePool(max_workers=settings.IMAGE_WORKERS)
+
+
+def _variants_done(image_path: str, refresh_catalogue: bool, future):
+    error = future.exception()
+    if error is not None:
+        logger.warning("Image variants for %s failed: %s", image_path, error)
+        return
+
+    if refresh_catalogue:
+        # cached public pages were rendered without the srcset
+        from app.database.session import SessionLocal
+        from app.utils.page_cache import bump_catalogue_version
+
+        db = SessionLocal()
+        try:
+            bump_catalogue_version(db)
+            db.commit()
+        finally:
+            db.close()
+
+
+def enqueue_variants(image_path: str, refresh_catalogue: bool = False):
+    """
+    Schedules variant generation for a freshly saved upload and returns
+    immediately (None when a re-upload of the same content already has
+    them). `refresh_catalogue` bumps the public page cache once the
+    variants are on disk.
+    """
+    if read_manifest(image_path) is not None:
+        return None
+
+    future = image_pool.submit(generate_variants, image_path)
+    future.add_done_callback(partial(_variants_done, image_path, refresh_catalogue))
+    return future
+
+
+# -------------------------------------------------
+# Templates
+# -------------------------------------------------
+@dataclass(frozen=True)
+class ImageVariants:
+    image_path: str
+    width: int
+    height: int
+    widths: tuple
+    formats: tuple
+
+    def path(self, width: int, fmt: str) -> str:
+        return variant_path(self.image_path, width, fmt)
+
+    @property
+    def largest(self) -> str:
+        fmt = "webp" if "webp" in self.formats else "jpeg"
+        return self.path(self.widths[-1], fmt)
+
+
+def read_manifest(image_path: str, static_dir: str = STATIC_DIR) -> dict | None:
+    try:
+        with open(os.path.join(static_dir, manifest_path(image_path))) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+class VariantCache:
+    """
+    Manifests already read, per process. Upload names are unique, so a
+    manifest never changes once written; missing ones are not remembered
+    and get checked again on the next render.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, image_path: str) -> ImageVariants | None:
+        with self._lock:
+            variants = self._entries.get(image_path)
+            if variants is not None:
+                self._entries.move_to_end(image_path)
+                return variants
+
+        manifest = read_manifest(image_path)
+        if manifest is None:
+            return None
+
+        variants = ImageVariants(
+            image_path=image_path,
+            width=manifest["width"],
+            height=manifest["height"],
+            widths=tuple(manifest["widths"]),
+            formats=tuple(manifest["formats"]),
+        )
+        with self._lock:
+            self._entries[image_path] = variants
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return variants
+
+    def discard(self, image_path: str):
+        with self._lock:
+            self._entries.pop(image_path, None)
+
+
+variant_cache = VariantCache()
+
+
+def image_variants(image_path: str | None) -> ImageVariants | None:
+    """Jinja global: the generated variants of an upload, or None."""
+    if not image_path:
+        return None
+    return variant_cache.get(image_path)
@@ -0,0 +1,57 @@
+from datetime import date
+from sqlalchemy.orm import Session
+
+from app.database.upsert import dialect_insert
+from app.models.company_kpi import CompanyDailyKpi
+from app.models.tour_package import TourPackage
+
+
+def _booking_day(booking) -> date:
+    created_at = booking.created_at
+    return created_at.date() if created_at else date.today()
+
+
+def _contribution(booking) -> dict:
+    paid = booking.payment_status == "paid"
+    return {
+        "bookings_created": 1,
+        "revenue": booking.total_amount or 0,
+        "paid_revenue": (booking.total_amount or 0) if paid else 0,
+        "pending_count": 0 if paid else 1,
+        "outstanding_amount": booking.remaining_amount or 0,
+    }
+
+
+def _apply(db: Session, booking, sign: int):
+    company_id = db.get(TourPackage, booking.tour_package_id).company_id
+    deltas = {
+        key: value * sign
+        for key, value in _contribution(booking).items()
+    }
+
+    table = CompanyDailyKpi.__table__
+    stmt = dialect_insert(db, table).values(
+        company_id=company_id,
+        day=_booking_day(booking),
+        **deltas
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.company_id, table.c.day],
+        set_={key: table.c[key] + value for key, value in deltas.items()},
+    )
+    db.execute(stmt)
+
+
+def record_booking_kpis(db: Session, booking):
+    """
+    Adds a (flushed) booking to its company's rollup row. Does not commit.
+    """
+    _apply(db, booking, 1)
+
+
+def release_booking_kpis(db: Session, booking):
+    """
+    Takes a booking's current values back out of the rollup. Call it before
+    mutating or deleting the booking. Does not commit.
+    """
+    _apply(db, booking, -1)
@@ -0,0 +1,187 @@
+"""
+Upload storage shared by every upload form (tour images, company logos,
+driver photos).
+
+Uploads are streamed in CHUNK_SIZE pieces into a spool file while being
+hashed, and rejected as soon as they pass the size limit. The stored name
+is the SHA-256 of the content, so re-uploading the same image reuses the
+existing file:
+
+    uploads/tours/9f86d081884c7d65...0a08.jpg
+
+Keys are paths relative to the static directory, which is what the models
+store and what `url_for('static', path=...)` expects. Where the bytes live
+is up to the StorageBackend (STORAGE_BACKEND, local disk by default).
+
+The upload routes are plain `def`, so all of this runs in the threadpool
+and never blocks the event loop.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import BinaryIO
+
+from fastapi import UploadFile
+
+from app.core.config import settings
+
+CHUNK_SIZE = 1024 * 1024
+
+IMAGE_EXTENSIONS = {"jpg", "jpeg", "png", "gif", "webp", "avif", "bmp", "tif", "tiff", "heic"}
+
+
+class UploadRejected(Exception):
+    """The upload can't be stored, the message is safe to show the user."""
+
+
+@dataclass(frozen=True)
+class StoredUpload:
+    key: str
+    size: int
+    created: bool  # False when identical content was already stored
+
+
+class StorageBackend(ABC):
+    """
+    Where uploaded files end up. A backend only moves finished files
+    around, hashing and size checks happen before it is called.
+
+    `spool_dir` is where uploads are buffered first; a backend that can
+    rename from there (same filesystem) avoids a second copy.
+    """
+
+    spool_dir = None
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def put_file(self, key: str, local_path: str):
+        """Moves a finished spool file to `key`. The spool file is consumed."""
+
+    @abstractmethod
+    def open(self, key: str) -> BinaryIO:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str):
+        ...
+
+
+class LocalStorage(StorageBackend):
+    """Files under the static directory, served by the /static mount."""
+
+    def __init__(self, root: str):
+        self.root = root
+        # next to the root (same filesystem, so put_file is a rename) but
+        # outside of it, half-written uploads must not be servable
+        self.spool_dir = os.path.join(os.path.dirname(os.path.normpath(root)), ".upload-spool")
+        os.makedirs(self.spool_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        path = os.path.normpath(os.path.join(self.root, key))
+        if not path.startswith(os.path.normpath(self.root) + os.sep):
+            raise ValueError(f"Key outside storage root: {key}")
+        return path
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def put_file(self, key: str, local_path: str):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.chmod(local_path, 0o644)
+        # same content under the same name, so a concurrent writer winning
+        # the race is harmless
+        shutil.move(local_path, path)
+
+    def open(self, key: str) -> BinaryIO:
+        return open(self._path(key), "rb")
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+
+BACKENDS = {
+    "local": lambda: LocalStorage(settings.STORAGE_LOCAL_ROOT),
+}
+
+
+def create_storage(name: str) -> StorageBackend:
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown STORAGE_BACKEND {name!r}, expected one of {sorted(BACKENDS)}") from None
+
+
+storage = create_storage(settings.STORAGE_BACKEND)
+
+
+def _extension(filename: str, allowed) -> str:
+    ext = os.path.splitext(filename or "")[1].lstrip(".").lower()
+    if ext not in allowed:
+        raise UploadRejected(f"Unsupported file type .{ext or '?'}")
+    return ext
+
+
+def _spool(source: BinaryIO, max_bytes: int, spool_dir: str | None):
+    """Copies `source` to a temp file chunk by chunk. Returns (path, sha256, size)."""
+    digest = hashlib.sha256()
+    size = 0
+    fd, path = tempfile.mkstemp(dir=spool_dir, prefix="upload-")
+
+    try:
+        with os.fdopen(fd, "wb") as spool:
+            while chunk := source.read(CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadRejected(
+                        f"File is larger than {max_bytes // (1024 * 1024)} MB"
+                    )
+                digest.update(chunk)
+                spool.write(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+
+    if size == 0:
+        os.remove(path)
+        raise UploadRejected("File is empty")
+
+    return path, digest.hexdigest(), size
+
+
+def save_upload(
+    file: UploadFile,
+    folder: str,
+    *,
+    allowed=IMAGE_EXTENSIONS,
+    max_bytes: int = None,
+    backend: StorageBackend = None,
+) -> StoredUpload:
+    """
+    Stores `file` as `<folder>/<sha256>.<ext>`. Raises UploadRejected for a
+    disallowed extension, an empty file or one over `max_bytes`
+    (MAX_UPLOAD_MB by default).
+    """
+    backend = backend or storage
+    max_bytes = max_bytes or settings.MAX_UPLOAD_MB * 1024 * 1024
+    ext = _extension(file.filename, allowed)
+
+    file.file.seek(0)
+    path, digest, size = _spool(file.file, max_bytes, backend.spool_dir)
+    key = f"{folder}/{digest}.{ext}"
+
+    if backend.exists(key):
+        os.remove(path)
+        return StoredUpload(key=key, size=size, created=False)
+
+    backend.put_file(key, path)
+    return StoredUpload(key=key, size=size, created=True)
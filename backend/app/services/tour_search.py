@@ -0,0 +1,108 @@
+import math
+import re
+from sqlalchemy import bindparam, func, literal, literal_column, or_, select, text
+from sqlalchemy.orm import Session, selectinload
+
+from app.models.tour_package import TourPackage
+from app.services.capacity_service import available_filter
+from app.utils.datatable import count_statement
+
+PER_PAGE = 12
+MAX_TERMS = 8
+
+# Search columns live only in the database (see migration c2d7a9e4f1b6):
+#   postgres: tour_packages.search_vector (weighted tsvector over title,
+#             city/country, description, itinerary) and search_text
+#             (title/city/country, trigram indexed for typos)
+#   sqlite:   tour_packages_fts, an FTS5 table kept in sync by triggers
+SEARCH_VECTOR = literal_column("tour_packages.search_vector")
+SEARCH_TEXT = literal_column("tour_packages.search_text")
+
+# title, city, country, description, itinerary
+FTS5_RANK = "bm25(tour_packages_fts, 10.0, 5.0, 5.0, 2.0, 1.0)"
+
+
+def search_terms(term: str):
+    return re.findall(r"\w+", (term or "").lower())[:MAX_TERMS]
+
+
+def _postgres_match(term: str, terms):
+    # every word must match, the last one as a prefix so typing "dub" finds Dubai
+    query = func.to_tsquery(
+        literal_column("'english'::regconfig"),
+        " & ".join(terms[:-1] + [f"{terms[-1]}:*"])
+    )
+    match = or_(
+        SEARCH_VECTOR.op("@@")(query),
+        literal(term).op("<%")(SEARCH_TEXT)
+    )
+    rank = func.ts_rank_cd(SEARCH_VECTOR, query) + func.word_similarity(term, SEARCH_TEXT)
+    return match, rank
+
+
+def _sqlite_match(terms):
+    # implicit AND of prefix queries: "dub"* "desert"*
+    return (
+        select(
+            literal_column("rowid").label("id"),
+            literal_column(f"-{FTS5_RANK}").label("rank")
+        )
+        .select_from(text("tour_packages_fts"))
+        .where(text("tour_packages_fts MATCH :fts_query").bindparams(
+            bindparam("fts_query", " ".join(f'"{t}"*' for t in terms))
+        ))
+        .subquery()
+    )
+
+
+def search_public_tours(db: Session, term: str, page: int = 1, per_page: int = PER_PAGE, available: tuple = None):
+    """
+    One page of active tours matching `term`, best match first (newest first
+    without a term). `available` is (start, end, party size): only tours
+    with room for the party on some day of that window are kept.
+
+    Returns the same dict as utils.pagination.paginate.
+    """
+    page = max(page, 1)
+
+    stmt = select(TourPackage.id).where(
+        TourPackage.is_deleted == False,
+        TourPackage.status == "active"
+    )
+
+    if available:
+        stmt = stmt.where(available_filter(*available))
+
+    terms = search_terms(term)
+    dialect = db.get_bind().dialect.name
+
+    if not terms:
+        stmt = stmt.order_by(TourPackage.id.desc())
+    elif dialect == "postgresql":
+        match, rank = _postgres_match(term.strip(), terms)
+        stmt = stmt.where(match).order_by(rank.desc(), TourPackage.id.desc())
+    elif dialect == "sqlite":
+        fts = _sqlite_match(terms)
+        stmt = stmt.join(fts, fts.c.id == TourPackage.id).order_by(fts.c.rank.desc(), TourPackage.id.desc())
+    else:
+        raise NotImplementedError(f"Tour search is not supported on {dialect}")
+
+    total = db.scalar(count_statement(stmt))
+    ids = db.scalars(stmt.offset((page - 1) * per_page).limit(per_page)).all()
+
+    tours = {
+        tour.id: tour
+        for tour in db.scalars(
+            select(TourPackage)
+            .options(selectinload(TourPackage.gallery_images))
+            .where(TourPackage.id.in_(ids))
+        )
+    }
+
+    return {
+        "items": [tours[i] for i in ids if i in tours],
+        "page": page,
+        "per_page": per_page,
+        "total": total,
+        "total_pages": math.ceil(total / per_page) if total else 1
+    }
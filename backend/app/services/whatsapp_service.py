@@ -1,22 +1,16 @@
 import requests
-import os
 import logging
+from datetime import datetime, timezone
+from requests.adapters import HTTPAdapter
 
-logger = logging.getLogger(__name__)
-
-WHATSAPP_API_URL = "https://graph.facebook.com/v17.0"
-
-
-def send_whatsapp_booking_confirmation(phone_number: str, booking):
-    access_token = os.getenv("WHATSAPP_ACCESS_TOKEN")
-    phone_number_id = os.getenv("WHATSAPP_PHONE_NUMBER_ID")
+from app.core.config import settings
+from app.models.whatsapp_outbox import WhatsAppOutbox
 
-    if not access_token or not phone_number_id:
-        raise ValueError("WhatsApp credentials missing")
+logger = logging.getLogger(__name__)
 
-    url = f"{WHATSAPP_API_URL}/{phone_number_id}/messages"
 
-    payload = {
+def build_booking_confirmation_payload(phone_number: str, booking) -> dict:
+    return {
         "messaging_product": "whatsapp",
         "to": phone_number,
         "type": "template",
@@ -46,18 +40,54 @@ def send_whatsapp_booking_confirmation(phone_number: str, booking):
         },
     }
 
-    headers = {
-        "Authorization": f"Bearer {access_token}",
+
+def enqueue_booking_confirmation(db, booking):
+    """
+    Queues the booking confirmation in the outbox. Does not commit, so the
+    message is only sent if the booking transaction commits.
+    """
+    phone_number = format_phone(booking.country_code, booking.phone)
+
+    db.add(
+        WhatsAppOutbox(
+            booking_id=booking.id,
+            phone_number=phone_number,
+            payload=build_booking_confirmation_payload(phone_number, booking),
+            status="pending",
+            next_attempt_at=datetime.now(timezone.utc),
+        )
+    )
+
+
+def create_http_session(pool_size: int) -> requests.Session:
+    """
+    Keep-alive session shared by the outbox workers, so each message reuses
+    a pooled TCP/TLS connection to the Graph API.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "Authorization": f"Bearer {settings.WHATSAPP_ACCESS_TOKEN}",
         "Content-Type": "application/json",
-    }
+    })
+    return session
+
+
+def send_whatsapp_message(session: requests.Session, payload: dict, api_url: str = None) -> dict:
+    if not settings.WHATSAPP_ACCESS_TOKEN or not settings.WHATSAPP_PHONE_NUMBER_ID:
+        raise ValueError("WhatsApp credentials missing")
+
+    url = f"{api_url or settings.WHATSAPP_API_URL}/{settings.WHATSAPP_PHONE_NUMBER_ID}/messages"
 
-    response = requests.post(url, json=payload, headers=headers, timeout=10)
+    response = session.post(url, json=payload, timeout=(3, 10))
 
     if response.status_code != 200:
         logger.error("WhatsApp error: %s", response.text)
         response.raise_for_status()
 
-    logger.info("WhatsApp booking confirmation sent to %s", phone_number)
+    logger.info("WhatsApp message sent to %s", payload.get("to"))
     return response.json()
 
 def format_phone(country_code: str, phone: str) -> str:
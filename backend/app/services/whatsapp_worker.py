@@ -0,0 +1,255 @@
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import requests
+
+from app.core.config import settings
+from app.database.session import SessionLocal
+from app.models.whatsapp_outbox import WhatsAppOutbox
+from app.services.whatsapp_service import create_http_session, send_whatsapp_message
+
+logger = logging.getLogger(__name__)
+
+# A claimed row that is still "sending" after this long belongs to a worker
+# that died mid-flight and is picked up again.
+SENDING_LEASE = timedelta(minutes=2)
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+class PerNumberRateLimiter:
+    """
+    Token bucket per phone number: `per_minute` messages, refilled evenly.
+    """
+
+    def __init__(self, per_minute: int, max_numbers: int = 10000):
+        self.capacity = max(per_minute, 1)
+        self.refill_per_second = self.capacity / 60.0
+        self.max_numbers = max_numbers
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, phone_number: str) -> float:
+        """
+        Takes a token and returns 0, or returns how many seconds to wait
+        before a token is available.
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            tokens, updated = self._buckets.get(phone_number, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated) * self.refill_per_second)
+
+            if tokens >= 1:
+                self._buckets[phone_number] = (tokens - 1, now)
+                wait = 0.0
+            else:
+                self._buckets[phone_number] = (tokens, now)
+                wait = (1 - tokens) / self.refill_per_second
+
+            if len(self._buckets) > self.max_numbers:
+                # drop buckets that have fully refilled, they carry no state
+                full = [
+                    number for number, (t, u) in self._buckets.items()
+                    if t + (now - u) * self.refill_per_second >= self.capacity
+                ]
+                for number in full:
+                    del self._buckets[number]
+
+        return wait
+
+
+class WhatsAppOutboxWorker:
+    """
+    Drains the whatsapp_outbox table with a bounded pool of sender threads.
+
+    A dispatcher thread claims due rows (FOR UPDATE SKIP LOCKED, so several
+    app processes can run a worker side by side) and hands them to the pool.
+    Failed sends are retried with exponential backoff until `max_attempts`.
+    """
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        api_url: str = None,
+        concurrency: int = settings.WHATSAPP_WORKERS,
+        max_attempts: int = settings.WHATSAPP_MAX_ATTEMPTS,
+        per_number_per_minute: int = settings.WHATSAPP_PER_NUMBER_PER_MINUTE,
+        poll_interval: float = 1.0,
+        backoff_base: float = 5.0,
+        backoff_max: float = 3600.0,
+    ):
+        self.session_factory = session_factory
+        self.api_url = api_url
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.rate_limiter = PerNumberRateLimiter(per_number_per_minute)
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._pool = None
+        self._http = None
+        self._thread = None
+
+    # -------------------------------------------------
+    # Lifecycle
+    # -------------------------------------------------
+    def start(self):
+        self._stop.clear()
+        self._http = create_http_session(self.concurrency)
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.concurrency,
+            thread_name_prefix="whatsapp-outbox"
+        )
+        self._thread = threading.Thread(
+            target=self._run,
+            name="whatsapp-outbox-dispatcher",
+            daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+        if self._pool:
+            self._pool.shutdown(wait=True)
+        if self._http:
+            self._http.close()
+
+    def wake(self):
+        """Skip the rest of the poll interval, e.g. right after a booking commit."""
+        self._wake.set()
+
+    # -------------------------------------------------
+    # Dispatcher
+    # -------------------------------------------------
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                claimed = self.run_once()
+            except Exception:
+                logger.exception("WhatsApp outbox dispatch failed")
+                claimed = 0
+
+            if not claimed:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def run_once(self) -> int:
+        # only claim as many rows as there are idle sender threads
+        if not self._slots.acquire(timeout=self.poll_interval):
+            return 0
+
+        free = 1
+        while free < self.concurrency and self._slots.acquire(blocking=False):
+            free += 1
+
+        rows = self._claim(free)
+
+        for _ in range(free - len(rows)):
+            self._slots.release()
+
+        for row in rows:
+            self._pool.submit(self._deliver, *row)
+
+        return len(rows)
+
+    def _claim(self, limit: int):
+        db = self.session_factory()
+        try:
+            now = _now()
+            rows = (
+                db.query(WhatsAppOutbox)
+                .filter(
+                    WhatsAppOutbox.status.in_(["pending", "sending"]),
+                    WhatsAppOutbox.next_attempt_at <= now
+                )
+                .order_by(WhatsAppOutbox.next_attempt_at, WhatsAppOutbox.id)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+
+            claimed = []
+            for row in rows:
+                row.status = "sending"
+                row.next_attempt_at = now + SENDING_LEASE
+                claimed.append((row.id, row.phone_number, row.payload, row.attempts))
+
+            db.commit()
+            return claimed
+        finally:
+            db.close()
+
+    # -------------------------------------------------
+    # Sender
+    # -------------------------------------------------
+    def _deliver(self, outbox_id: int, phone_number: str, payload: dict, attempts: int):
+        try:
+            wait = self.rate_limiter.acquire(phone_number)
+            if wait:
+                self._finish(outbox_id, status="pending", next_attempt_at=_now() + timedelta(seconds=wait))
+                return
+
+            try:
+                send_whatsapp_message(self._http, payload, api_url=self.api_url)
+            except Exception as e:
+                self._failed(outbox_id, attempts + 1, e)
+                return
+
+            self._finish(outbox_id, status="sent", attempts=attempts + 1, sent_at=_now(), last_error=None)
+        except Exception:
+            logger.exception("WhatsApp outbox row %s could not be updated", outbox_id)
+        finally:
+            self._slots.release()
+
+    def _failed(self, outbox_id: int, attempts: int, error: Exception):
+        # 4xx other than 429 means the request itself is wrong, retrying won't help
+        permanent = (
+            isinstance(error, requests.HTTPError)
+            and error.response is not None
+            and 400 <= error.response.status_code < 500
+            and error.response.status_code != 429
+        )
+
+        if permanent or attempts >= self.max_attempts:
+            logger.error("WhatsApp outbox row %s failed after %s attempts: %s", outbox_id, attempts, error)
+            self._finish(outbox_id, status="failed", attempts=attempts, last_error=str(error))
+            return
+
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempts - 1))
+        delay *= random.uniform(0.8, 1.2)
+        logger.warning("WhatsApp outbox row %s attempt %s failed, retrying in %.0fs: %s", outbox_id, attempts, delay, error)
+
+        self._finish(
+            outbox_id,
+            status="pending",
+            attempts=attempts,
+            next_attempt_at=_now() + timedelta(seconds=delay),
+            last_error=str(error),
+        )
+
+    def _finish(self, outbox_id: int, **values):
+        db = self.session_factory()
+        try:
+            db.query(WhatsAppOutbox).filter(WhatsAppOutbox.id == outbox_id).update(
+                values, synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+
+
+outbox_worker = WhatsAppOutboxWorker()
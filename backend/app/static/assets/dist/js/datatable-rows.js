@@ -0,0 +1,66 @@
+// Helpers for the compact datatable responses:
+//   { columns: ["id", "name", ...], data: [[1, "..."], ...], urls: { edit: ".../__id__/edit", ... } }
+// Rows arrive as arrays of raw values; the cells and action links are built
+// here instead of being sent as HTML for every row.
+
+const ROW_ID_PLACEHOLDER = "__id__";
+
+// Arrays -> objects keyed by column name, so DataTables columns can keep
+// using `data: "name"`.
+function compactRows(json) {
+    const columns = json.columns || [];
+    return (json.data || []).map(function (values) {
+        const row = {};
+        for (let i = 0; i < columns.length; i++) {
+            row[columns[i]] = values[i];
+        }
+        return row;
+    });
+}
+
+function escapeHtml(value) {
+    return String(value)
+        .replace(/&/g, "&amp;")
+        .replace(/</g, "&lt;")
+        .replace(/>/g, "&gt;")
+        .replace(/"/g, "&quot;")
+        .replace(/'/g, "&#39;");
+}
+
+// escaped cell text, "-" when empty
+function cellText(value) {
+    if (value === null || value === undefined || value === "") {
+        return "-";
+    }
+    return escapeHtml(value);
+}
+
+function rowUrl(pattern, id) {
+    return pattern.replace(ROW_ID_PLACEHOLDER, encodeURIComponent(id));
+}
+
+// "2026-01-21" -> "21-01-2026"
+function displayDate(value) {
+    if (!value) {
+        return "-";
+    }
+    const parts = value.split("-");
+    return parts.length === 3 ? `${parts[2]}-${parts[1]}-${parts[0]}` : cellText(value);
+}
+
+// Edit link + delete button of one row. `options`: deleteClass (the class
+// the page's confirm handler listens on), editIcon, trashIcon and optional
+// editTitle / deleteTitle.
+function rowActions(urls, id, options) {
+    const editTitle = options.editTitle ? ` title="${escapeHtml(options.editTitle)}"` : "";
+    const deleteTitle = options.deleteTitle ? ` title="${escapeHtml(options.deleteTitle)}"` : "";
+    return `
+        <a href="${escapeHtml(rowUrl(urls.edit, id))}" class="btn btn-sm btn-edit"${editTitle}>
+            <img src="${options.editIcon}" alt="Edit" class="table-icon">
+        </a>
+        <a href="javascript:void(0)"
+           class="${options.deleteClass} btn btn-sm btn-delete"
+           data-route="${escapeHtml(rowUrl(urls.delete, id))}"${deleteTitle}>
+            <img src="${options.trashIcon}" alt="Delete" class="table-icon">
+        </a>`;
+}
@@ -0,0 +1,145 @@
+from datetime import date, time
+from decimal import Decimal
+from sqlalchemy import func, select, tuple_
+
+MAX_PAGE_LENGTH = 500
+
+# stands in for the row id in the URL patterns sent with compact rows
+ID_PLACEHOLDER = "__id__"
+
+
+def parse_datatable_params(request, orderable_columns: dict, default_order: str):
+    """
+    Reads the DataTables server-side parameters (draw/start/length/search/order)
+    from the query string.
+
+    `orderable_columns` maps a DataTables column index to a sort key name,
+    anything else falls back to `default_order`.
+    """
+    params = request.query_params
+
+    def as_int(name, default):
+        try:
+            return int(params.get(name, default))
+        except (TypeError, ValueError):
+            return default
+
+    length = as_int("length", 10)
+    if length < 0 or length > MAX_PAGE_LENGTH:
+        length = MAX_PAGE_LENGTH
+
+    order_column = as_int("order[0][column]", -1)
+    direction = "asc" if params.get("order[0][dir]") == "asc" else "desc"
+
+    return {
+        "draw": as_int("draw", 0),
+        "start": max(as_int("start", 0), 0),
+        "length": length,
+        "search": (params.get("search[value]") or "").strip(),
+        "order": orderable_columns.get(order_column, default_order),
+        "direction": direction,
+        "cursor": params.get("cursor") or None,
+    }
+
+
+def encode_cursor(values) -> str:
+    return "|".join(
+        v.isoformat() if isinstance(v, date) else str(v)
+        for v in values
+    )
+
+
+def decode_cursor(cursor: str, types):
+    """
+    Turns "2026-01-21|42" back into (date(2026, 1, 21), 42).
+    Returns None for anything that doesn't match `types`.
+    """
+    parts = cursor.split("|")
+    if len(parts) != len(types):
+        return None
+
+    try:
+        return tuple(
+            date.fromisoformat(part) if t is date else t(part)
+            for part, t in zip(parts, types)
+        )
+    except ValueError:
+        return None
+
+
+def count_statement(stmt):
+    """
+    SELECT count(*) over `stmt` (a select() or Query), ignoring its ORDER BY.
+    """
+    return select(func.count()).select_from(stmt.order_by(None).subquery())
+
+
+def apply_keyset(stmt, key_columns, direction: str, cursor, start: int, length: int):
+    """
+    Orders `stmt` (a select() or Query) by `key_columns` and limits it to one
+    page.
+
+    When a cursor (the key of the last row of the previous page) is given the
+    page is fetched with a row-value comparison, so the database seeks straight
+    to it instead of walking `start` rows like OFFSET does.
+    """
+    if direction == "asc":
+        ordering = [c.asc() for c in key_columns]
+    else:
+        ordering = [c.desc() for c in key_columns]
+
+    stmt = stmt.order_by(*ordering)
+
+    if cursor is not None:
+        if len(key_columns) == 1:
+            key, value = key_columns[0], cursor[0]
+        else:
+            key, value = tuple_(*key_columns), tuple_(*cursor)
+
+        stmt = stmt.filter(key > value if direction == "asc" else key < value)
+    elif start:
+        stmt = stmt.offset(start)
+
+    return stmt.limit(length)
+
+
+def selected_fields(request, available) -> list:
+    """
+    The columns asked for with `fields=name,phone`, in `available` order and
+    always with "id" (the row actions need it). Without the parameter every
+    column of `available` is returned; unknown names are ignored.
+    """
+    asked = request.query_params.get("fields")
+    if not asked:
+        return list(available)
+
+    wanted = {name.strip() for name in asked.split(",")}
+    return [name for name in available if name == "id" or name in wanted]
+
+
+def _plain(value):
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def compact_rows(rows, fields) -> dict:
+    """
+    `rows` (Projection tuples) as {"columns": fields, "data": [[...], ...]}:
+    the column names once, then each row as a plain array of raw values.
+    Dates and times go out as ISO strings, decimals as strings.
+    """
+    return {
+        "columns": list(fields),
+        "data": [[_plain(getattr(row, name)) for name in fields] for row in rows],
+    }
+
+
+def url_pattern(request, name: str, id_param: str) -> str:
+    """
+    url_for() of a per-row route with ID_PLACEHOLDER as its id, sent once
+    per response instead of one URL per row.
+    """
+    return str(request.url_for(name, **{id_param: ID_PLACEHOLDER}))
@@ -1,18 +0,0 @@
-import os
-import uuid
-from fastapi import UploadFile
-
-UPLOAD_DIR = "static/uploads/tours"
-
-
-def save_file(file: UploadFile) -> str:
-    os.makedirs(UPLOAD_DIR, exist_ok=True)
-
-    ext = file.filename.split(".")[-1]
-    filename = f"{uuid.uuid4()}.{ext}"
-    file_path = os.path.join(UPLOAD_DIR, filename)
-
-    with open(file_path, "wb") as f:
-        f.write(file.file.read())
-
-    return file_path
@@ -0,0 +1,331 @@
+"""
+Request, database, template and connection pool metrics in the Prometheus
+text format (served on /metrics), plus a log line for slow requests.
+
+Everything is kept in memory per process: with several uvicorn workers
+each one reports its own numbers, scrape them one by one or add them up.
+
+- MetricsMiddleware times each request by route template and keeps the
+  request's RequestStats in a context variable.
+- instrument_engine() counts and times the SQL statements of an engine
+  (SQLAlchemy cursor events) into the current request's stats.
+- TimedQueuePool / TimedAsyncQueuePool time the wait for a connection.
+- TimedTemplate times Jinja2 renders (set as the env's template_class).
+"""
+import heapq
+import logging
+import re
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from jinja2 import Template
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# statements kept per request for the slow-request log
+SLOW_STATEMENTS = 5
+MAX_LOGGED_SQL = 1000
+WHITESPACE = re.compile(r"\s+")
+
+
+# -------------------------------------------------
+# Registry
+# -------------------------------------------------
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            yield f"{self.name}{_labels(self.label_names, labels)} {value}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        # labels -> [count per bucket..., +Inf count, sum]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            else:
+                series[-2] += 1
+            series[-1] += value
+
+    def samples(self):
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+
+        for labels, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+                cumulative += count
+                le = f'le="{bound}"'
+                yield f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.label_names, labels)} {series[-1]}"
+            yield f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}"
+
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Request latency, response body included.",
+    labels=("method", "route", "status"),
+)
+REQUEST_STATEMENTS = Histogram(
+    "http_request_db_statements", "SQL statements run by one request.",
+    labels=("route",), buckets=COUNT_BUCKETS,
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds", "Time one request spent in SQL statements.",
+    labels=("route",),
+)
+STATEMENTS = Counter("db_statements_total", "SQL statements run.", labels=("engine",))
+STATEMENT_SECONDS = Counter("db_statement_seconds_total", "Time spent in SQL statements.", labels=("engine",))
+TEMPLATE_SECONDS = Histogram("template_render_seconds", "Jinja2 render time.", labels=("template",))
+POOL_WAIT_SECONDS = Histogram(
+    "db_pool_checkout_wait_seconds", "Wait for a pooled connection, new connections included.",
+    labels=("engine",), buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5, 30),
+)
+
+METRICS = [
+    REQUEST_SECONDS, REQUEST_STATEMENTS, REQUEST_DB_SECONDS,
+    STATEMENTS, STATEMENT_SECONDS, TEMPLATE_SECONDS, POOL_WAIT_SECONDS,
+]
+
+# engine label -> engine, for the pool gauges
+_engines = {}
+
+
+def _pool_samples():
+    yield "# HELP db_pool_connections Connections of the pool by state."
+    yield "# TYPE db_pool_connections gauge"
+    for label, engine in sorted(_engines.items()):
+        pool = engine.pool
+        if not isinstance(pool, QueuePool):
+            continue
+        yield f'db_pool_connections{{engine="{label}",state="checked_out"}} {pool.checkedout()}'
+        yield f'db_pool_connections{{engine="{label}",state="idle"}} {pool.checkedin()}'
+        yield f'db_pool_connections{{engine="{label}",state="overflow"}} {max(pool.overflow(), 0)}'
+        yield f'db_pool_connections{{engine="{label}",state="limit"}} {pool.size() + pool._max_overflow}'
+
+
+def render() -> str:
+    lines = []
+    for metric in METRICS:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    lines.extend(_pool_samples())
+    return "\n".join(lines) + "\n"
+
+
+# -------------------------------------------------
+# Per-request stats
+# -------------------------------------------------
+@dataclass
+class RequestStats:
+    statements: int = 0
+    db_seconds: float = 0.0
+    pool_wait_seconds: float = 0.0
+    template_seconds: float = 0.0
+    # min-heap of (seconds, n, sql), the slowest SLOW_STATEMENTS
+    slowest: list = field(default_factory=list)
+
+    def add_statement(self, seconds: float, sql: str):
+        self.statements += 1
+        self.db_seconds += seconds
+        entry = (seconds, self.statements, sql)
+        if len(self.slowest) < SLOW_STATEMENTS:
+            heapq.heappush(self.slowest, entry)
+        elif seconds > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, entry)
+
+
+_current = ContextVar("request_stats", default=None)
+
+
+def current_stats():
+    """The RequestStats of the request being handled, None outside one."""
+    return _current.get()
+
+
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # a Mount (static files) puts its prefix into root_path
+    return scope.get("root_path") or "<unmatched>"
+
+
+def _log_slow(scope, label: str, status: int, seconds: float, stats: RequestStats):
+    statements = "\n".join(
+        f"  {statement_seconds * 1000:8.1f}ms  {WHITESPACE.sub(' ', sql)[:MAX_LOGGED_SQL]}"
+        for statement_seconds, _, sql in sorted(stats.slowest, reverse=True)
+    )
+    logger.warning(
+        "Slow request %s %s (%s) %d: %.0fms, %d statements in %.0fms, pool wait %.0fms, templates %.0fms%s",
+        scope["method"], scope["path"], label, status, seconds * 1000,
+        stats.statements, stats.db_seconds * 1000, stats.pool_wait_seconds * 1000,
+        stats.template_seconds * 1000, "\n" + statements if statements else "",
+    )
+
+
+class MetricsMiddleware:
+    """ASGI middleware, times every HTTP request by route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            seconds = time.perf_counter() - started
+            _current.reset(token)
+
+            label = _route_label(scope)
+            REQUEST_SECONDS.observe(seconds, scope["method"], label, status)
+            REQUEST_STATEMENTS.observe(stats.statements, label)
+            REQUEST_DB_SECONDS.observe(stats.db_seconds, label)
+
+            if settings.SLOW_REQUEST_MS and seconds * 1000 >= settings.SLOW_REQUEST_MS:
+                _log_slow(scope, label, status, seconds, stats)
+
+
+# -------------------------------------------------
+# SQLAlchemy
+# -------------------------------------------------
+def instrument_engine(engine, label: str):
+    """Counts and times the statements of a (sync) Engine."""
+    _engines[label] = engine
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _finish(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info["metrics_started"].pop()
+        STATEMENTS.inc(label)
+        STATEMENT_SECONDS.inc(label, amount=seconds)
+        stats = _current.get()
+        if stats is not None:
+            stats.add_statement(seconds, statement)
+
+    @event.listens_for(engine, "handle_error")
+    def _failed(context):
+        started = context.connection.info.get("metrics_started") if context.connection else None
+        if started:
+            started.pop()
+
+
+class _TimedCheckout:
+    label = ""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            seconds = time.perf_counter() - started
+            POOL_WAIT_SECONDS.observe(seconds, self.label)
+            stats = _current.get()
+            if stats is not None:
+                stats.pool_wait_seconds += seconds
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    label = "sync"
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    label = "async"
+
+
+# -------------------------------------------------
+# Jinja2
+# -------------------------------------------------
+def _record_render(name: str, seconds: float):
+    TEMPLATE_SECONDS.observe(seconds, name or "<string>")
+    stats = _current.get()
+    if stats is not None:
+        stats.template_seconds += seconds
+
+
+class TimedTemplate(Template):
+    """Template that records its render time (set as Environment.template_class)."""
+
+    def render(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            _record_render(self.name, time.perf_counter() - started)
+
+    async def render_async(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await super().render_async(*args, **kwargs)
+        finally:
+            _record_render(self.name, time.perf_counter() - started)
@@ -0,0 +1,167 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from fastapi import Request
+from fastapi.responses import Response
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.catalogue_version import CatalogueVersion
+
+# Responses that differ per visitor are never cached
+PERSONAL_COOKIES = ("flash_success", "flash_error")
+
+
+@dataclass(frozen=True)
+class CachedPage:
+    version: int
+    etag: str
+    body: bytes
+    media_type: str
+
+
+class PageCache:
+    """
+    Rendered public pages keyed by URL (+ XHR flag), valid for one catalogue
+    version.
+
+    The version lives in the catalogue_version table so every worker sees a
+    bump. Each process re-reads it at most every `version_ttl` seconds, so a
+    change is visible everywhere within that window without a query per hit.
+    """
+
+    def __init__(self, max_entries: int, version_ttl: float):
+        self.max_entries = max_entries
+        self.version_ttl = version_ttl
+        self._pages = OrderedDict()
+        self._version = None
+        self._version_read_at = 0.0
+        self._lock = threading.Lock()
+
+    # -------------------------------------------------
+    # Catalogue version
+    # -------------------------------------------------
+    def _fresh_version(self):
+        if self._version is not None and time.monotonic() - self._version_read_at < self.version_ttl:
+            return self._version
+        return None
+
+    def _store_version(self, version):
+        self._version = version
+        self._version_read_at = time.monotonic()
+        return version
+
+    def expire_version(self, *_):
+        self._version = None
+
+    async def version(self, db) -> int | None:
+        version = self._fresh_version()
+        if version is None:
+            version = self._store_version(
+                await db.scalar(select(CatalogueVersion.version).where(CatalogueVersion.id == 1))
+            )
+        return version
+
+    # -------------------------------------------------
+    # Pages
+    # -------------------------------------------------
+    def get(self, key: str, version: int) -> CachedPage | None:
+        with self._lock:
+            page = self._pages.get(key)
+            if page is None or page.version != version:
+                return None
+            self._pages.move_to_end(key)
+            return page
+
+    def put(self, key: str, version: int, body: bytes, media_type: str) -> CachedPage:
+        page = CachedPage(
+            version=version,
+            etag='"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest(),
+            body=body,
+            media_type=media_type,
+        )
+
+        with self._lock:
+            self._pages[key] = page
+            self._pages.move_to_end(key)
+            while len(self._pages) > self.max_entries:
+                self._pages.popitem(last=False)
+
+        return page
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+        self.expire_version()
+
+
+page_cache = PageCache(
+    max_entries=settings.PAGE_CACHE_SIZE,
+    version_ttl=settings.PAGE_CACHE_VERSION_TTL,
+)
+
+
+def bump_catalogue_version(db: Session):
+    """
+    Marks the public catalogue as changed, in the caller's transaction.
+    Does not commit.
+    """
+    db.execute(
+        update(CatalogueVersion)
+        .where(CatalogueVersion.id == 1)
+        .values(version=CatalogueVersion.version + 1)
+    )
+    # this process sees the new version as soon as it is committed
+    event.listen(db, "after_commit", page_cache.expire_version, once=True)
+
+
+def _cache_key(request: Request) -> str:
+    xhr = request.headers.get("X-Requested-With") == "XMLHttpRequest"
+    return f"{'xhr' if xhr else 'page'}:{request.url}"
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in (tag.strip() for tag in if_none_match.split(","))
+
+
+async def cached_page(request: Request, db, render, cacheable: bool = True):
+    """
+    Serves `await render()` (an HTML response) through the page cache with a
+    strong ETag, answering a matching If-None-Match with 304.
+
+    Only 200 responses are cached, error pages and redirects pass through.
+    """
+    if not cacheable or any(request.cookies.get(name) for name in PERSONAL_COOKIES):
+        return await render()
+
+    version = await page_cache.version(db)
+    if version is None:
+        return await render()
+
+    key = _cache_key(request)
+    page = page_cache.get(key, version)
+
+    if page is None:
+        response = await render()
+        if response.status_code != 200:
+            return response
+        page = page_cache.put(key, version, response.body, response.media_type)
+
+    headers = {
+        "ETag": page.etag,
+        "Cache-Control": "public, no-cache",
+        "Vary": "X-Requested-With",
+    }
+
+    if _etag_matches(request.headers.get("if-none-match"), page.etag):
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=page.body, media_type=page.media_type, headers=headers)
@@ -0,0 +1,159 @@
+"""
+Lazy-load (N+1) detector and per-route query budgets, opt-in with
+QUERY_DEBUG:
+
+- "log": repeated lazy loads of a request are logged with their call site
+  (Python line or template line), so are routes over their budget.
+- "raise": a route over its budget raises QueryBudgetExceeded once the
+  response is done. The test client re-raises it, failing the test.
+
+Budgets are declared on the endpoint:
+
+    @router.get("/datatable")
+    @query_budget(statements=4)
+    def datatable(...):
+
+`statements` counts every SQL statement of the request (from the metrics
+middleware's RequestStats), `lazy_loads` the relationship lazy loads.
+"""
+import logging
+import os
+import sys
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.utils.metrics import current_stats
+
+logger = logging.getLogger(__name__)
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASE_DIR = os.path.dirname(APP_DIR)
+
+# the same lazy load this many times in one request is reported
+REPEATED_LAZY_LOADS = 2
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@dataclass(frozen=True)
+class QueryBudget:
+    statements: int
+    lazy_loads: int = 0
+
+
+def query_budget(statements: int, lazy_loads: int = 0):
+    """Declares the most statements / lazy loads one request of the route may run."""
+    def decorate(endpoint):
+        endpoint.query_budget = QueryBudget(statements, lazy_loads)
+        return endpoint
+    return decorate
+
+
+# (parent class, loaded class, call site) -> count, for the current request
+_lazy_loads = ContextVar("lazy_loads", default=None)
+
+
+# -------------------------------------------------
+# Lazy loads
+# -------------------------------------------------
+def _call_site() -> str:
+    """The innermost frame in the app's own code or templates."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        # templates compile with their (relative) loader path as filename
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if filename.startswith(APP_DIR) and filename != __file__:
+            template = frame.f_globals.get("__jinja_template__")
+            if template is not None:
+                line = template.get_corresponding_lineno(frame.f_lineno)
+                return f"{os.path.relpath(filename, BASE_DIR)}:{line}"
+            return f"{os.path.relpath(filename, BASE_DIR)}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "<unknown>"
+
+
+def _on_orm_execute(state):
+    loads = _lazy_loads.get()
+    if loads is None or state.lazy_loaded_from is None:
+        return
+
+    parent = state.lazy_loaded_from.class_.__name__
+    target = state.bind_mapper.class_.__name__ if state.bind_mapper else "?"
+    loads[(parent, target, _call_site())] += 1
+
+
+def install():
+    """Hooks every ORM session's executions. Called once, at startup."""
+    if not event.contains(Session, "do_orm_execute", _on_orm_execute):
+        event.listen(Session, "do_orm_execute", _on_orm_execute)
+
+
+# -------------------------------------------------
+# Per request
+# -------------------------------------------------
+def _describe(loads: Counter, minimum: int = 1) -> str:
+    return "\n".join(
+        f"  {count:>4}x {parent} -> {target} at {site}"
+        for (parent, target, site), count in loads.most_common()
+        if count >= minimum
+    )
+
+
+def check_request(scope, loads: Counter, mode: str):
+    """Logs or raises for one finished request."""
+    label = f"{scope['method']} {scope['path']}"
+
+    repeated = _describe(loads, REPEATED_LAZY_LOADS)
+    if repeated and mode == "log":
+        logger.warning("Repeated lazy loads in %s:\n%s", label, repeated)
+
+    route = scope.get("route")
+    budget = getattr(getattr(route, "endpoint", None), "query_budget", None)
+    stats = current_stats()
+    if budget is None or stats is None:
+        return
+
+    lazy = sum(loads.values())
+    if stats.statements <= budget.statements and lazy <= budget.lazy_loads:
+        return
+
+    message = (
+        f"{label} ran {stats.statements} statements ({budget.statements} allowed) "
+        f"and {lazy} lazy loads ({budget.lazy_loads} allowed)"
+    )
+    if loads:
+        message += "\n" + _describe(loads)
+    if mode == "raise":
+        raise QueryBudgetExceeded(message)
+    logger.warning("Query budget exceeded: %s", message)
+
+
+class QueryDebugMiddleware:
+    """
+    ASGI middleware collecting the lazy loads of each request. Goes inside
+    MetricsMiddleware, whose statement count it reads.
+    """
+
+    def __init__(self, app, mode: str = "log"):
+        self.app = app
+        self.mode = mode
+        install()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        loads = Counter()
+        token = _lazy_loads.set(loads)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _lazy_loads.reset(token)
+        check_request(scope, loads, self.mode)
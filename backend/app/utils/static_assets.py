@@ -0,0 +1,247 @@
+"""
+Fingerprinted, precompressed copies of the files under app/static/assets.
+
+`python -m app.commands.build_static` writes each asset as
+`<name>.<hash>.<ext>` into STATIC_BUILD_DIR, with .gz and .br siblings
+for text formats, and records the mapping in manifest.json:
+
+    assets/dist/css/style.css  ->  assets/dist/css/style.3f9c1a0b7d2e.css
+
+Templates link assets through `static_url('assets/...')`, which resolves
+to the fingerprinted name when the manifest has one. AssetStaticFiles
+serves those names with the best encoding the client accepts and a
+one-year immutable Cache-Control; every other path (uploads, assets added
+after the last build) is served from app/static as before.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import re
+from dataclasses import dataclass
+
+import brotli
+from jinja2 import pass_context
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse
+from starlette.staticfiles import StaticFiles
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SOURCE_DIR = "app/static"
+ASSET_DIRS = ("assets",)
+MANIFEST = "manifest.json"
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+# formats worth compressing, fonts (woff/woff2) and images already are
+COMPRESSIBLE = {".css", ".js", ".mjs", ".map", ".json", ".svg", ".txt", ".ttf", ".eot", ".ico", ".html", ".xml"}
+
+# (Content-Encoding, file suffix), preferred first
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+CSS_URL = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+
+
+@dataclass(frozen=True)
+class BuiltAsset:
+    path: str
+    encodings: tuple
+    media_type: str
+
+
+class AssetManifest:
+    """Source path -> fingerprinted path, read from the build directory."""
+
+    def __init__(self, build_dir: str):
+        self.build_dir = build_dir
+        self.paths = {}
+        self.built = {}
+
+    def load(self):
+        try:
+            with open(os.path.join(self.build_dir, MANIFEST)) as f:
+                assets = json.load(f)["assets"]
+        except FileNotFoundError:
+            logger.warning("No static asset manifest, run python -m app.commands.build_static")
+            assets = {}
+
+        self.paths = {source: entry["path"] for source, entry in assets.items()}
+        self.built = {
+            entry["path"]: BuiltAsset(
+                path=entry["path"],
+                encodings=tuple(entry["encodings"]),
+                media_type=mimetypes.guess_type(source)[0] or "application/octet-stream",
+            )
+            for source, entry in assets.items()
+        }
+
+    def resolve(self, path: str) -> str:
+        return self.paths.get(path, path)
+
+
+# loaded at startup (app.main lifespan)
+static_assets = AssetManifest(settings.STATIC_BUILD_DIR)
+
+
+@pass_context
+def static_url(context, path: str):
+    """Jinja global: URL of a static asset, fingerprinted when built."""
+    return context["request"].url_for("static", path=static_assets.resolve(path))
+
+
+def static_path(path: str) -> str:
+    """Root-relative URL of a static asset, for markup built in Python."""
+    return f"/static/{static_assets.resolve(path)}"
+
+
+# -------------------------------------------------
+# Serving
+# -------------------------------------------------
+def accepted_encodings(accept_encoding: str) -> set:
+    accepted = set()
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+class AssetStaticFiles(StaticFiles):
+    """StaticFiles that serves fingerprinted assets from the build directory."""
+
+    def __init__(self, *, manifest: AssetManifest, **kwargs):
+        super().__init__(**kwargs)
+        self.manifest = manifest
+
+    async def get_response(self, path: str, scope):
+        asset = self.manifest.built.get(path)
+        if asset is None:
+            return await super().get_response(path, scope)
+
+        if scope["method"] not in ("GET", "HEAD"):
+            raise HTTPException(status_code=405)
+
+        full_path = os.path.join(self.manifest.build_dir, asset.path)
+        headers = {"Cache-Control": IMMUTABLE, "Vary": "Accept-Encoding"}
+
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        for encoding, suffix in ENCODINGS:
+            if encoding in asset.encodings and encoding in accepted:
+                headers["Content-Encoding"] = encoding
+                full_path += suffix
+                break
+
+        return FileResponse(full_path, media_type=asset.media_type, headers=headers)
+
+
+# -------------------------------------------------
+# Build
+# -------------------------------------------------
+def _fingerprint(path: str, content: bytes) -> str:
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.{hashlib.sha256(content).hexdigest()[:12]}{ext}"
+
+
+def _rewrite_css(source: str, content: bytes, paths: dict) -> bytes:
+    """Points url(...) references at the fingerprinted files they resolve to."""
+    directory = os.path.dirname(source)
+
+    def replace(match):
+        quote, url = match.group(1), match.group(2).strip()
+        if url.startswith(("data:", "http:", "https:", "//", "/", "#")):
+            return match.group(0)
+
+        # font urls often carry ?v=... or #iefix, keep those as they are
+        target, rest = re.match(r"([^?#]*)(.*)", url).groups()
+        built = paths.get(os.path.normpath(os.path.join(directory, target)))
+        if built is None:
+            return match.group(0)
+        return f"url({quote}{os.path.relpath(built, directory)}{rest}{quote})"
+
+    text = content.decode("utf-8", errors="surrogateescape")
+    return CSS_URL.sub(replace, text).encode("utf-8", errors="surrogateescape")
+
+
+def _write(build_dir: str, path: str, content: bytes) -> tuple:
+    target = os.path.join(build_dir, path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target, "wb") as f:
+        f.write(content)
+
+    encodings = []
+    if os.path.splitext(path)[1] in COMPRESSIBLE:
+        compressed = {
+            "br": brotli.compress(content, quality=11),
+            "gzip": gzip.compress(content, compresslevel=9, mtime=0),
+        }
+        for encoding, suffix in ENCODINGS:
+            # not worth a separate file below ~10% saving
+            if len(compressed[encoding]) < len(content) * 0.9:
+                with open(target + suffix, "wb") as f:
+                    f.write(compressed[encoding])
+                encodings.append(encoding)
+    return tuple(encodings)
+
+
+def build(source_dir: str = SOURCE_DIR, build_dir: str = None, prune: bool = False) -> dict:
+    """
+    Fingerprints and compresses every asset and replaces the manifest.
+    Returns the manifest entries.
+
+    Files of earlier builds are kept, so a server still running with the
+    previous manifest keeps working until it restarts. `prune` removes
+    whatever the new manifest doesn't reference.
+    """
+    build_dir = build_dir or settings.STATIC_BUILD_DIR
+
+    sources = sorted(
+        os.path.relpath(os.path.join(root, name), source_dir)
+        for asset_dir in ASSET_DIRS
+        for root, _, names in os.walk(os.path.join(source_dir, asset_dir))
+        for name in names
+    )
+
+    # stylesheets last, their url(...) references need the final names
+    sources.sort(key=lambda path: path.endswith(".css"))
+
+    assets = {}
+    paths = {}
+    for source in sources:
+        with open(os.path.join(source_dir, source), "rb") as f:
+            content = f.read()
+        if source.endswith(".css"):
+            content = _rewrite_css(source, content, paths)
+
+        path = _fingerprint(source, content)
+        paths[source] = path
+        assets[source] = {"path": path, "encodings": list(_write(build_dir, path, content))}
+
+    manifest = os.path.join(build_dir, MANIFEST)
+    with open(manifest + ".tmp", "w") as f:
+        json.dump({"assets": assets}, f, indent=1, sort_keys=True)
+    os.replace(manifest + ".tmp", manifest)
+
+    if prune:
+        keep = {MANIFEST}
+        for entry in assets.values():
+            keep.add(entry["path"])
+            keep.update(entry["path"] + suffix for _, suffix in ENCODINGS)
+        for root, _, names in os.walk(build_dir):
+            for name in names:
+                path = os.path.relpath(os.path.join(root, name), build_dir)
+                if path not in keep:
+                    os.remove(os.path.join(root, name))
+
+    return assets
@@ -0,0 +1,122 @@
+"""
+The app against a scratch SQLite database (schema from the models), with
+QUERY_DEBUG=raise so a route over its query budget fails the request.
+Run from backend/:
+
+    python -m pytest -q
+"""
+import importlib.util
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATABASE_FILE = os.path.join(tempfile.mkdtemp(prefix="tour-booking-tests-"), "app.db")
+
+# settings are read at import, before the app is
+os.environ["DATABASE_URL"] = f"sqlite:///{DATABASE_FILE}"
+os.environ["QUERY_DEBUG"] = "raise"
+os.environ["SLOW_REQUEST_MS"] = "0"
+sys.path.insert(0, BACKEND_DIR)
+# template and static paths are relative to backend/
+os.chdir(BACKEND_DIR)
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+import app.models  # noqa: F401
+from app.auth.principal_cache import principal_cache
+from app.core.security import create_access_token
+from app.database.base import Base
+from app.database.session import SessionLocal, engine
+from app.main import app as fastapi_app
+from app.models.company import Company
+from app.models.driver import Driver
+from app.models.manual_booking import ManualBooking
+from app.models.tour_package import TourPackage, TourPackageDriver, TourPackageGalleryImage
+from app.models.user import User
+
+FIRST_TRAVEL_DATE = date(2026, 1, 1)
+
+# the FTS5 table of the public tour search only exists in its migration
+TOUR_SEARCH_MIGRATION = os.path.join(BACKEND_DIR, "alembic", "versions", "c2d7a9e4f1b6_add_tour_search_index.py")
+
+
+def create_schema():
+    Base.metadata.create_all(engine)
+
+    spec = importlib.util.spec_from_file_location("tour_search_migration", TOUR_SEARCH_MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    with engine.begin() as connection:
+        for statement in migration.SQLITE_UPGRADE:
+            connection.execute(text(statement))
+
+
+@pytest.fixture(scope="session")
+def dataset():
+    """One company with two tours, three drivers and 30 bookings, plus an admin."""
+    create_schema()
+    db = SessionLocal()
+    try:
+        owner = User(email="owner@example.com", password_hash="x", role="company")
+        admin = User(email="admin@example.com", password_hash="x", role="admin")
+        db.add_all([owner, admin])
+        db.flush()
+
+        company = Company(user_id=owner.id, company_name="Dune Tours", status="active", currency="AED")
+        db.add(company)
+        db.flush()
+
+        packages = [
+            TourPackage(
+                company_id=company.id, title=title, description=f"{title} with pickup",
+                country="UAE", city="Dubai", price=100, currency="AED", status="active",
+            )
+            for title in ("Desert Safari", "Dhow Cruise")
+        ]
+        db.add_all(packages)
+        db.flush()
+
+        for n in range(3):
+            driver = Driver(company_id=company.id, name=f"Driver {n}", country_code="+971",
+                            phone_number=f"50000000{n}", seats=6)
+            db.add(driver)
+            db.flush()
+            for package in packages:
+                db.add(TourPackageDriver(tour_package_id=package.id, driver_id=driver.id))
+
+        for package in packages:
+            db.add(TourPackageGalleryImage(tour_package_id=package.id, image_path="uploads/x.jpg", image_type="cover"))
+
+        for n in range(30):
+            db.add(ManualBooking(
+                guest_name=f"Guest {n}", phone=f"55{n:07d}", tour_package_id=packages[n % 2].id,
+                travel_date=FIRST_TRAVEL_DATE + timedelta(days=n % 10),
+                total_amount=200, advance_amount=50, remaining_amount=150, adults=2, kids=0,
+            ))
+        db.commit()
+
+        return {"owner": owner.id, "admin": admin.id, "package": packages[0].id}
+    finally:
+        db.close()
+
+
+def _client(user_id=None, role=None) -> TestClient:
+    client = TestClient(fastapi_app)
+    if user_id is not None:
+        client.cookies.set("access_token", create_access_token({"user_id": user_id, "role": role}))
+    return client
+
+
+@pytest.fixture
+def clients(dataset):
+    # every request starts with a cold principal cache, the costliest case
+    principal_cache.clear()
+    return {
+        "company": _client(dataset["owner"], "company"),
+        "admin": _client(dataset["admin"], "admin"),
+        "public": _client(),
+    }
@@ -0,0 +1,56 @@
+"""
+Every route with a @query_budget, in its costlier variants (search, order,
+cursor, filters), stays within the budget. conftest runs the app with
+QUERY_DEBUG=raise, so a request over budget raises QueryBudgetExceeded.
+"""
+import pytest
+from fastapi.routing import APIRoute
+
+from app.main import app
+
+PAGE = "draw=1&length=10&start=0"
+NEXT_PAGE = "draw=2&length=10&start=10"
+BY_TRAVEL_DATE = "order[0][column]=2&order[0][dir]=asc"
+SEARCH = "search[value]=Guest"
+
+# (route name, client, query string)
+REQUESTS = [
+    ("manual_booking_datatable", "company", PAGE),
+    ("manual_booking_datatable", "company", f"{PAGE}&{SEARCH}"),
+    ("manual_booking_datatable", "company", f"{PAGE}&{BY_TRAVEL_DATE}"),
+    ("manual_booking_datatable", "company", f"{PAGE}&{BY_TRAVEL_DATE}&{SEARCH}"),
+    ("manual_booking_datatable", "company", f"{NEXT_PAGE}&cursor=21"),
+    ("manual_booking_datatable", "company", f"{NEXT_PAGE}&cursor=21&{SEARCH}"),
+    ("manual_booking_datatable", "company", f"{NEXT_PAGE}&{BY_TRAVEL_DATE}&cursor=2026-01-04|14"),
+    ("manual_booking_datatable", "company", f"{NEXT_PAGE}&{BY_TRAVEL_DATE}&cursor=2026-01-04|14&{SEARCH}"),
+    ("tour_package_availability_page", "company", ""),
+    ("company_datatable", "admin", ""),
+    ("my_tour_list", "company", ""),
+    ("my_tour_list", "company", "search=Desert"),
+    ("my_tour_list", "company", "travel_date=2026-01-01&date_to=2026-01-07&guests=4"),
+    ("my_tour_list", "company", "search=Desert&travel_date=2026-01-01&page=2"),
+    ("public_tour_list", "public", ""),
+    ("public_tour_list", "public", "search=desert"),
+    ("public_tour_list", "public", "search=desert&travel_date=2026-01-01&guests=4"),
+    ("public_tour_list", "public", "travel_date=2026-01-01&date_to=2026-01-07&page=2"),
+]
+
+
+def test_every_budgeted_route_is_exercised():
+    budgeted = {
+        route.name for route in app.routes
+        if isinstance(route, APIRoute) and hasattr(route.endpoint, "query_budget")
+    }
+    assert budgeted == {name for name, _, _ in REQUESTS}
+
+
+@pytest.mark.parametrize(
+    "name,client,query", REQUESTS,
+    ids=[f"{name}?{query}" if query else name for name, _, query in REQUESTS],
+)
+def test_route_within_query_budget(name, client, query, clients, dataset):
+    path_params = {"package_id": dataset["package"]} if name == "tour_package_availability_page" else {}
+    url = app.url_path_for(name, **path_params) + (f"?{query}" if query else "")
+
+    response = clients[client].get(url, follow_redirects=False)
+    assert response.status_code == 200